@@ -2,7 +2,11 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User,  ProductCategory, Product, Simulation
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from .models import User,  ProductCategory, Product, Simulation, TariffSchedule, RequestProfile, EmailOutbox, PaymentEvent
 
 @admin.register(User)
 class CustomUserAdmin(BaseUserAdmin):
@@ -35,7 +39,6 @@ class ProductCategoryAdmin(admin.ModelAdmin):
     """
     list_display = ('name', 'cemac_hs_code_prefix')
     search_fields = ('name', 'cemac_hs_code_prefix')
-    prepopulated_fields = {'cemac_hs_code_prefix': ('name',)} # Rempli auto le slug
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
@@ -73,4 +76,126 @@ class SimulationAdmin(admin.ModelAdmin):
         'guce_facilitation_fee', 'phytosanitary_tax', 'tel_fee', 'total_customs_cost'
     )
     date_hierarchy = 'simulated_at' # Permet de naviguer par date
-    raw_id_fields = ('user', 'product')
\ No newline at end of file
+    raw_id_fields = ('user', 'product', 'tariff_schedule')
+    list_select_related = ('user', 'product') # Une seule requête pour la liste
+    show_full_result_count = False # Pas de COUNT(*) sur toute la table à chaque filtre
+
+@admin.register(TariffSchedule)
+class TariffScheduleAdmin(admin.ModelAdmin):
+    """
+    Administration pour le modèle TariffSchedule.
+    Toute modification invalide la table des taux en mémoire (voir api/signals.py).
+    """
+    list_display = ('name', 'effective_from', 'effective_to', 'vat_rate', 'guce_facilitation_fee', 'tel_fee', 'updated_at')
+    search_fields = ('name',)
+    readonly_fields = ('updated_at',)
+    date_hierarchy = 'effective_from'
+    fieldsets = (
+        (None, {'fields': ('name', 'effective_from', 'effective_to', 'updated_at')}),
+        ("Droit de Douane (DD)", {'fields': (
+            'dd_rate_necessity_goods', 'dd_rate_raw_materials',
+            'dd_rate_intermediate_diverse_goods', 'dd_rate_consumption_goods',
+        )}),
+        ("Droits d'Accise (DA)", {'fields': (
+            'excise_luxury_rate', 'excise_alcohol_tobacco_rate', 'excise_vehicle_rate',
+        )}),
+        ("Taxes proportionnelles", {'fields': (
+            'vat_rate', 'cac_rate', 'ri_rate', 'tci_rate', 'cia_rate', 'pro_rate',
+            'prd_rate_with_niu', 'prd_rate_without_niu',
+        )}),
+        ("Montants forfaitaires", {'fields': (
+            'phytosanitary_rate_per_ton', 'guce_facilitation_fee', 'tel_fee',
+        )}),
+    )
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """
+    Administration de l'outbox des emails (voir api/outbox.py).
+    Remettre un email en échec au statut « En attente » le fait renvoyer.
+    """
+    list_display = ('subject', 'recipient', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('recipient', 'subject')
+    readonly_fields = ('simulation', 'recipient', 'subject', 'attempts', 'last_error', 'created_at', 'sent_at')
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    """
+    Administration des notifications de paiement (voir api/payments.py), en lecture seule.
+    Les références inconnues sont à vérifier auprès de l'opérateur.
+    """
+    list_display = ('received_at', 'provider', 'event_id', 'reference', 'successful', 'amount', 'state', 'simulation', 'processed_at')
+    list_filter = ('state', 'provider', 'successful')
+    search_fields = ('event_id', 'reference')
+    date_hierarchy = 'received_at'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Administration des profils de requêtes (voir api/profiling.py), en lecture seule.
+    Les requêtes les plus coûteuses apparaissent en premier ; date_hierarchy
+    permet de se limiter aux plus récentes.
+    """
+    list_display = ('created_at', 'method', 'path', 'view_name', 'status_code', 'duration_ms', 'sql_count', 'sql_time_ms', 'user')
+    list_filter = ('view_name', 'status_code', 'method')
+    search_fields = ('path', 'view_name', 'user__email')
+    ordering = ('-duration_ms',)
+    date_hierarchy = 'created_at'
+    list_select_related = ('user',)
+    fields = (
+        'id', 'created_at', 'user', 'method', 'path', 'view_name', 'status_code',
+        'duration_ms', 'sql_count', 'sql_time_ms', 'profile_download', 'stats_display', 'sql_display',
+    )
+    readonly_fields = fields
+
+    def get_queryset(self, request):
+        # Le profil binaire n'est lu qu'au téléchargement
+        return super().get_queryset(request).defer('profile_data')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path('<uuid:object_id>/profile.prof', self.admin_site.admin_view(self.download_view), name='api_requestprofile_download'),
+        ] + super().get_urls()
+
+    def download_view(self, request, object_id):
+        if not self.has_view_permission(request):
+            return HttpResponse(status=403)
+        profile = get_object_or_404(RequestProfile.objects.only('profile_data'), pk=object_id)
+        response = HttpResponse(bytes(profile.profile_data), content_type='application/octet-stream')
+        response['Content-Disposition'] = f'attachment; filename="{object_id}.prof"'
+        return response
+
+    @admin.display(description="Profil cProfile")
+    def profile_download(self, obj):
+        url = reverse('admin:api_requestprofile_download', args=[obj.pk])
+        return format_html('<a href="{}">Télécharger le fichier .prof</a> (snakeviz, pstats)', url)
+
+    @admin.display(description="Fonctions les plus coûteuses")
+    def stats_display(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.stats)
+
+    @admin.display(description="Requêtes SQL")
+    def sql_display(self, obj):
+        return format_html(
+            '<ol>{}</ol>',
+            format_html_join('', '<li><code>{}</code> ({} ms)</li>', ((query['sql'], query['duration_ms']) for query in obj.sql_queries))
+        )
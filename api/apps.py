@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Enregistre les receivers de signaux (invalidation des caches en mémoire)
+        from . import signals  # noqa: F401
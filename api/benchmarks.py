@@ -0,0 +1,181 @@
+# api/benchmarks.py
+
+"""
+Micro-benchmarks du calcul des coûts douaniers.
+
+Avant toute mesure, les deux moteurs de calcul (Simulation.calculate_customs_cost
+et compute_batch) sont comparés aux valeurs de référence de
+benchmark_data/golden_calculations.json, calculées avec les taux par défaut du
+modèle TariffSchedule. Un moteur plus rapide n'est accepté que s'il reproduit
+ces montants au centime près. Voir la commande benchmark_calculations.
+
+Ces valeurs fixent l'arrondi actuel, avec des taux décimaux exacts : 34 des
+montants de référence diffèrent d'un centime de l'ancien calcul par taux
+flottants (Decimal(float)), écarts détaillés par RoundingChangeTests.
+"""
+
+import json
+import statistics
+import timeit
+from decimal import Decimal, ROUND_HALF_EVEN
+from itertools import cycle, islice
+from pathlib import Path
+
+from .calculations import RESULT_FIELDS, ProductTaxProfile, compute_batch
+from .models import Product, Simulation, TariffSchedule, TariffSpecies
+from .serializers import SimulationCreateSerializer, SimulationDetailSerializer
+from .tariffs import override_rate_table
+
+GOLDEN_PATH = Path(__file__).resolve().parent / 'benchmark_data' / 'golden_calculations.json'
+CENT = Decimal('0.01')
+
+# Variantes de produit (accise, taxe phytosanitaire) croisées avec chaque espèce tarifaire
+PRODUCT_VARIANTS = (
+    {}, {'is_luxury': True}, {'is_alcohol_tobacco': True}, {'is_vehicle': True},
+    {'is_phytosanitary': True}, {'is_luxury': True, 'is_phytosanitary': True},
+)
+# Envois choisis pour les arrondis (demi-centimes, très petites et très grandes valeurs)
+SHIPMENTS = (
+    {'declared_value': '1000.00', 'transport_cost': '50.00', 'handling_cost': '20.00', 'weight_in_tons': '0.100', 'has_niu': True},
+    {'declared_value': '333.33', 'transport_cost': '0.00', 'handling_cost': '0.00', 'weight_in_tons': '0.000', 'has_niu': False},
+    {'declared_value': '0.01', 'transport_cost': '0.02', 'handling_cost': '0.03', 'weight_in_tons': '0.001', 'has_niu': True},
+    {'declared_value': '2500000.00', 'transport_cost': '187500.50', 'handling_cost': '42000.25', 'weight_in_tons': '12.345', 'has_niu': True},
+    {'declared_value': '9999999999.99', 'transport_cost': '12345.67', 'handling_cost': '0.05', 'weight_in_tons': '999.999', 'has_niu': False},
+)
+
+
+def default_rate_table():
+    """
+    Taux par défaut du modèle : les valeurs de référence ne dépendent pas des barèmes en base.
+    """
+    return TariffSchedule().compile()
+
+
+def build_golden_cases():
+    """
+    Calcule les cas de référence avec le calcul unitaire actuel.
+    """
+    cases = []
+    with override_rate_table(default_rate_table()):
+        for species in TariffSpecies.values:
+            for variant in PRODUCT_VARIANTS:
+                profile = {
+                    'tariff_species': species, 'is_luxury': False, 'is_alcohol_tobacco': False,
+                    'is_vehicle': False, 'is_phytosanitary': False, **variant,
+                }
+                for shipment in SHIPMENTS:
+                    expected = per_row_results(profile, shipment)
+                    cases.append({
+                        'product': profile, 'shipment': shipment,
+                        'expected': {field: str(value) for field, value in expected.items()},
+                    })
+    return cases
+
+
+GOLDEN_DESCRIPTION = (
+    "Montants de référence du calcul des coûts douaniers, avec les taux par défaut de "
+    "TariffSchedule. Ils fixent l'arrondi des taux décimaux exacts (Decimal(str)) : 34 montants "
+    "diffèrent d'un centime de l'ancien calcul par taux flottants (Decimal(float)), voir "
+    "RoundingChangeTests dans api/tests_calculations.py. Régénérés par "
+    "benchmark_calculations --update-golden."
+)
+
+
+def load_golden_cases(path=GOLDEN_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)['cases']
+
+
+def write_golden_cases(cases, path=GOLDEN_PATH):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({'description': GOLDEN_DESCRIPTION, 'cases': cases}, handle, indent=1, ensure_ascii=False)
+        handle.write('\n')
+
+
+def _shipment_values(shipment):
+    return {
+        field: value if field == 'has_niu' else Decimal(value)
+        for field, value in shipment.items()
+    }
+
+
+def per_row_results(profile, shipment):
+    """
+    Résultats de Simulation.calculate_customs_cost(), arrondis au centime comme en base.
+    """
+    simulation = Simulation(product=Product(**profile), **_shipment_values(shipment))
+    simulation.calculate_customs_cost()
+    return {
+        field: Decimal(getattr(simulation, field)).quantize(CENT, rounding=ROUND_HALF_EVEN)
+        for field in RESULT_FIELDS
+    }
+
+
+def check_golden_cases(cases):
+    """
+    Compare les deux moteurs aux valeurs de référence. Retourne la liste des écarts
+    (moteur, numéro du cas, champ, attendu, obtenu), vide si tout concorde.
+    """
+    mismatches = []
+    rates = default_rate_table()
+    shipments = [{'product': index, **_shipment_values(case['shipment'])} for index, case in enumerate(cases)]
+    profiles = {index: ProductTaxProfile(**case['product']) for index, case in enumerate(cases)}
+    columns = compute_batch(shipments, profiles, rates)
+
+    with override_rate_table(rates):
+        for index, case in enumerate(cases):
+            per_row = per_row_results(case['product'], case['shipment'])
+            for field in RESULT_FIELDS:
+                expected = Decimal(case['expected'][field])
+                for engine, value in (('calculate_customs_cost', per_row[field]), ('compute_batch', columns[field][index])):
+                    if value != expected:
+                        mismatches.append((engine, index, field, expected, value))
+    return mismatches
+
+
+def measure(function, number, repeat):
+    """
+    Chronomètre `function` : `repeat` séries de `number` appels.
+    Retourne les durées par appel en secondes (meilleure, médiane).
+    """
+    timings = [total / number for total in timeit.Timer(function).repeat(repeat=repeat, number=number)]
+    return min(timings), statistics.median(timings)
+
+
+def run_benchmarks(product, user, batch_size=1000, number=200, repeat=5):
+    """
+    Mesure le devis unitaire, le débit du calcul en lot et le coût des serializers.
+    `product` doit exister en base (validation de SimulationCreateSerializer).
+    Retourne {nom: {'best_us', 'median_us', ...}}.
+    """
+    shipment = dict(SHIPMENTS[0])
+    rates = default_rate_table()
+    results = {}
+
+    def record(name, timings, per_call=1):
+        best, median = timings
+        results[name] = {'best_us': round(best * 1e6 / per_call, 3), 'median_us': round(median * 1e6 / per_call, 3)}
+        return results[name]
+
+    with override_rate_table(rates):
+        def quote():
+            simulation = Simulation(product=product, **_shipment_values(shipment))
+            simulation.calculate_customs_cost()
+        record('single_quote', measure(quote, number, repeat))
+
+        shipments = [
+            {'product': product.pk, **_shipment_values(item)}
+            for item in islice(cycle(SHIPMENTS), batch_size)
+        ]
+        products = {product.pk: ProductTaxProfile.from_product(product)}
+        batch = record('batch_per_shipment', measure(lambda: compute_batch(shipments, products, rates), max(1, number // 20), repeat), per_call=batch_size)
+        batch['batch_size'] = batch_size
+        batch['throughput_per_s'] = round(1e6 / batch['best_us'])
+
+        data = {'product': product.pk, **shipment}
+        record('create_serializer_validation', measure(lambda: SimulationCreateSerializer(data=data).is_valid(raise_exception=True), number, repeat))
+
+        simulation = Simulation(pk=1, product=product, user=user, **_shipment_values(shipment))
+        simulation.calculate_customs_cost()
+        record('detail_serializer_output', measure(lambda: SimulationDetailSerializer(simulation).data, number, repeat))
+    return results
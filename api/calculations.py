@@ -0,0 +1,224 @@
+# api/calculations.py
+
+"""
+Moteur de calcul en lot des coûts douaniers.
+
+Là où Simulation.calculate_customs_cost() traite une instance à la fois, ce module
+calcule le détail des droits et taxes pour N envois en une seule passe, colonne
+par colonne. Les montants y sont des entiers à virgule fixe (10^-18 FCFA) : toutes
+les multiplications par un taux sont donc exactes, et le résultat arrondi au
+centime est identique à celui du calcul unitaire. Les taux viennent de la même
+table compilée (api/tariffs.py) que le calcul unitaire.
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+from typing import NamedTuple
+
+from .tariffs import get_rate_table
+
+# Colonnes de résultat, dans l'ordre des champs du modèle Simulation.
+RESULT_FIELDS = (
+    'customs_value_vd', 'customs_duty_dd', 'excise_duty_da', 'vat_tva',
+    'communal_additional_cac', 'it_royalty_ri', 'community_integration_tci',
+    'integration_contribution_cia', 'ohada_levy_pro', 'purchase_prepayment_prd',
+    'guce_facilitation_fee', 'phytosanitary_tax', 'tel_fee', 'total_customs_cost',
+)
+
+# Un montant est stocké en unités de 10^-UNIT_DIGITS FCFA, un taux en unités de
+# 10^-RATE_DIGITS. Le calcul enchaîne au plus quatre multiplications par un taux
+# (DD -> DA -> TVA -> CAC) à partir de montants au centime : 2 + 4 * 4 = 18 chiffres
+# suffisent pour que chaque division par RATE_SCALE tombe juste.
+UNIT_DIGITS = 18
+RATE_DIGITS = 4
+RATE_SCALE = 10 ** RATE_DIGITS
+CENT = 10 ** (UNIT_DIGITS - 2)
+
+
+def _to_units(value):
+    """
+    Convertit un montant décimal en entier à virgule fixe.
+    """
+    scaled = Decimal(value).scaleb(UNIT_DIGITS)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"Montant trop précis pour le calcul en lot : {value}")
+    return int(scaled)
+
+
+def _rate_units(rate):
+    """
+    Convertit un taux décimal en entier (unités de 10^-RATE_DIGITS).
+    """
+    scaled = Decimal(rate).scaleb(RATE_DIGITS)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"Taux trop précis pour le calcul en lot : {rate}")
+    return int(scaled)
+
+
+def _round_units(units):
+    """
+    Arrondit un montant à virgule fixe au centime (arrondi bancaire, comme le
+    DecimalField à 2 décimales) et le retourne en Decimal.
+    """
+    cents, remainder = divmod(units, CENT)
+    if remainder * 2 > CENT or (remainder * 2 == CENT and cents % 2):
+        cents += 1
+    return Decimal(cents).scaleb(-2)
+
+
+class _FixedPointRates(NamedTuple):
+    """
+    Taux d'une RateTable convertis en entiers à virgule fixe.
+    """
+    dd: dict
+    excise_luxury: int
+    excise_alcohol_tobacco: int
+    excise_vehicle: int
+    vat: int
+    cac: int
+    ri: int
+    tci: int
+    cia: int
+    pro: int
+    prd_with_niu: int
+    prd_without_niu: int
+    phytosanitary: int
+    guce_fee: int
+    tel_fee: int
+
+
+@lru_cache(maxsize=16)
+def _fixed_point_rates(rates):
+    """
+    Convertit une table de taux en entiers, une seule fois par table compilée.
+    """
+    return _FixedPointRates(
+        dd={species: _rate_units(rate) for species, rate in rates.dd_rates.items()},
+        excise_luxury=_rate_units(rates.excise_luxury_rate),
+        excise_alcohol_tobacco=_rate_units(rates.excise_alcohol_tobacco_rate),
+        excise_vehicle=_rate_units(rates.excise_vehicle_rate),
+        vat=_rate_units(rates.vat_rate),
+        cac=_rate_units(rates.cac_rate),
+        ri=_rate_units(rates.ri_rate),
+        tci=_rate_units(rates.tci_rate),
+        cia=_rate_units(rates.cia_rate),
+        pro=_rate_units(rates.pro_rate),
+        prd_with_niu=_rate_units(rates.prd_rate_with_niu),
+        prd_without_niu=_rate_units(rates.prd_rate_without_niu),
+        phytosanitary=_rate_units(rates.phytosanitary_rate_per_ton),
+        guce_fee=_to_units(rates.guce_facilitation_fee),
+        tel_fee=_to_units(rates.tel_fee),
+    )
+
+
+def _excise_units(product, units):
+    """
+    Taux d'accise applicable au produit (même priorité que le calcul unitaire).
+    """
+    if product.is_luxury:
+        return units.excise_luxury
+    if product.is_alcohol_tobacco:
+        return units.excise_alcohol_tobacco
+    if product.is_vehicle:
+        return units.excise_vehicle
+    return 0
+
+
+def compute_batch(shipments, products, rates=None):
+    """
+    Calcule le détail des coûts douaniers pour une liste d'envois.
+
+    `shipments` est une séquence de dictionnaires (product, declared_value,
+    transport_cost, handling_cost, weight_in_tons, has_niu), `product` étant l'id
+    du produit ; `products` associe chaque id à son instance Product (ou à son
+    ProductTaxProfile). `rates` est la RateTable à appliquer (par défaut, celle
+    du barème actif).
+    Retourne un dictionnaire {champ de résultat: liste de Decimal}, une valeur
+    par envoi, dans l'ordre des envois.
+    """
+    units = _fixed_point_rates(rates or get_rate_table())
+
+    catalog = [products[shipment['product']] for shipment in shipments]
+    dd_rates = [units.dd.get(product.tariff_species, 0) for product in catalog]
+    excise_rates = [_excise_units(product, units) for product in catalog]
+    prd_rates = [
+        units.prd_with_niu if shipment.get('has_niu', True) else units.prd_without_niu
+        for shipment in shipments
+    ]
+
+    vd = [
+        _to_units(shipment['declared_value'])
+        + _to_units(shipment.get('transport_cost', 0))
+        + _to_units(shipment.get('handling_cost', 0))
+        for shipment in shipments
+    ]
+    dd = [v * rate // RATE_SCALE for v, rate in zip(vd, dd_rates)]
+    da = [(v + d) * rate // RATE_SCALE for v, d, rate in zip(vd, dd, excise_rates)]
+    tva = [(v + d + a) * units.vat // RATE_SCALE for v, d, a in zip(vd, dd, da)]
+    cac = [t * units.cac // RATE_SCALE for t in tva]
+    ri = [v * units.ri // RATE_SCALE for v in vd]
+    tci = [v * units.tci // RATE_SCALE for v in vd]
+    cia = [v * units.cia // RATE_SCALE for v in vd]
+    pro = [v * units.pro // RATE_SCALE for v in vd]
+    prd = [v * rate // RATE_SCALE for v, rate in zip(vd, prd_rates)]
+    guce = [units.guce_fee] * len(vd)
+    phyto = [
+        _to_units(shipment.get('weight_in_tons', 0)) * units.phytosanitary // RATE_SCALE
+        if product.is_phytosanitary else 0
+        for shipment, product in zip(shipments, catalog)
+    ]
+    tel = [units.tel_fee] * len(vd)
+
+    columns = (vd, dd, da, tva, cac, ri, tci, cia, pro, prd, guce, phyto, tel)
+    total = [sum(parts) for parts in zip(*columns)]
+
+    return {
+        field: [_round_units(amount) for amount in column]
+        for field, column in zip(RESULT_FIELDS, columns + (total,))
+    }
+
+
+def compute_batch_by_rates(shipments, products, rate_tables):
+    """
+    Variante de compute_batch où chaque envoi a sa propre RateTable (par exemple
+    celle en vigueur à la date de chaque simulation). Les envois sont regroupés
+    par table, calculés groupe par groupe, puis remis dans l'ordre d'origine.
+    """
+    groups = {}
+    for position, rates in enumerate(rate_tables):
+        groups.setdefault(id(rates), (rates, []))[1].append(position)
+
+    columns = {field: [None] * len(shipments) for field in RESULT_FIELDS}
+    for rates, positions in groups.values():
+        group_columns = compute_batch([shipments[position] for position in positions], products, rates)
+        for field, values in group_columns.items():
+            column = columns[field]
+            for position, value in zip(positions, values):
+                column[position] = value
+    return columns
+
+
+class ProductTaxProfile(NamedTuple):
+    """
+    Attributs d'un produit utilisés par le calcul. Léger et sérialisable, il
+    remplace l'instance Product lorsque le calcul part dans un autre processus.
+    """
+    tariff_species: str
+    is_luxury: bool
+    is_alcohol_tobacco: bool
+    is_vehicle: bool
+    is_phytosanitary: bool
+
+    @classmethod
+    def from_product(cls, product):
+        return cls(
+            str(product.tariff_species), product.is_luxury, product.is_alcohol_tobacco,
+            product.is_vehicle, product.is_phytosanitary,
+        )
+
+
+def rows_from_columns(columns):
+    """
+    Transpose un résultat colonnaire en une liste de dictionnaires (un par envoi).
+    """
+    return [dict(zip(columns.keys(), values)) for values in zip(*columns.values())]
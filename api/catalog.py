@@ -0,0 +1,60 @@
+# api/catalog.py
+
+"""
+Instantanés en cache du catalogue (produits et catégories).
+
+Le catalogue change rarement mais il est lu à chaque chargement du frontend.
+Chaque liste est sérialisée une seule fois par révision du catalogue et gardée
+dans le cache Django. La révision est un compteur, lui aussi dans le cache,
+incrémenté par les signaux de api/signals.py à chaque enregistrement ou
+suppression d'un produit ou d'une catégorie. Elle sert aussi d'ETag : un client
+qui envoie If-None-Match reçoit un 304 sans aucune requête SQL.
+
+Les modifications en masse (QuerySet.update(), bulk_create()) n'émettent pas de
+signaux : appeler bump_catalog_revision() après ce type d'opération.
+"""
+
+import time
+
+from django.core.cache import cache
+
+REVISION_KEY = 'catalog:revision'
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+def get_catalog_revision():
+    """
+    Retourne la révision courante du catalogue.
+    """
+    # Initialisée à partir de l'horloge : après un vidage du cache, la nouvelle
+    # révision ne peut pas reprendre un ETag déjà distribué.
+    return cache.get_or_set(REVISION_KEY, time.time_ns, timeout=None)
+
+
+def bump_catalog_revision():
+    """
+    Invalide les instantanés du catalogue en passant à la révision suivante.
+    """
+    try:
+        cache.incr(REVISION_KEY)
+    except ValueError:
+        # Clé absente (cache vidé ou expiré) : la prochaine lecture la réinitialise
+        pass
+
+
+def catalog_etag(kind, revision):
+    return f'"{kind}-{revision}"'
+
+
+def get_catalog_snapshot(kind, build, revision=None):
+    """
+    Retourne les données sérialisées de `kind` pour la révision courante,
+    en appelant `build()` une seule fois par révision.
+    """
+    revision = revision if revision is not None else get_catalog_revision()
+    key = f'catalog:{kind}:{revision}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, SNAPSHOT_TIMEOUT)
+    return data
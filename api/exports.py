@@ -0,0 +1,123 @@
+# api/exports.py
+
+"""
+Export en flux de l'historique des simulations (CSV ou NDJSON, gzip optionnel).
+
+Les lignes sont lues par QuerySet.iterator() sous forme de tuples (values_list),
+sans instancier de modèle, puis encodées et envoyées par blocs : la mémoire
+utilisée ne dépend pas du nombre de simulations exportées.
+"""
+
+import csv
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .calculations import RESULT_FIELDS
+
+# Colonnes exportées : (nom dans le fichier, chemin dans values_list)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('simulated_at', 'simulated_at'),
+    ('user_email', 'user__email'),
+    ('product', 'product_id'),
+    ('product_name', 'product__name'),
+    ('product_hs_code', 'product__cemac_hs_code'),
+    ('declared_value', 'declared_value'),
+    ('transport_cost', 'transport_cost'),
+    ('handling_cost', 'handling_cost'),
+    ('weight_in_tons', 'weight_in_tons'),
+    ('has_niu', 'has_niu'),
+) + tuple((field, field) for field in RESULT_FIELDS) + (
+    ('tariff_schedule', 'tariff_schedule_id'),
+    ('is_paid', 'is_paid'),
+    ('payment_confirmation_code', 'payment_confirmation_code'),
+)
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Premiers caractères d'une cellule interprétée comme formule par les tableurs
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Taille visée des blocs envoyés au client
+BLOCK_SIZE = 64 * 1024
+
+
+class _Echo:
+    """
+    Pseudo-fichier pour csv.writer : write() retourne la ligne au lieu de l'écrire.
+    """
+    def write(self, value):
+        return value
+
+
+def iter_export_rows(queryset, chunk_size=2000):
+    """
+    Itère sur les lignes à exporter (tuples), par tranches de `chunk_size`.
+    """
+    return queryset.order_by('-simulated_at', '-id').values_list(
+        *(path for _, path in EXPORT_COLUMNS)
+    ).iterator(chunk_size=chunk_size)
+
+
+def _csv_cell(value):
+    """
+    Neutralise une cellule texte qu'un tableur interpréterait comme une formule
+    (nom de produit saisi par un administrateur, email...) en la préfixant d'une apostrophe.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+def _iter_ndjson(rows):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def _iter_blocks(lines):
+    """
+    Regroupe les lignes encodées en blocs d'environ BLOCK_SIZE octets.
+    """
+    block, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        block.append(data)
+        size += len(data)
+        if size >= BLOCK_SIZE:
+            yield b''.join(block)
+            block, size = [], 0
+    if block:
+        yield b''.join(block)
+
+
+def _iter_gzip(blocks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # en-tête gzip
+    for block in blocks:
+        compressed = compressor.compress(block)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(queryset, export_format='csv', compress=False, chunk_size=2000):
+    """
+    Retourne un générateur de blocs d'octets pour l'export de `queryset`.
+    """
+    rows = iter_export_rows(queryset, chunk_size=chunk_size)
+    lines = _iter_csv(rows) if export_format == 'csv' else _iter_ndjson(rows)
+    blocks = _iter_blocks(lines)
+    return _iter_gzip(blocks) if compress else blocks
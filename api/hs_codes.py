@@ -0,0 +1,198 @@
+# api/hs_codes.py
+
+"""
+Index en mémoire des codes SH (Système Harmonisé) du catalogue.
+
+Les codes sont normalisés (chiffres seuls : '6403.99.00.00' -> '6403990000')
+puis triés : les produits dont le code commence par un préfixe forment une
+tranche contiguë de la liste, trouvée par deux recherches dichotomiques.
+L'index est propre à chaque processus et reconstruit, en une requête, dès que
+la révision du catalogue (api/catalog.py) change.
+
+Le même module interprète les plages de ProductCategory.cemac_hs_code_prefix
+('01-24', '61-62', '87', ...) : CategoryIndex découpe ces plages imbriquées en
+segments élémentaires disjoints, chacun associé à la catégorie la plus précise
+qui le couvre, ce qui classe un code SH par une seule recherche dichotomique.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.apps import apps
+from django.db.models import F
+
+from .catalog import get_catalog_revision
+
+
+def normalize_hs_code(value):
+    """
+    Retourne les seuls chiffres d'un code SH ('64.03' -> '6403').
+    """
+    return ''.join(character for character in str(value) if character.isdigit())
+
+
+def format_hs_code(value):
+    """
+    Présente un code SH à 10 chiffres sous la forme du catalogue ('6403990000' ->
+    '6403.99.00.00'). Les autres longueurs sont conservées telles quelles.
+    """
+    digits = normalize_hs_code(value)
+    if len(digits) == 10:
+        return f'{digits[:4]}.{digits[4:6]}.{digits[6:8]}.{digits[8:]}'
+    return str(value).strip()
+
+
+class HsCodeIndex:
+    """
+    Liste triée des codes SH normalisés, avec le produit correspondant.
+    """
+
+    def __init__(self, entries):
+        # entries : dictionnaires avec au moins la clé 'cemac_hs_code'
+        self._entries = sorted(entries, key=lambda entry: normalize_hs_code(entry['cemac_hs_code']))
+        self._codes = [normalize_hs_code(entry['cemac_hs_code']) for entry in self._entries]
+
+    def __len__(self):
+        return len(self._codes)
+
+    def lookup(self, prefix, limit=20):
+        """
+        Retourne au plus `limit` produits dont le code commence par `prefix`,
+        par code croissant (les codes les plus courts, donc les plus proches, d'abord).
+        """
+        prefix = normalize_hs_code(prefix)
+        start = bisect_left(self._codes, prefix)
+        # ':' suit '9' dans l'ordre ASCII : borne supérieure de tous les codes du préfixe
+        end = bisect_left(self._codes, prefix + ':', lo=start)
+        return self._entries[start:min(end, start + limit)]
+
+
+def parse_hs_code_ranges(value):
+    """
+    Convertit une plage de préfixes ('01-24', '87', '61-62, 64') en intervalles
+    semi-ouverts [début, fin) sur les codes SH normalisés.
+    Lève ValueError si la plage est mal formée.
+    """
+    intervals = []
+    for part in str(value).split(','):
+        part = part.strip()
+        bounds = [bound.strip().replace('.', '') for bound in part.split('-')]
+        if len(bounds) > 2 or not all(bound.isdigit() for bound in bounds):
+            raise ValueError(f"Plage de codes SH invalide : '{part}' (attendu : '61' ou '01-24').")
+        low, high = bounds[0], bounds[-1]
+        if len(low) != len(high) or low > high:
+            raise ValueError(f"Plage de codes SH invalide : '{part}' (bornes de même longueur, dans l'ordre).")
+        # ':' suit '9' : tous les codes commençant par `high` sont avant high + ':'
+        intervals.append((low, high + ':'))
+    return intervals
+
+
+def find_overlapping_range(intervals, others):
+    """
+    Retourne le premier intervalle de `others` qui chevauche partiellement (ou
+    reproduit) un intervalle de `intervals`, ou None. Des plages imbriquées ou
+    disjointes sont admises : c'est ce qui rend « la plus précise » bien définie.
+    """
+    for start, end in intervals:
+        for other_start, other_end in others:
+            disjoint = end <= other_start or other_end <= start
+            nested = (start <= other_start and other_end <= end) or (other_start <= start and end <= other_end)
+            if not disjoint and (not nested or (start, end) == (other_start, other_end)):
+                return other_start, other_end
+    return None
+
+
+class CategoryIndex:
+    """
+    Index des plages SH des catégories : résout un code vers la catégorie la plus
+    précise en O(log n).
+    """
+
+    def __init__(self, categories):
+        # categories : couples (id de catégorie, plage cemac_hs_code_prefix) ;
+        # les plages vides ou mal formées sont ignorées.
+        ranges = []
+        for category_id, value in categories:
+            try:
+                ranges.extend((start, end, category_id) for start, end in parse_hs_code_ranges(value))
+            except ValueError:
+                continue
+        self._bounds = sorted({bound for start, end, _ in ranges for bound in (start, end)})
+        self._categories = []
+        for position, start in enumerate(self._bounds[:-1]):
+            end = self._bounds[position + 1]
+            covering = [entry for entry in ranges if entry[0] <= start and end <= entry[1]]
+            if not covering:
+                self._categories.append(None)
+                continue
+            # Plages imbriquées : la plus précise finit le plus tôt, puis commence le plus tard
+            first_end = min(entry[1] for entry in covering)
+            innermost = max((entry for entry in covering if entry[1] == first_end), key=lambda entry: entry[0])
+            self._categories.append(innermost[2])
+
+    def resolve(self, hs_code):
+        """
+        Retourne l'id de la catégorie la plus précise pour `hs_code`, ou None.
+        """
+        position = bisect_right(self._bounds, normalize_hs_code(hs_code)) - 1
+        if 0 <= position < len(self._categories):
+            return self._categories[position]
+        return None
+
+
+_lock = threading.Lock()
+_hs_code_index = (None, None)  # (révision du catalogue, index)
+_category_index = (None, None)
+
+
+def get_hs_code_index():
+    """
+    Retourne l'index des codes SH pour la révision courante du catalogue.
+    """
+    global _hs_code_index
+    revision = get_catalog_revision()
+    index_revision, index = _hs_code_index
+    if index_revision != revision:
+        with _lock:
+            index_revision, index = _hs_code_index
+            if index_revision != revision:
+                index = _load_hs_code_index()
+                _hs_code_index = (revision, index)
+    return index
+
+
+def _load_hs_code_index():
+    Product = apps.get_model('api', 'Product')
+    return HsCodeIndex(
+        Product.objects.values('id', 'name', 'cemac_hs_code', 'category', category_name=F('category__name'))
+    )
+
+
+def get_category_index():
+    """
+    Retourne l'index des plages SH des catégories pour la révision courante du catalogue.
+    """
+    global _category_index
+    revision = get_catalog_revision()
+    index_revision, index = _category_index
+    if index_revision != revision:
+        with _lock:
+            index_revision, index = _category_index
+            if index_revision != revision:
+                index = _load_category_index()
+                _category_index = (revision, index)
+    return index
+
+
+def classify_hs_code(hs_code):
+    """
+    Retourne l'id de la catégorie la plus précise couvrant `hs_code`, ou None.
+    """
+    return get_category_index().resolve(hs_code)
+
+
+def _load_category_index():
+    ProductCategory = apps.get_model('api', 'ProductCategory')
+    return CategoryIndex(
+        ProductCategory.objects.exclude(cemac_hs_code_prefix__isnull=True).values_list('id', 'cemac_hs_code_prefix')
+    )
@@ -0,0 +1,118 @@
+# api/idempotency.py
+
+"""
+Clés d'idempotence pour les POST rejoués par les clients mobiles.
+
+Une action décorée par @idempotent accepte l'en-tête `Idempotency-Key` (une
+valeur unique choisie par le client pour chaque opération, un UUID par
+exemple). La première réponse est enregistrée pour (utilisateur, clé) dans
+IdempotencyRecord, dans la même transaction que l'action ; une nouvelle
+tentative avec la même clé reçoit cette réponse telle quelle, avec l'en-tête
+`Idempotent-Replayed: true`, sans validation, calcul ni INSERT.
+
+- La même clé sur une autre requête (chemin ou corps différent) : 422.
+- La première requête est encore en cours : 409, le client réessaie plus tard.
+  Une réservation sans réponse après IN_PROGRESS_LEASE est celle d'un worker
+  arrêté en cours de requête : la tentative suivante la reprend et exécute
+  l'action. Le délai dépasse le timeout des workers HTTP ; si la première
+  requête finit malgré tout, l'enregistrement de sa réponse échoue et sa
+  transaction est annulée.
+- Une erreur serveur (5xx) n'est pas enregistrée : la tentative suivante rejoue l'action.
+- Les clés expirent après IDEMPOTENCY_TTL ; purge_idempotency_keys supprime les expirées.
+
+Sans l'en-tête, l'action se comporte comme avant.
+"""
+
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_TTL = timedelta(hours=24)
+IN_PROGRESS_LEASE = timedelta(seconds=60)
+MAX_KEY_LENGTH = 255
+
+
+def request_hash(request):
+    """
+    Empreinte de la requête : une clé ne vaut que pour une même méthode, un même chemin et un même corps.
+    """
+    digest = hashlib.sha256()
+    digest.update(f'{request.method} {request.get_full_path()}\n'.encode('utf-8'))
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _error(detail, status_code):
+    return Response({"detail": detail}, status=status_code)
+
+
+def idempotent(view_method):
+    """
+    Rend une action POST d'un ViewSet idempotente par l'en-tête Idempotency-Key.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(f"L'en-tête {HEADER} doit contenir de 1 à {MAX_KEY_LENGTH} caractères.", status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_hash(request)
+        now = timezone.now()
+        record = IdempotencyRecord.objects.filter(user=request.user, key=key).first()
+        if record is not None and record.expires_at <= now:
+            # Clé expirée : réutilisable
+            record.delete()
+            record = None
+        elif record is not None and record.status_code is None and record.created_at < now - IN_PROGRESS_LEASE:
+            # Réservation abandonnée : reprise, une seule tentative concurrente obtient la nouvelle
+            record.delete()
+            record = None
+
+        if record is not None:
+            if record.request_hash != fingerprint:
+                return _error(
+                    f"Cette clé {HEADER} a déjà été utilisée pour une autre requête.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return _error("Une requête avec cette clé est en cours de traitement ; réessayez plus tard.", status.HTTP_409_CONFLICT)
+            return Response(record.response_body, status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+        try:
+            # Réservation de la clé, validée tout de suite : une tentative concurrente la voit
+            with transaction.atomic():
+                record = IdempotencyRecord.objects.create(
+                    user=request.user, key=key, request_hash=fingerprint, expires_at=now + IDEMPOTENCY_TTL
+                )
+        except IntegrityError:
+            # Réservée entre-temps par une tentative concurrente
+            return wrapper(self, request, *args, **kwargs)
+
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    # Réponse enregistrée dans la transaction de l'action : toutes deux ou aucune
+                    record.status_code = response.status_code
+                    record.response_body = response.data
+                    record.save(update_fields=['status_code', 'response_body'])
+        except BaseException:
+            # Exception (validation, erreur) : rien n'est enregistré, la clé est libérée
+            record.delete()
+            raise
+        if record.status_code is None:
+            record.delete()
+        return response
+
+    return wrapper
@@ -0,0 +1,116 @@
+# api/management/commands/benchmark_calculations.py
+
+import json
+import platform
+import subprocess
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.benchmarks import GOLDEN_PATH, build_golden_cases, check_golden_cases, load_golden_cases, run_benchmarks, write_golden_cases
+from api.models import Product, ProductCategory, TariffSpecies, User
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour mesurer le cœur du calcul douanier : devis unitaire,
+    débit du calcul en lot, coût des serializers de simulation.
+
+    Les deux moteurs de calcul sont d'abord vérifiés contre les valeurs de
+    référence ; chaque exécution est ensuite ajoutée au fichier de résultats
+    (une ligne JSON avec le commit courant) et comparée à la précédente.
+    """
+    help = 'Vérifie les valeurs de référence du calcul douanier puis mesure ses performances.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000, help="Appels par série de mesure (défaut : 2000).")
+        parser.add_argument('--repeat', type=int, default=5, help="Nombre de séries ; la meilleure est retenue (défaut : 5).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Envois par calcul en lot (défaut : 1000).")
+        parser.add_argument(
+            '--output', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'calculations.jsonl'),
+            help="Fichier de résultats, complété à chaque exécution (défaut : benchmarks/calculations.jsonl)."
+        )
+        parser.add_argument('--no-save', action='store_true', help="N'enregistre pas les résultats.")
+        parser.add_argument(
+            '--update-golden', action='store_true',
+            help="Régénère les valeurs de référence avec le calcul actuel (après un changement de règle voulu)."
+        )
+
+    def handle(self, *args, **options):
+        if options['number'] < 1 or options['repeat'] < 1 or options['batch_size'] < 1:
+            raise CommandError("--number, --repeat et --batch-size doivent être strictement positifs.")
+
+        if options['update_golden']:
+            cases = build_golden_cases()
+            write_golden_cases(cases)
+            self.stdout.write(self.style.SUCCESS(f"{len(cases)} cas de référence écrits dans {GOLDEN_PATH}."))
+            return
+
+        cases = load_golden_cases()
+        mismatches = check_golden_cases(cases)
+        if mismatches:
+            for engine, index, field, expected, value in mismatches[:20]:
+                self.stderr.write(f"  {engine} cas #{index} {field} : attendu {expected}, obtenu {value}")
+            raise CommandError(f"{len(mismatches)} écart(s) avec les valeurs de référence : mesures annulées.")
+        self.stdout.write(self.style.SUCCESS(f"Valeurs de référence : {len(cases)} cas identiques pour les deux moteurs."))
+
+        # Données temporaires pour les serializers, annulées en fin de mesure
+        with transaction.atomic():
+            category = ProductCategory.objects.create(name='__benchmark__')
+            product = Product.objects.create(
+                name='__benchmark__', category=category, tariff_species=TariffSpecies.CONSUMPTION_GOODS,
+                cemac_hs_code='0000.00.00.00', is_luxury=True, is_phytosanitary=True
+            )
+            user = User(email='benchmark@example.com', username='benchmark')
+            results = run_benchmarks(product, user, options['batch_size'], options['number'], options['repeat'])
+            transaction.set_rollback(True)
+
+        record = {
+            'timestamp': timezone.now().isoformat(timespec='seconds'),
+            'commit': self._git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'results': results,
+        }
+        self._print_comparison(results, self._previous_record(options['output']))
+        if not options['no_save']:
+            output = Path(options['output'])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            with open(output, 'a', encoding='utf-8') as handle:
+                handle.write(json.dumps(record) + '\n')
+            self.stdout.write(f"Résultats ajoutés à {output}.")
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True, timeout=10
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    def _previous_record(self, path):
+        try:
+            with open(path, encoding='utf-8') as handle:
+                lines = [line for line in handle if line.strip()]
+        except FileNotFoundError:
+            return None
+        return json.loads(lines[-1]) if lines else None
+
+    def _print_comparison(self, results, previous):
+        reference = (previous or {}).get('results', {})
+        label = f" (précédent : {previous.get('commit') or previous['timestamp']})" if previous else ''
+        self.stdout.write(f"{'mesure':<32}{'meilleur µs':>14}{'médian µs':>14}{'écart':>10}{label}")
+        for name, values in results.items():
+            delta = ''
+            if name in reference:
+                before = reference[name]['best_us']
+                delta = f"{(values['best_us'] - before) / before * 100:+.1f}%"
+            self.stdout.write(f"{name:<32}{values['best_us']:>14.3f}{values['median_us']:>14.3f}{delta:>10}")
+        batch = results.get('batch_per_shipment')
+        if batch:
+            self.stdout.write(f"Débit du calcul en lot : {batch['throughput_per_s']} envois/s (lots de {batch['batch_size']}).")
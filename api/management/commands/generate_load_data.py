@@ -0,0 +1,180 @@
+# api/management/commands/generate_load_data.py
+
+import math
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.calculations import RESULT_FIELDS, ProductTaxProfile, compute_batch_by_rates
+from api.models import Product, Simulation, User
+from api.tariffs import get_rate_table
+
+CENT = Decimal('0.01')
+# Domaine réservé (RFC 2606) des emails des utilisateurs générés, qu'aucun vrai
+# utilisateur ne possède : il distingue les comptes créés par la commande
+EMAIL_DOMAIN = 'load-data.invalid'
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour générer un volume de données proche de la production
+    (utilisateurs et simulations), afin de mesurer localement les performances de
+    l'historique, de l'administration et des statistiques.
+
+    Distributions :
+    - produits et utilisateurs : loi de Zipf (quelques produits et importateurs
+      concentrent l'essentiel des simulations) ;
+    - valeur déclarée : log-normale autour de `--median-value` ;
+    - transport et manutention : proportion de la valeur déclarée ;
+    - date : sur les `--days` derniers jours, plus dense sur la période récente.
+    """
+    help = (
+        'Génère des utilisateurs et des simulations synthétiques, écrits par bulk_create '
+        'avec des résultats précalculés par le calcul en lot.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Nombre d'utilisateurs à créer (défaut : 100).")
+        parser.add_argument('--simulations', type=int, default=100000, help="Nombre de simulations à créer (défaut : 100000).")
+        parser.add_argument('--days', type=int, default=365, help="Profondeur de l'historique en jours (défaut : 365).")
+        parser.add_argument('--median-value', type=Decimal, default=Decimal('2500000'), help="Valeur déclarée médiane en FCFA (défaut : 2500000).")
+        parser.add_argument('--paid-ratio', type=float, default=0.3, help="Part des simulations payées (défaut : 0.3).")
+        parser.add_argument('--prefix', default='load', help=f"Préfixe des emails (@{EMAIL_DOMAIN}) et noms d'utilisateur (défaut : load).")
+        parser.add_argument('--password', default='loadtest', help="Mot de passe commun des utilisateurs créés (défaut : loadtest).")
+        parser.add_argument('--seed', type=int, default=0, help="Graine aléatoire, pour des jeux de données reproductibles (défaut : 0).")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Nombre de simulations par bulk_create (défaut : 5000).")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['simulations'] < 0 or options['days'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--users, --days et --chunk-size doivent être strictement positifs, --simulations positif.")
+        if not 0 <= options['paid_ratio'] <= 1:
+            raise CommandError("--paid-ratio doit être compris entre 0 et 1.")
+
+        products = list(Product.objects.only('id', 'tariff_species', 'is_luxury', 'is_alcohol_tobacco', 'is_vehicle', 'is_phytosanitary'))
+        if not products:
+            raise CommandError("Catalogue vide : lancer d'abord populate_simu_data ou import_tariff_nomenclature.")
+
+        self.random = random.Random(options['seed'])
+        self.options = options
+        self.now = timezone.now()
+        # Popularité des produits : loi de Zipf sur un ordre aléatoire du catalogue
+        self.random.shuffle(products)
+        self.products = products
+        self.product_weights = _zipf_cumulative_weights(len(products))
+        self.profiles = {product.pk: ProductTaxProfile.from_product(product) for product in products}
+
+        users = self._create_users()
+        self.user_ids = [user.pk for user in users]
+        self.user_weights = _zipf_cumulative_weights(len(users))
+
+        created = 0
+        while created < options['simulations']:
+            size = min(options['chunk_size'], options['simulations'] - created)
+            self._create_simulations(size)
+            created += size
+            self.stdout.write(f"  {created}/{options['simulations']} simulation(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(users)} utilisateur(s) et {created} simulation(s) générés."
+        ))
+
+    def _create_users(self):
+        """
+        Crée les utilisateurs manquants ; le mot de passe n'est haché qu'une fois.
+        Seuls les utilisateurs de la commande (emails @EMAIL_DOMAIN) reçoivent des
+        simulations, même si un vrai compte porte un nom d'utilisateur généré.
+        """
+        prefix = self.options['prefix']
+        password = make_password(self.options['password'])
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f'{prefix}_{index}', email=f'{prefix}_{index}@{EMAIL_DOMAIN}', password=password,
+                    is_professional=self.random.random() < 0.4
+                )
+                for index in range(self.options['users'])
+            ],
+            ignore_conflicts=True, batch_size=self.options['chunk_size']
+        )
+        users = list(
+            User.objects.filter(email__startswith=f'{prefix}_', email__endswith=f'@{EMAIL_DOMAIN}')
+            .only('id').order_by('id')[:self.options['users']]
+        )
+        if not users:
+            raise CommandError(f"Aucun utilisateur @{EMAIL_DOMAIN} n'a pu être créé : noms d'utilisateur « {prefix}_* » déjà pris.")
+        return users
+
+    def _create_simulations(self, size):
+        """
+        Tire `size` simulations, calcule leurs résultats en lot et les écrit en un bulk_create.
+        """
+        rand = self.random
+        products = rand.choices(self.products, cum_weights=self.product_weights, k=size)
+        user_ids = rand.choices(self.user_ids, cum_weights=self.user_weights, k=size)
+        median = float(self.options['median_value'])
+        days = self.options['days']
+
+        simulations, shipments, rate_tables = [], [], []
+        for product, user_id in zip(products, user_ids):
+            value = Decimal(rand.lognormvariate(math.log(median), 1.1)).quantize(CENT)
+            weight = (
+                Decimal(rand.lognormvariate(math.log(2), 1.0)).quantize(Decimal('0.001'))
+                if product.is_phytosanitary else Decimal(0)
+            )
+            # Triangulaire de mode 0 : les dates récentes sont les plus fréquentes
+            simulated_at = self.now - timedelta(days=rand.triangular(0, days, 0))
+            paid = rand.random() < self.options['paid_ratio']
+            simulation = Simulation(
+                user_id=user_id, product_id=product.pk,
+                declared_value=value,
+                transport_cost=(value * Decimal(rand.uniform(0.03, 0.12))).quantize(CENT),
+                handling_cost=(value * Decimal(rand.uniform(0.01, 0.04))).quantize(CENT),
+                weight_in_tons=weight,
+                has_niu=rand.random() < 0.85,
+                simulated_at=simulated_at, date_created=simulated_at,
+                is_paid=paid, response_email_sent=paid,
+                # Comme à la création par l'API, chaque simulation a son code de paiement
+                # (référence des notifications d'opérateur, voir api/payments.py).
+                # Hors graine : deux exécutions ne doivent pas produire les mêmes codes (uniques)
+                payment_confirmation_code=str(uuid.uuid4()),
+            )
+            simulations.append(simulation)
+            shipments.append({
+                'product': product.pk,
+                **{field: getattr(simulation, field) for field in ('declared_value', 'transport_cost', 'handling_cost', 'weight_in_tons', 'has_niu')}
+            })
+            rate_tables.append(get_rate_table(simulated_at))
+
+        columns = compute_batch_by_rates(shipments, self.profiles, rate_tables)
+        for position, simulation in enumerate(simulations):
+            for field in RESULT_FIELDS:
+                setattr(simulation, field, columns[field][position])
+            simulation.tariff_schedule_id = rate_tables[position].schedule_id
+
+        # simulated_at et date_created sont en auto_now_add : bulk_create y écrit
+        # l'heure courante, les dates générées sont appliquées ensuite
+        dates = [simulation.simulated_at for simulation in simulations]
+        with transaction.atomic():
+            Simulation.objects.bulk_create(simulations)
+            for simulation, simulated_at in zip(simulations, dates):
+                simulation.simulated_at = simulation.date_created = simulated_at
+            # Un UPDATE ... CASE par lot, et non un UPDATE par simulation
+            Simulation.objects.bulk_update(simulations, ['simulated_at', 'date_created'])
+
+
+def _zipf_cumulative_weights(count, exponent=1.1):
+    """
+    Poids cumulés d'une loi de Zipf sur `count` rangs, pour random.choices.
+    """
+    total, weights = 0.0, []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
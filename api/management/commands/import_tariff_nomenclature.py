@@ -0,0 +1,199 @@
+# api/management/commands/import_tariff_nomenclature.py
+
+import csv
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.catalog import bump_catalog_revision
+from api.hs_codes import CategoryIndex, format_hs_code
+from api.models import Product, ProductCategory, TariffSpecies
+from api.search import index_products
+
+FLAG_FIELDS = ('is_luxury', 'is_alcohol_tobacco', 'is_vehicle', 'is_phytosanitary')
+UPDATED_FIELDS = ('name', 'category', 'tariff_species') + FLAG_FIELDS
+TRUE_VALUES = {'1', 'true', 'vrai', 'oui', 'yes', 'x'}
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour charger la nomenclature tarifaire CEMAC complète
+    depuis un fichier CSV ou XLSX.
+
+    Colonnes attendues (ligne d'en-tête) : cemac_hs_code, name, et en option
+    tariff_species (code : VG1, MP, BID, BCC ; BCC par défaut), category (nom de
+    catégorie ; à défaut, celle du produit existant ou la catégorie déduite du
+    code SH), is_luxury, is_alcohol_tobacco,
+    is_vehicle, is_phytosanitary (1/0, oui/non, x).
+    """
+    help = (
+        'Importe la nomenclature tarifaire par tranches : lecture en flux, '
+        'upsert avec bulk_create(update_conflicts=True), le tout dans une transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier de nomenclature (.csv ou .xlsx).")
+        parser.add_argument('--format', choices=('csv', 'xlsx'), help="Format du fichier (défaut : d'après l'extension).")
+        parser.add_argument('--delimiter', help="Séparateur CSV (défaut : détecté sur la ligne d'en-tête).")
+        parser.add_argument('--encoding', default='utf-8-sig', help="Encodage du fichier CSV (défaut : utf-8-sig).")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Nombre de lignes par tranche (défaut : 2000).")
+        parser.add_argument('--dry-run', action='store_true', help="N'écrit rien : affiche seulement le bilan.")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f"Fichier introuvable : {path}")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size doit être strictement positif.")
+        file_format = options['format'] or ('xlsx' if path.suffix.lower() == '.xlsx' else 'csv')
+
+        self.counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        self.errors = []
+        self.seen_codes = set()
+        self.seen_names = set()
+
+        # Une requête pour toutes les catégories : correspondance par nom et index des plages SH
+        categories = list(ProductCategory.objects.values_list('id', 'name', 'cemac_hs_code_prefix'))
+        self.categories_by_name = {name.casefold(): pk for pk, name, _ in categories}
+        self.category_index = CategoryIndex((pk, prefix) for pk, _, prefix in categories if prefix)
+
+        rows = self._read_xlsx(path) if file_format == 'xlsx' else self._read_csv(path, options)
+        with transaction.atomic():
+            while True:
+                chunk = list(islice(rows, options['chunk_size']))
+                if not chunk:
+                    break
+                self._import_chunk(chunk, options['dry_run'])
+            if options['dry_run']:
+                transaction.set_rollback(True)
+            elif self.counts['inserted'] or self.counts['updated']:
+                # bulk_create n'émet pas de signaux : invalidation explicite du catalogue
+                bump_catalog_revision()
+                transaction.on_commit(bump_catalog_revision)
+
+        self._report(options['dry_run'])
+
+    def _read_csv(self, path, options):
+        """
+        Itère sur les lignes du CSV : (numéro de ligne, dictionnaire colonne -> valeur).
+        """
+        with open(path, newline='', encoding=options['encoding']) as handle:
+            delimiter = options['delimiter']
+            if not delimiter:
+                header = handle.readline()
+                delimiter = csv.Sniffer().sniff(header, delimiters=',;\t|').delimiter
+                handle.seek(0)
+            reader = csv.DictReader(handle, delimiter=delimiter)
+            for row in reader:
+                yield reader.line_num, row
+
+    def _read_xlsx(self, path):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise CommandError("Le format XLSX nécessite le paquet openpyxl (pip install openpyxl).")
+        # read_only : les lignes sont lues en flux, sans charger toute la feuille
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            lines = workbook.active.iter_rows(values_only=True)
+            header = [str(value or '').strip() for value in next(lines, ())]
+            for line, values in enumerate(lines, start=2):
+                yield line, {column: '' if value is None else str(value) for column, value in zip(header, values)}
+        finally:
+            workbook.close()
+
+    def _parse_row(self, row):
+        """
+        Valide une ligne et retourne les valeurs du produit, ou lève ValueError.
+        """
+        # Les colonnes en trop (clé None pour csv.DictReader) sont ignorées
+        row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key is not None}
+        code = format_hs_code(row.get('cemac_hs_code', ''))
+        name = row.get('name', '')
+        if not code or not name:
+            raise ValueError("cemac_hs_code et name sont obligatoires.")
+        if code in self.seen_codes:
+            raise ValueError(f"code SH {code} en double dans le fichier.")
+        if name.casefold() in self.seen_names:
+            raise ValueError(f"nom '{name}' en double dans le fichier.")
+
+        tariff_species = row.get('tariff_species', '').upper() or TariffSpecies.CONSUMPTION_GOODS
+        if tariff_species not in TariffSpecies.values:
+            raise ValueError(f"espèce tarifaire inconnue : '{tariff_species}'.")
+
+        category_name = row.get('category', '')
+        category_id = None  # sans colonne category : résolue dans _import_chunk
+        if category_name:
+            category_id = self.categories_by_name.get(category_name.casefold())
+            if category_id is None:
+                raise ValueError(f"catégorie inconnue : '{category_name}'.")
+
+        self.seen_codes.add(code)
+        self.seen_names.add(name.casefold())
+        return {
+            'cemac_hs_code': code, 'name': name, 'category_id': category_id, 'tariff_species': tariff_species,
+            **{field: row.get(field, '').lower() in TRUE_VALUES for field in FLAG_FIELDS},
+        }
+
+    def _import_chunk(self, chunk, dry_run):
+        """
+        Classe les lignes d'une tranche (nouvelle, modifiée, inchangée) et écrit les
+        nouvelles et les modifiées en un seul upsert.
+        """
+        parsed = []
+        for line, row in chunk:
+            try:
+                parsed.append((line, self._parse_row(row)))
+            except ValueError as error:
+                self.errors.append((line, str(error)))
+
+        codes = [values['cemac_hs_code'] for _, values in parsed]
+        existing = {
+            values['cemac_hs_code']: values
+            for values in Product.objects.filter(cemac_hs_code__in=codes).values('cemac_hs_code', 'name', 'category_id', 'tariff_species', *FLAG_FIELDS)
+        }
+        # Un nom déjà porté par un autre code ferait échouer tout l'upsert (nom unique)
+        names = [values['name'] for _, values in parsed]
+        taken_names = dict(Product.objects.filter(name__in=names).values_list('name', 'cemac_hs_code'))
+
+        to_write = []
+        for line, values in parsed:
+            owner = taken_names.get(values['name'])
+            if owner is not None and owner != values['cemac_hs_code']:
+                self.errors.append((line, f"nom '{values['name']}' déjà utilisé par le code {owner}."))
+                continue
+            current = existing.get(values['cemac_hs_code'])
+            if values['category_id'] is None:
+                # Catégorie non précisée : celle du produit existant est conservée
+                # (classement fiscal manuel), sinon déduite du code SH
+                values['category_id'] = (current and current['category_id']) or self.category_index.resolve(values['cemac_hs_code'])
+            if current is None:
+                self.counts['inserted'] += 1
+            elif current == values:
+                self.counts['unchanged'] += 1
+                continue
+            else:
+                self.counts['updated'] += 1
+            to_write.append(Product(**values))
+
+        if to_write and not dry_run:
+            Product.objects.bulk_create(
+                to_write, update_conflicts=True, unique_fields=['cemac_hs_code'], update_fields=UPDATED_FIELDS
+            )
+            written = Product.objects.filter(cemac_hs_code__in=[product.cemac_hs_code for product in to_write])
+            index_products(written.select_related('category'))
+
+    def _report(self, dry_run):
+        """
+        Affiche le bilan de l'import.
+        """
+        for line, message in self.errors:
+            self.stderr.write(f"  Ligne {line} : {message}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.counts['inserted']} insérée(s), {self.counts['updated']} mise(s) à jour, "
+            f"{self.counts['unchanged']} inchangée(s), {len(self.errors)} en erreur."
+        ))
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Mode --dry-run : aucune modification enregistrée."))
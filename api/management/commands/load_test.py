@@ -0,0 +1,246 @@
+# api/management/commands/load_test.py
+
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, q):
+    """
+    Percentile `q` (0-100) par la méthode du rang le plus proche, sur une liste triée.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, errors, elapsed):
+    """
+    Résume les mesures d'un endpoint : nombre, erreurs, débit et latences en ms.
+    """
+    latencies = sorted(samples)
+    count = len(latencies)
+    milliseconds = lambda value: None if value is None else round(value * 1000, 2)
+    return {
+        'count': count,
+        'errors': errors,
+        'error_rate': round(errors / count, 4) if count else 0.0,
+        'throughput_rps': round(count / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': milliseconds(sum(latencies) / count) if count else None,
+        'p50_ms': milliseconds(percentile(latencies, 50)),
+        'p95_ms': milliseconds(percentile(latencies, 95)),
+        'p99_ms': milliseconds(percentile(latencies, 99)),
+        'max_ms': milliseconds(latencies[-1]) if count else None,
+    }
+
+
+class ApiClient:
+    """
+    Client HTTP minimal d'un utilisateur virtuel : une connexion persistante
+    (keep-alive), rouverte après une erreur réseau.
+    """
+
+    def __init__(self, base_url, timeout, recorder):
+        parts = urlsplit(base_url)
+        self.connection_class = HTTPSConnection if parts.scheme == 'https' else HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.recorder = recorder
+        self.token = None
+        self.connection = None
+        self.last_headers = {}
+
+    def request(self, method, path, name, body=None, headers=None, expected=(200, 201, 304)):
+        """
+        Envoie une requête, enregistre sa latence sous `name` et retourne (statut, JSON ou None).
+        Les en-têtes de la dernière réponse restent disponibles dans `last_headers`.
+        """
+        headers = {'Accept': 'application/json', **(headers or {})}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = None
+        if isinstance(body, bytes):
+            # Corps déjà sérialisé (signé par l'appelant, voir simulate_payment_provider)
+            payload = body
+            headers['Content-Type'] = 'application/json'
+        elif body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            content = response.read()
+            status = response.status
+            self.last_headers = response.headers
+        except (OSError, HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            self.recorder.record(name, time.perf_counter() - start, error=True, status='network')
+            return None, None
+        elapsed = time.perf_counter() - start
+
+        self.recorder.record(name, elapsed, error=status not in expected, status=status)
+        try:
+            data = json.loads(content) if content else None
+        except ValueError:
+            data = None
+        return status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class Recorder:
+    """
+    Mesures partagées entre les utilisateurs virtuels.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, latency, error, status):
+        with self.lock:
+            self.samples[name].append(latency)
+            self.statuses[name][str(status)] += 1
+            if error:
+                self.errors[name] += 1
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour mesurer l'API sous charge avant un déploiement.
+
+    Chaque utilisateur virtuel obtient un token JWT puis enchaîne le parcours d'un
+    importateur : catalogue des produits, création d'une simulation, confirmation
+    du paiement, consultation de l'historique. Le rapport JSON (latences p50/p95/p99,
+    débit, taux d'erreur par endpoint) peut être comparé d'un build à l'autre.
+
+    Le serveur visé (runserver, gunicorn, uvicorn, ...) doit être lancé séparément ;
+    les comptes peuvent être créés avec generate_load_data (mot de passe loadtest).
+    """
+    help = "Lance un test de charge HTTP sur l'API et affiche les latences par endpoint en JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api', help="URL de base de l'API (défaut : http://127.0.0.1:8000/api).")
+        parser.add_argument('--email', default='load_0@load-data.invalid', help="Email du compte de test (défaut : load_0@load-data.invalid).")
+        parser.add_argument('--password', default='loadtest', help="Mot de passe du compte de test (défaut : loadtest).")
+        parser.add_argument('--concurrency', type=int, default=10, help="Nombre d'utilisateurs virtuels simultanés (défaut : 10).")
+        parser.add_argument('--iterations', type=int, default=20, help="Parcours par utilisateur virtuel (défaut : 20).")
+        parser.add_argument('--duration', type=float, help="Durée du test en secondes (remplace --iterations).")
+        parser.add_argument('--timeout', type=float, default=30, help="Délai maximal d'une requête en secondes (défaut : 30).")
+        parser.add_argument('--seed', type=int, help="Graine aléatoire du choix des produits.")
+        parser.add_argument('--output', help="Fichier où écrire le rapport JSON (en plus de la sortie standard).")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['iterations'] < 1:
+            raise CommandError("--concurrency et --iterations doivent être strictement positifs.")
+
+        self.options = options
+        self.recorder = Recorder()
+        self.deadline = time.perf_counter() + options['duration'] if options['duration'] else None
+        rand = random.Random(options['seed'])
+        seeds = [rand.random() for _ in range(options['concurrency'])]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(self._virtual_user, seeds))
+        elapsed = time.perf_counter() - started
+
+        report = self._report(elapsed)
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def _virtual_user(self, seed):
+        """
+        Parcours d'un utilisateur virtuel, répété jusqu'au nombre d'itérations ou à l'échéance.
+        """
+        rand = random.Random(seed)
+        client = ApiClient(self.options['base_url'], self.options['timeout'], self.recorder)
+        try:
+            status, data = client.request(
+                'POST', '/token/', 'POST /token/',
+                body={'email': self.options['email'], 'password': self.options['password']}
+            )
+            if status != 200 or not data:
+                return
+            client.token = data['access']
+
+            product_ids, etag = [], None
+            iteration = 0
+            while True:
+                if self.deadline is not None:
+                    if time.perf_counter() >= self.deadline:
+                        break
+                elif iteration >= self.options['iterations']:
+                    break
+                iteration += 1
+
+                # Le frontend revalide le catalogue avec son ETag
+                status, data = client.request(
+                    'GET', '/products/', 'GET /products/', headers={'If-None-Match': etag} if etag else None
+                )
+                if status == 200 and data:
+                    product_ids = [product['id'] for product in data]
+                    etag = client.last_headers.get('ETag')
+                if not product_ids:
+                    continue
+
+                status, data = client.request('POST', '/simulations/', 'POST /simulations/', body={
+                    'product': rand.choice(product_ids),
+                    'declared_value': str(round(rand.lognormvariate(14.7, 1.0), 2)),
+                    'transport_cost': str(round(rand.uniform(10000, 300000), 2)),
+                    'handling_cost': str(round(rand.uniform(5000, 100000), 2)),
+                    'weight_in_tons': '1.000',
+                    'has_niu': rand.random() < 0.85,
+                })
+                if status == 201 and data and 'id' in data:
+                    client.request(
+                        'POST', f"/simulations/{data['id']}/confirm_payment/", 'POST /simulations/{id}/confirm_payment/',
+                        body={'payment_confirmation_code': uuid.uuid4().hex[:20].upper()}
+                    )
+
+                client.request('GET', '/historique_simulations/', 'GET /historique_simulations/')
+        finally:
+            client.close()
+
+    def _report(self, elapsed):
+        recorder = self.recorder
+        endpoints = {
+            name: {**summarize(samples, recorder.errors[name], elapsed), 'statuses': dict(recorder.statuses[name])}
+            for name, samples in sorted(recorder.samples.items())
+        }
+        total = sum(len(samples) for samples in recorder.samples.values())
+        errors = sum(recorder.errors.values())
+        return {
+            'base_url': self.options['base_url'],
+            'concurrency': self.options['concurrency'],
+            'duration_s': round(elapsed, 3),
+            'requests': total,
+            'errors': errors,
+            'error_rate': round(errors / total, 4) if total else 0.0,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+            'endpoints': endpoints,
+        }
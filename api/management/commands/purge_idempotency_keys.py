@@ -0,0 +1,18 @@
+# api/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion qui supprime les clés d'idempotence expirées (voir
+    api/idempotency.py). À planifier, par exemple toutes les heures.
+    """
+    help = "Supprime les clés d'idempotence expirées."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clé(s) d'idempotence expirée(s) supprimée(s)."))
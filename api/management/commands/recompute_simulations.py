@@ -0,0 +1,175 @@
+# api/management/commands/recompute_simulations.py
+
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from api.calculations import RESULT_FIELDS, ProductTaxProfile, compute_batch_by_rates
+from api.models import Simulation
+from api.tariffs import get_rate_table
+
+INPUT_FIELDS = ('declared_value', 'transport_cost', 'handling_cost', 'weight_in_tons', 'has_niu')
+PRODUCT_FIELDS = ('tariff_species', 'is_luxury', 'is_alcohol_tobacco', 'is_vehicle', 'is_phytosanitary')
+UPDATED_FIELDS = RESULT_FIELDS + ('tariff_schedule',)
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion pour recalculer en masse les résultats des simulations
+    existantes (après un changement de barème ou un reclassement de produit).
+    """
+    help = (
+        'Recalcule les montants des simulations existantes par lots : lecture par tranches '
+        'avec select_related, calcul en lot, écriture avec bulk_update.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--product', type=int, action='append', dest='products', help="Id de produit (option répétable).")
+        parser.add_argument('--category', type=int, action='append', dest='categories', help="Id de catégorie de produit (option répétable).")
+        parser.add_argument('--from', type=date.fromisoformat, dest='date_from', help="Date de simulation minimale (AAAA-MM-JJ, incluse).")
+        parser.add_argument('--to', type=date.fromisoformat, dest='date_to', help="Date de simulation maximale (AAAA-MM-JJ, incluse).")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Nombre de simulations par tranche (défaut : 2000).")
+        parser.add_argument('--workers', type=int, default=1, help="Nombre de processus de calcul (défaut : 1, sans pool).")
+        parser.add_argument('--dry-run', action='store_true', help="N'écrit rien : affiche le rapport des différences.")
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1 or options['workers'] < 1:
+            raise CommandError("--chunk-size et --workers doivent être strictement positifs.")
+
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.scanned = 0
+        self.changed = 0
+        self.field_changes = Counter()
+        self.total_delta = Decimal(0)
+
+        queryset = self._build_queryset(options)
+        workers = options['workers']
+        if workers == 1:
+            for chunk in self._iter_chunks(queryset, options['chunk_size']):
+                payload = self._prepare(chunk)
+                self._apply(chunk, payload, compute_batch_by_rates(*payload))
+        else:
+            # Les processus fils ne font que du calcul : aucune connexion à la base
+            # ne doit être partagée avec eux. Dans une transaction ouverte par l'appelant
+            # (call_command dans atomic(), tests), la fermer l'annulerait : la connexion
+            # est alors conservée, les fils n'y touchent pas.
+            if not any(connection.in_atomic_block for connection in connections.all(initialized_only=True)):
+                connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                for chunk in self._iter_chunks(queryset, options['chunk_size']):
+                    payload = self._prepare(chunk)
+                    pending.append((chunk, payload, executor.submit(compute_batch_by_rates, *payload)))
+                    # Au plus deux tranches en attente par processus : mémoire bornée
+                    if len(pending) >= 2 * workers:
+                        chunk, payload, future = pending.popleft()
+                        self._apply(chunk, payload, future.result())
+                while pending:
+                    chunk, payload, future = pending.popleft()
+                    self._apply(chunk, payload, future.result())
+
+        self._report()
+
+    def _build_queryset(self, options):
+        """
+        Construit la requête filtrée, limitée aux champs utiles au calcul.
+        """
+        queryset = Simulation.objects.select_related('product').only(
+            'id', 'product', 'simulated_at', 'tariff_schedule', *INPUT_FIELDS, *RESULT_FIELDS,
+            *(f'product__{field}' for field in PRODUCT_FIELDS)
+        )
+        if options['products']:
+            queryset = queryset.filter(product_id__in=options['products'])
+        if options['categories']:
+            queryset = queryset.filter(product__category_id__in=options['categories'])
+        if options['date_from']:
+            queryset = queryset.filter(simulated_at__date__gte=options['date_from'])
+        if options['date_to']:
+            queryset = queryset.filter(simulated_at__date__lte=options['date_to'])
+        return queryset
+
+    def _iter_chunks(self, queryset, chunk_size):
+        """
+        Parcourt la table par tranches de clés primaires croissantes (pagination par clé,
+        coût constant quelle que soit la position dans la table).
+        """
+        last_pk = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:chunk_size])
+            if not chunk:
+                return
+            last_pk = chunk[-1].pk
+            yield chunk
+
+    def _prepare(self, chunk):
+        """
+        Prépare les arguments de compute_batch_by_rates pour une tranche.
+        Uniquement des valeurs sérialisables, pour pouvoir les envoyer à un autre processus.
+        """
+        shipments = [
+            {'product': simulation.product_id, **{field: getattr(simulation, field) for field in INPUT_FIELDS}}
+            for simulation in chunk
+        ]
+        products = {
+            simulation.product_id: ProductTaxProfile.from_product(simulation.product)
+            for simulation in chunk
+        }
+        rate_tables = [get_rate_table(simulation.simulated_at) for simulation in chunk]
+        return shipments, products, rate_tables
+
+    def _apply(self, chunk, payload, columns):
+        """
+        Compare les nouveaux montants aux anciens et écrit les simulations modifiées.
+        """
+        rate_tables = payload[2]
+        modified = []
+        for position, simulation in enumerate(chunk):
+            self.scanned += 1
+            diff = {
+                field: (getattr(simulation, field), columns[field][position])
+                for field in RESULT_FIELDS
+                if getattr(simulation, field) != columns[field][position]
+            }
+            schedule_id = rate_tables[position].schedule_id
+            if simulation.tariff_schedule_id != schedule_id:
+                diff['tariff_schedule'] = (simulation.tariff_schedule_id, schedule_id)
+            if not diff:
+                continue
+
+            self.changed += 1
+            self.field_changes.update(diff.keys())
+            if 'total_customs_cost' in diff:
+                old, new = diff['total_customs_cost']
+                self.total_delta += new - old
+            if self.verbosity >= 2 or self.dry_run:
+                changes = ', '.join(f"{field}: {old} -> {new}" for field, (old, new) in diff.items())
+                self.stdout.write(f"  Simulation #{simulation.pk} : {changes}")
+
+            for field in RESULT_FIELDS:
+                setattr(simulation, field, columns[field][position])
+            simulation.tariff_schedule_id = schedule_id
+            modified.append(simulation)
+
+        if modified and not self.dry_run:
+            with transaction.atomic():
+                Simulation.objects.bulk_update(modified, UPDATED_FIELDS)
+
+    def _report(self):
+        """
+        Affiche le bilan du recalcul.
+        """
+        verb = 'à modifier' if self.dry_run else 'modifiées'
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.scanned} simulation(s) parcourue(s), {self.changed} {verb}."
+        ))
+        if self.field_changes:
+            for field, count in sorted(self.field_changes.items()):
+                self.stdout.write(f"  {field} : {count}")
+            self.stdout.write(f"  Écart cumulé sur total_customs_cost : {self.total_delta}")
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING("Mode --dry-run : aucune modification enregistrée."))
@@ -0,0 +1,61 @@
+# api/management/commands/reconcile_payments.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.payments import reconcile_pending
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion qui rapproche les notifications de paiement reçues par le
+    webhook avec les simulations (voir api/payments.py).
+
+    Sans --loop, traite toute la file puis s'arrête (tâche cron). Avec --loop,
+    tourne en continu et interroge la file toutes les --interval secondes.
+    """
+    help = "Rapproche par lots les notifications de paiement en attente et affiche le débit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Notifications par lot et par transaction (défaut : 500).")
+        parser.add_argument('--loop', action='store_true', help="Tourne en continu (worker).")
+        parser.add_argument('--interval', type=float, default=2, help="Attente entre deux passages en mode --loop, en secondes (défaut : 2).")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size doit être strictement positif.")
+
+        try:
+            while True:
+                totals = self._drain(options['batch_size'])
+                if any(totals.values()):
+                    self.stdout.write(
+                        f"{totals['confirmed']} paiement(s) confirmé(s), {totals['already_paid']} déjà payé(s), "
+                        f"{totals['amount_mismatch']} montant(s) incorrect(s), {totals['unmatched']} référence(s) inconnue(s), "
+                        f"{totals['rejected']} paiement(s) échoué(s)."
+                    )
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du worker.")
+
+    def _drain(self, batch_size):
+        """
+        Traite des lots jusqu'à épuisement de la file, avec le débit de chaque lot.
+        """
+        totals = {'confirmed': 0, 'already_paid': 0, 'amount_mismatch': 0, 'unmatched': 0, 'rejected': 0}
+        while True:
+            start = time.perf_counter()
+            counts = reconcile_pending(batch_size)
+            elapsed = time.perf_counter() - start
+            processed = sum(counts.values())
+            for key in totals:
+                totals[key] += counts[key]
+            if processed:
+                self.stdout.write(
+                    f"  Lot de {processed} notification(s) en {elapsed:.3f} s ({processed / elapsed:.0f} notifications/s)"
+                )
+            if processed < batch_size:
+                return totals
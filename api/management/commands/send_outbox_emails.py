@@ -0,0 +1,60 @@
+# api/management/commands/send_outbox_emails.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.outbox import MAX_ATTEMPTS, deliver_pending
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion qui envoie les emails de l'outbox (voir api/outbox.py).
+
+    Sans --loop, envoie tous les emails dus puis s'arrête (tâche cron). Avec
+    --loop, tourne en continu et interroge l'outbox toutes les --interval secondes.
+    """
+    help = "Envoie les emails en attente de l'outbox par lots (une connexion SMTP par lot) et affiche le débit."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help="Emails par lot et par connexion SMTP (défaut : 100).")
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS, help=f"Tentatives avant abandon (défaut : {MAX_ATTEMPTS}).")
+        parser.add_argument('--loop', action='store_true', help="Tourne en continu (worker).")
+        parser.add_argument('--interval', type=float, default=5, help="Attente entre deux passages en mode --loop, en secondes (défaut : 5).")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['max_attempts'] < 1:
+            raise CommandError("--batch-size et --max-attempts doivent être strictement positifs.")
+
+        try:
+            while True:
+                totals = self._drain(options)
+                if any(totals.values()):
+                    self.stdout.write(
+                        f"{totals['sent']} envoyé(s), {totals['retried']} à retenter, {totals['failed']} en échec définitif."
+                    )
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du worker.")
+
+    def _drain(self, options):
+        """
+        Envoie des lots jusqu'à épuisement des emails dus, avec le débit de chaque lot.
+        """
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        while True:
+            counts = deliver_pending(options['batch_size'], options['max_attempts'])
+            processed = counts['sent'] + counts['retried'] + counts['failed']
+            for key in totals:
+                totals[key] += counts[key]
+            if processed:
+                elapsed = counts['render_s'] + counts['send_s']
+                rate = f"{counts['sent'] / elapsed:.0f} emails/s" if elapsed and counts['sent'] else '-'
+                self.stdout.write(
+                    f"  Lot de {processed} : {counts['sent']} envoyé(s) en {elapsed:.3f} s ({rate} ; "
+                    f"rendu {counts['render_s']:.3f} s, remise {counts['send_s']:.3f} s)"
+                )
+            if processed < options['batch_size']:
+                return totals
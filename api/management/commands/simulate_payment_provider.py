@@ -0,0 +1,146 @@
+# api/management/commands/simulate_payment_provider.py
+
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.management.commands.load_test import ApiClient, Recorder, summarize
+from api.models import PaymentEvent, Simulation
+from api.payments import SIGNATURE_HEADER, TIMESTAMP_HEADER, sign, webhook_secret
+
+
+class Command(BaseCommand):
+    """
+    Opérateur de paiement simulé, pour tester le webhook de paiement en local et
+    sous charge (voir api/payments.py).
+
+    Envoie au webhook une notification signée par simulation non payée, comme le
+    ferait Orange Money ou MTN MoMo : une partie des paiements échoue, certaines
+    notifications sont renvoyées (l'opérateur n'a pas reçu l'acquittement) et
+    quelques références peuvent être inconnues. Le montant payé est le coût total
+    de la simulation, sauf pour la part --mismatch-rate des paiements. Le rapport JSON donne les
+    latences du webhook ; les notifications sont ensuite rapprochées par
+    reconcile_payments.
+
+    Le serveur visé doit être lancé séparément, avec le même secret
+    (SANDBOX_WEBHOOK_SECRET pour l'opérateur « sandbox »). Les simulations non
+    payées peuvent être créées avec generate_load_data --paid-ratio 0.
+    """
+    help = "Envoie des notifications de paiement signées au webhook (opérateur simulé) et affiche ses latences en JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api', help="URL de base de l'API (défaut : http://127.0.0.1:8000/api).")
+        parser.add_argument('--provider', default=PaymentEvent.Provider.SANDBOX, choices=PaymentEvent.Provider.values, help="Opérateur simulé (défaut : sandbox).")
+        parser.add_argument('--secret', help="Secret de signature (défaut : celui de l'opérateur dans PAYMENT_WEBHOOK_SECRETS).")
+        parser.add_argument('--count', type=int, default=200, help="Nombre de paiements, pris parmi les simulations non payées (défaut : 200).")
+        parser.add_argument('--concurrency', type=int, default=10, help="Nombre de notifications envoyées simultanément (défaut : 10).")
+        parser.add_argument('--failure-rate', type=float, default=0.05, help="Part des paiements échoués (défaut : 0.05).")
+        parser.add_argument('--mismatch-rate', type=float, default=0.0, help="Part des paiements d'un montant différent du coût total (défaut : 0).")
+        parser.add_argument('--duplicate-rate', type=float, default=0.1, help="Part des notifications renvoyées une seconde fois (défaut : 0.1).")
+        parser.add_argument('--unknown-rate', type=float, default=0.0, help="Part de notifications à référence inconnue, en plus des paiements (défaut : 0).")
+        parser.add_argument('--timeout', type=float, default=30, help="Délai maximal d'une requête en secondes (défaut : 30).")
+        parser.add_argument('--seed', type=int, help="Graine aléatoire.")
+        parser.add_argument('--output', help="Fichier où écrire le rapport JSON (en plus de la sortie standard).")
+
+    def handle(self, *args, **options):
+        if options['count'] < 1 or options['concurrency'] < 1:
+            raise CommandError("--count et --concurrency doivent être strictement positifs.")
+        self.secret = options['secret'] or webhook_secret(options['provider'])
+        if not self.secret:
+            raise CommandError(
+                f"Aucun secret pour l'opérateur {options['provider']} : le définir dans "
+                "PAYMENT_WEBHOOK_SECRETS (SANDBOX_WEBHOOK_SECRET pour sandbox) ou avec --secret."
+            )
+
+        # Code de paiement et montant dû de chaque simulation
+        references = list(
+            Simulation.objects.filter(is_paid=False, payment_confirmation_code__isnull=False)
+            .order_by('-id').values_list('payment_confirmation_code', 'total_customs_cost')[:options['count']]
+        )
+        if not references:
+            raise CommandError("Aucune simulation non payée avec un code de paiement.")
+
+        rand = random.Random(options['seed'])
+        notifications, expected = self._notifications(references, rand, options)
+
+        self.options = options
+        self.recorder = Recorder()
+        self.path = f"/payments/webhook/{options['provider']}/"
+        self.name = f"POST {self.path}"
+        # Répartition des notifications entre les connexions simultanées
+        queues = [notifications[index::options['concurrency']] for index in range(options['concurrency'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(self._send, queues))
+        elapsed = time.perf_counter() - started
+
+        recorder = self.recorder
+        report = {
+            'base_url': options['base_url'],
+            'provider': options['provider'],
+            'concurrency': options['concurrency'],
+            'duration_s': round(elapsed, 3),
+            'notifications': expected,
+            'webhook': {
+                **summarize(recorder.samples[self.name], recorder.errors[self.name], elapsed),
+                'statuses': dict(recorder.statuses[self.name]),
+            },
+        }
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as handle:
+                handle.write(output + '\n')
+        self.stdout.write(output)
+
+    def _notifications(self, references, rand, options):
+        """
+        Notifications à envoyer, mélangées, et leur répartition attendue.
+        """
+        notifications = []
+        expected = {'successful': 0, 'failed': 0, 'mismatched': 0, 'unknown': 0, 'resent': 0}
+        unknown = round(len(references) * options['unknown_rate'])
+        references = references + [
+            (f'INCONNU-{uuid.uuid4().hex[:10].upper()}', Decimal('1000.00')) for _ in range(unknown)
+        ]
+        for position, (reference, total) in enumerate(references):
+            failed = rand.random() < options['failure_rate']
+            mismatched = not failed and rand.random() < options['mismatch_rate']
+            notification = {
+                'event_id': f'SBX-{uuid.uuid4().hex}',
+                'reference': reference,
+                'status': 'FAILED' if failed else 'SUCCESSFUL',
+                # Paiement partiel : la moitié du montant dû
+                'amount': str((total / 2).quantize(Decimal('0.01')) if mismatched else total),
+            }
+            notifications.append(notification)
+            if position >= len(references) - unknown:
+                expected['unknown'] += 1
+            else:
+                expected['failed' if failed else 'mismatched' if mismatched else 'successful'] += 1
+            if rand.random() < options['duplicate_rate']:
+                # Renvoi par l'opérateur : même event_id, ignoré par le webhook
+                notifications.append(notification)
+                expected['resent'] += 1
+        rand.shuffle(notifications)
+        return notifications, expected
+
+    def _send(self, notifications):
+        """
+        Envoie une file de notifications signées sur une connexion persistante.
+        """
+        client = ApiClient(self.options['base_url'], self.options['timeout'], self.recorder)
+        try:
+            for notification in notifications:
+                body = json.dumps(notification).encode('utf-8')
+                timestamp = int(time.time())
+                client.request('POST', self.path, self.name, body=body, expected=(202,), headers={
+                    TIMESTAMP_HEADER: str(timestamp),
+                    SIGNATURE_HEADER: sign(self.secret, timestamp, body),
+                })
+        finally:
+            client.close()
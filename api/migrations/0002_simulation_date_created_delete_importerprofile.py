@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulation',
+            name='date_created',
+            field=models.DateTimeField(auto_now_add=True, null=True, verbose_name='Date de création'),
+        ),
+        migrations.DeleteModel(
+            name='ImporterProfile',
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:18
+
+import django.core.validators
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def create_default_schedule(apps, schema_editor):
+    # Barème initial aux taux en vigueur (valeurs par défaut des champs)
+    TariffSchedule = apps.get_model('api', 'TariffSchedule')
+    TariffSchedule.objects.create(name='Barème initial')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_simulation_date_created_delete_importerprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TariffSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Nom du barème')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Barème actif')),
+                ('dd_rate_necessity_goods', models.DecimalField(decimal_places=4, default=Decimal('0.05'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DD - Biens de 1ère nécessité')),
+                ('dd_rate_raw_materials', models.DecimalField(decimal_places=4, default=Decimal('0.10'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DD - Matières premières')),
+                ('dd_rate_intermediate_diverse_goods', models.DecimalField(decimal_places=4, default=Decimal('0.20'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DD - Biens intermédiaires et divers')),
+                ('dd_rate_consumption_goods', models.DecimalField(decimal_places=4, default=Decimal('0.30'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DD - Biens de consommation courante')),
+                ('excise_luxury_rate', models.DecimalField(decimal_places=4, default=Decimal('0.25'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DA - Produits de luxe')),
+                ('excise_alcohol_tobacco_rate', models.DecimalField(decimal_places=4, default=Decimal('0.25'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DA - Alcool et tabac')),
+                ('excise_vehicle_rate', models.DecimalField(decimal_places=4, default=Decimal('0.125'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux DA - Véhicules')),
+                ('vat_rate', models.DecimalField(decimal_places=4, default=Decimal('0.175'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux TVA')),
+                ('cac_rate', models.DecimalField(decimal_places=4, default=Decimal('0.10'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux CAC (part de la TVA)')),
+                ('ri_rate', models.DecimalField(decimal_places=4, default=Decimal('0.0045'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux RI')),
+                ('tci_rate', models.DecimalField(decimal_places=4, default=Decimal('0.006'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux TCI')),
+                ('cia_rate', models.DecimalField(decimal_places=4, default=Decimal('0.004'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux CIA')),
+                ('pro_rate', models.DecimalField(decimal_places=4, default=Decimal('0.0005'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux PRO')),
+                ('prd_rate_with_niu', models.DecimalField(decimal_places=4, default=Decimal('0.01'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux PRD - avec NIU')),
+                ('prd_rate_without_niu', models.DecimalField(decimal_places=4, default=Decimal('0.05'), max_digits=7, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(1)], verbose_name='Taux PRD - sans NIU')),
+                ('phytosanitary_rate_per_ton', models.DecimalField(decimal_places=4, default=Decimal('50'), max_digits=15, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Taxe phytosanitaire par tonne')),
+                ('guce_facilitation_fee', models.DecimalField(decimal_places=2, default=Decimal('12500'), max_digits=15, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Frais de Facilitation GUCE')),
+                ('tel_fee', models.DecimalField(decimal_places=2, default=Decimal('10000'), max_digits=15, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Frais TEL')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Dernière modification')),
+            ],
+            options={
+                'verbose_name': 'Barème Tarifaire',
+                'verbose_name_plural': 'Barèmes Tarifaires',
+                'ordering': ['-updated_at'],
+            },
+        ),
+        migrations.RunPython(create_default_schedule, migrations.RunPython.noop),
+    ]
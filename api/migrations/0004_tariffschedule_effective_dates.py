@@ -0,0 +1,39 @@
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_tariffschedule'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='tariffschedule',
+            options={'ordering': ['-effective_from'], 'verbose_name': 'Barème Tarifaire', 'verbose_name_plural': 'Barèmes Tarifaires'},
+        ),
+        migrations.RemoveField(
+            model_name='tariffschedule',
+            name='is_active',
+        ),
+        # Les barèmes existants (dont le barème initial) couvrent tout l'historique
+        migrations.AddField(
+            model_name='tariffschedule',
+            name='effective_from',
+            field=models.DateField(default=datetime.date(2000, 1, 1), unique=True, verbose_name='En vigueur à partir du'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tariffschedule',
+            name='effective_to',
+            field=models.DateField(blank=True, help_text="Inclus. Laisser vide pour appliquer le barème jusqu'à la version suivante.", null=True, verbose_name="En vigueur jusqu'au"),
+        ),
+        migrations.AddField(
+            model_name='simulation',
+            name='tariff_schedule',
+            field=models.ForeignKey(blank=True, help_text='Version du barème ayant produit les montants (vide = taux par défaut).', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='simulations', to='api.tariffschedule', verbose_name='Barème appliqué'),
+        ),
+    ]
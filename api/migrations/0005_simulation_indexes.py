@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_tariffschedule_effective_dates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='simulation',
+            index=models.Index(fields=['user', '-simulated_at', '-id'], name='simulation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='simulation',
+            index=models.Index(fields=['-simulated_at', '-id'], name='simulation_date_idx'),
+        ),
+    ]
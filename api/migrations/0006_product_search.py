@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def create_search_table(apps, schema_editor):
+    # Index FTS5 des produits (voir api/search.py), uniquement sous SQLite
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS api_product_search USING fts5("
+        "name, category_name, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    Product = apps.get_model('api', 'Product')
+    rows = [
+        (pk, name, category_name or '')
+        for pk, name, category_name in Product.objects.values_list('id', 'name', 'category__name')
+    ]
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO api_product_search (rowid, name, category_name) VALUES (%s, %s, %s)', rows
+        )
+
+
+def drop_search_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS api_product_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_simulation_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
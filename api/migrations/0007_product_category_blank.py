@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_product_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text='Laisser vide pour la déduire du code SH (catégorie la plus précise dont la plage couvre le code).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='products', to='api.productcategory', verbose_name='Catégorie'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_product_category_blank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Date')),
+                ('method', models.CharField(max_length=10, verbose_name='Méthode')),
+                ('path', models.CharField(max_length=2000, verbose_name='Chemin')),
+                ('view_name', models.CharField(blank=True, max_length=200, verbose_name='Vue')),
+                ('status_code', models.PositiveSmallIntegerField(verbose_name='Statut')),
+                ('duration_ms', models.FloatField(db_index=True, verbose_name='Durée (ms)')),
+                ('sql_count', models.PositiveIntegerField(verbose_name='Requêtes SQL')),
+                ('sql_time_ms', models.FloatField(verbose_name='Durée SQL (ms)')),
+                ('sql_queries', models.JSONField(default=list, help_text="[{sql, duration_ms}, ...] dans l'ordre d'exécution.", verbose_name='Requêtes SQL exécutées')),
+                ('stats', models.TextField(help_text='Sortie pstats, triée par temps cumulé.', verbose_name='Fonctions les plus coûteuses')),
+                ('profile_data', models.BinaryField(help_text='Format pstats (fichier .prof).', verbose_name='Profil cProfile')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Profil de requête',
+                'verbose_name_plural': 'Profils de requêtes',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Receipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_hash', models.CharField(help_text='Le PDF est regénéré si les données imprimées changent.', max_length=64, verbose_name='Empreinte des données')),
+                ('sha256', models.CharField(db_index=True, max_length=64, verbose_name='Empreinte SHA-256 du PDF')),
+                ('size', models.PositiveIntegerField(verbose_name='Taille (octets)')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Généré le')),
+                ('simulation', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='receipt', to='api.simulation', verbose_name='Simulation')),
+            ],
+            options={
+                'verbose_name': 'Reçu PDF',
+                'verbose_name_plural': 'Reçus PDF',
+            },
+        ),
+    ]
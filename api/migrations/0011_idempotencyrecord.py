@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 00:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_receipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, verbose_name="Clé d'idempotence")),
+                ('request_hash', models.CharField(help_text='Méthode, chemin et corps : une clé réutilisée pour une autre requête est refusée.', max_length=64, verbose_name='Empreinte de la requête')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Statut de la réponse')),
+                ('response_body', models.JSONField(blank=True, null=True, verbose_name='Corps de la réponse')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expire le')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': "Clé d'idempotence",
+                'verbose_name_plural': "Clés d'idempotence",
+                'constraints': [models.UniqueConstraint(fields=('user', 'key'), name='idempotency_user_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_idempotencyrecord'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('orange_money', 'Orange Money'), ('mtn_momo', 'MTN Mobile Money'), ('sandbox', 'Simulateur local')], max_length=20, verbose_name='Opérateur')),
+                ('event_id', models.CharField(help_text="Identifiant de la transaction chez l'opérateur : un renvoi de la même notification est ignoré.", max_length=100, verbose_name="Identifiant de l'événement")),
+                ('reference', models.CharField(help_text='Code de paiement de la simulation (payment_confirmation_code).', max_length=50, verbose_name='Référence')),
+                ('successful', models.BooleanField(verbose_name='Paiement réussi')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True, verbose_name='Montant')),
+                ('payload', models.JSONField(verbose_name='Notification reçue')),
+                ('state', models.CharField(choices=[('pending', 'À rapprocher'), ('confirmed', 'Paiement confirmé'), ('already_paid', 'Simulation déjà payée'), ('unmatched', 'Référence inconnue'), ('rejected', 'Paiement échoué')], default='pending', max_length=15, verbose_name='État')),
+                ('received_at', models.DateTimeField(auto_now_add=True, verbose_name='Reçu le')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Traité le')),
+                ('simulation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_events', to='api.simulation', verbose_name='Simulation')),
+            ],
+            options={
+                'verbose_name': 'Notification de paiement',
+                'verbose_name_plural': 'Notifications de paiement',
+                'ordering': ['-received_at'],
+                'indexes': [models.Index(fields=['state', 'id'], name='payment_event_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('provider', 'event_id'), name='payment_event_unique')],
+            },
+        ),
+    ]
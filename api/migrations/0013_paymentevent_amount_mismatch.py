@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_paymentevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='paymentevent',
+            name='state',
+            field=models.CharField(choices=[('pending', 'À rapprocher'), ('confirmed', 'Paiement confirmé'), ('already_paid', 'Simulation déjà payée'), ('amount_mismatch', 'Montant incorrect'), ('unmatched', 'Référence inconnue'), ('rejected', 'Paiement échoué')], default='pending', max_length=15, verbose_name='État'),
+        ),
+    ]
@@ -2,7 +2,16 @@
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from decimal import Decimal
+from types import MappingProxyType
+import uuid
+
+from .calculations import RESULT_FIELDS
+from .hs_codes import classify_hs_code, find_overlapping_range, parse_hs_code_ranges
+from .tariffs import RateTable, get_rate_table
 
 class User(AbstractUser):
     """
@@ -52,12 +61,39 @@ class ProductCategory(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        """
+        Vérifie le format de la plage SH et qu'elle est imbriquée dans les plages des
+        autres catégories ou disjointe de celles-ci : la catégorie la plus précise
+        d'un code doit rester unique.
+        """
+        if not self.cemac_hs_code_prefix:
+            return
+        try:
+            intervals = parse_hs_code_ranges(self.cemac_hs_code_prefix)
+        except ValueError as error:
+            raise ValidationError({"cemac_hs_code_prefix": str(error)})
+
+        others = ProductCategory.objects.exclude(pk=self.pk).exclude(cemac_hs_code_prefix__isnull=True).exclude(cemac_hs_code_prefix='')
+        for name, value in others.values_list('name', 'cemac_hs_code_prefix'):
+            try:
+                other_intervals = parse_hs_code_ranges(value)
+            except ValueError:
+                continue
+            if find_overlapping_range(intervals, other_intervals):
+                raise ValidationError({
+                    "cemac_hs_code_prefix": f"Cette plage chevauche celle de la catégorie '{name}' ({value}) sans y être incluse."
+                })
+
 class Product(models.Model):
     """
     Produit spécifique avec son espèce tarifaire et son code SH CEMAC complet.
     """
     name = models.CharField(max_length=255, unique=True, verbose_name="Nom du produit")
-    category = models.ForeignKey(ProductCategory, on_delete=models.SET_NULL, null=True, related_name='products', verbose_name="Catégorie")
+    category = models.ForeignKey(
+        ProductCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='products', verbose_name="Catégorie",
+        help_text="Laisser vide pour la déduire du code SH (catégorie la plus précise dont la plage couvre le code)."
+    )
     tariff_species = models.CharField(
         max_length=3,
         choices=TariffSpecies.choices,
@@ -83,6 +119,135 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} ({self.cemac_hs_code})"
 
+    def save(self, *args, **kwargs):
+        # Sans catégorie, le produit est classé d'après son code SH
+        update_fields = kwargs.get('update_fields')
+        if self.category_id is None and self.cemac_hs_code and (update_fields is None or 'category' in update_fields):
+            self.category_id = classify_hs_code(self.cemac_hs_code)
+        super().save(*args, **kwargs)
+
+def rate_field(default, verbose_name):
+    """
+    Champ de taux (fraction entre 0 et 1, 4 décimales au plus).
+    """
+    return models.DecimalField(
+        max_digits=7, decimal_places=4, default=Decimal(default), verbose_name=verbose_name,
+        validators=[MinValueValidator(0), MaxValueValidator(1)]
+    )
+
+class TariffSchedule(models.Model):
+    """
+    Version du barème des taux de droits et taxes (loi de finances), modifiable
+    par les administrateurs. Les valeurs par défaut sont les taux en vigueur.
+    Une version s'applique à partir de effective_from, jusqu'à effective_to inclus
+    ou jusqu'à la version suivante (voir api/tariffs.py).
+    """
+    name = models.CharField(max_length=100, unique=True, verbose_name="Nom du barème")
+    effective_from = models.DateField(unique=True, verbose_name="En vigueur à partir du")
+    effective_to = models.DateField(
+        blank=True, null=True, verbose_name="En vigueur jusqu'au",
+        help_text="Inclus. Laisser vide pour appliquer le barème jusqu'à la version suivante."
+    )
+
+    # Droit de Douane (DD) par espèce tarifaire
+    dd_rate_necessity_goods = rate_field('0.05', "Taux DD - Biens de 1ère nécessité")
+    dd_rate_raw_materials = rate_field('0.10', "Taux DD - Matières premières")
+    dd_rate_intermediate_diverse_goods = rate_field('0.20', "Taux DD - Biens intermédiaires et divers")
+    dd_rate_consumption_goods = rate_field('0.30', "Taux DD - Biens de consommation courante")
+
+    # Droits d'Accise (DA)
+    excise_luxury_rate = rate_field('0.25', "Taux DA - Produits de luxe")
+    excise_alcohol_tobacco_rate = rate_field('0.25', "Taux DA - Alcool et tabac")
+    excise_vehicle_rate = rate_field('0.125', "Taux DA - Véhicules")
+
+    # Taxes proportionnelles
+    vat_rate = rate_field('0.175', "Taux TVA")
+    cac_rate = rate_field('0.10', "Taux CAC (part de la TVA)")
+    ri_rate = rate_field('0.0045', "Taux RI")
+    tci_rate = rate_field('0.006', "Taux TCI")
+    cia_rate = rate_field('0.004', "Taux CIA")
+    pro_rate = rate_field('0.0005', "Taux PRO")
+    prd_rate_with_niu = rate_field('0.01', "Taux PRD - avec NIU")
+    prd_rate_without_niu = rate_field('0.05', "Taux PRD - sans NIU")
+
+    # Montants forfaitaires
+    phytosanitary_rate_per_ton = models.DecimalField(max_digits=15, decimal_places=4, default=Decimal('50'), validators=[MinValueValidator(0)], verbose_name="Taxe phytosanitaire par tonne")
+    guce_facilitation_fee = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('12500'), validators=[MinValueValidator(0)], verbose_name="Frais de Facilitation GUCE")
+    tel_fee = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('10000'), validators=[MinValueValidator(0)], verbose_name="Frais TEL")
+
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Dernière modification")
+
+    class Meta:
+        verbose_name = "Barème Tarifaire"
+        verbose_name_plural = "Barèmes Tarifaires"
+        ordering = ['-effective_from']
+
+    def __str__(self):
+        return f"{self.name} (à partir du {self.effective_from})"
+
+    def clean(self):
+        """
+        Vérifie la cohérence de la période d'effet : elle ne doit pas chevaucher
+        celle d'une autre version. Une version sans fin de validité s'arrête à la
+        version suivante et ne chevauche donc jamais une version postérieure.
+        """
+        if not self.effective_from:
+            return
+        if self.effective_to and self.effective_to < self.effective_from:
+            raise ValidationError({"effective_to": "La fin de validité doit suivre le début de validité."})
+
+        others = TariffSchedule.objects.exclude(pk=self.pk)
+        enclosing = others.filter(effective_from__lt=self.effective_from, effective_to__gte=self.effective_from).first()
+        if enclosing is not None:
+            raise ValidationError({"effective_from": f"Cette période chevauche celle du barème « {enclosing.name} »."})
+        if self.effective_to:
+            enclosed = others.filter(effective_from__gt=self.effective_from, effective_from__lte=self.effective_to).first()
+            if enclosed is not None:
+                raise ValidationError({"effective_to": f"Cette période chevauche celle du barème « {enclosed.name} »."})
+
+    def compile(self):
+        """
+        Compile le barème en table de taux immuable.
+        """
+        return RateTable(
+            schedule_id=self.pk,
+            dd_rates=MappingProxyType({
+                TariffSpecies.NECESSITY_GOODS: Decimal(self.dd_rate_necessity_goods),
+                TariffSpecies.RAW_MATERIALS: Decimal(self.dd_rate_raw_materials),
+                TariffSpecies.INTERMEDIATE_DIVERSE_GOODS: Decimal(self.dd_rate_intermediate_diverse_goods),
+                TariffSpecies.CONSUMPTION_GOODS: Decimal(self.dd_rate_consumption_goods),
+            }),
+            excise_luxury_rate=Decimal(self.excise_luxury_rate),
+            excise_alcohol_tobacco_rate=Decimal(self.excise_alcohol_tobacco_rate),
+            excise_vehicle_rate=Decimal(self.excise_vehicle_rate),
+            vat_rate=Decimal(self.vat_rate),
+            cac_rate=Decimal(self.cac_rate),
+            ri_rate=Decimal(self.ri_rate),
+            tci_rate=Decimal(self.tci_rate),
+            cia_rate=Decimal(self.cia_rate),
+            pro_rate=Decimal(self.pro_rate),
+            prd_rate_with_niu=Decimal(self.prd_rate_with_niu),
+            prd_rate_without_niu=Decimal(self.prd_rate_without_niu),
+            phytosanitary_rate_per_ton=Decimal(self.phytosanitary_rate_per_ton),
+            guce_facilitation_fee=Decimal(self.guce_facilitation_fee),
+            tel_fee=Decimal(self.tel_fee),
+        )
+
+class SimulationQuerySet(models.QuerySet):
+    """
+    QuerySet des simulations.
+    """
+
+    def with_detail_relations(self):
+        """
+        Charge en une seule jointure le produit et l'utilisateur, limités aux
+        colonnes affichées par SimulationDetailSerializer (pas de requête par ligne).
+        """
+        return self.select_related('product', 'user').only(
+            *(field.name for field in self.model._meta.concrete_fields),
+            'product__name', 'product__cemac_hs_code', 'user__email',
+        )
+
 class Simulation(models.Model):
     """
     Représente une simulation de calcul des coûts douaniers effectuée par un utilisateur.
@@ -99,6 +264,10 @@ class Simulation(models.Model):
     payment_confirmation_code = models.CharField(max_length=50, blank=True, null=True, unique=True, verbose_name="Code de confirmation de paiement")
     response_email_sent = models.BooleanField(default=False, verbose_name="Email de réponse envoyé")
     date_created = models.DateTimeField(auto_now_add=True, verbose_name="Date de création",null=True)
+    tariff_schedule = models.ForeignKey(
+        TariffSchedule, on_delete=models.PROTECT, blank=True, null=True, related_name='simulations',
+        verbose_name="Barème appliqué", help_text="Version du barème ayant produit les montants (vide = taux par défaut)."
+    )
     # date_updated = models.DateTimeField(auto_now=True, verbose_name="Date de mise à
 
     # Champs pour stocker les résultats de la simulation
@@ -117,10 +286,21 @@ class Simulation(models.Model):
     tel_fee = models.DecimalField(max_digits=15, decimal_places=2, default=10000, verbose_name="Frais TEL")
     total_customs_cost = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Coût total des douanes")
 
+    objects = SimulationQuerySet.as_manager()
+
+    # Champs d'entrée du calcul : leur modification déclenche un nouveau calcul à l'enregistrement
+    INPUT_FIELDS = ('product', 'declared_value', 'transport_cost', 'handling_cost', 'weight_in_tons', 'has_niu')
+
     class Meta:
         verbose_name = "Simulation de Coût Douanier"
         verbose_name_plural = "Simulations de Coûts Douaniers"
         ordering = ['-simulated_at']
+        indexes = [
+            # Historique d'un utilisateur, paginé par curseur (voir api/pagination.py)
+            models.Index(fields=['user', '-simulated_at', '-id'], name='simulation_user_date_idx'),
+            # Listes de toutes les simulations (administrateurs)
+            models.Index(fields=['-simulated_at', '-id'], name='simulation_date_idx'),
+        ]
 
     def __str__(self):
         return f"Simulation #{self.id} par {self.user.email} pour {self.product.name}"
@@ -130,61 +310,59 @@ class Simulation(models.Model):
         Calcule les différents éléments du coût douanier et met à jour les champs de la simulation.
         Cette méthode centralise la logique de calcul.
         """
+        # Barème en vigueur à la date de la simulation (maintenant si elle n'est pas encore enregistrée)
+        rates = get_rate_table(self.simulated_at)
+        self.tariff_schedule_id = rates.schedule_id
+
         # Détermination de la Valeur en Douane (VD)
         self.customs_value_vd = self.declared_value + self.transport_cost + self.handling_cost
 
         # Droit de Douane (DD)
-        dd_rate_map = {
-            TariffSpecies.NECESSITY_GOODS: Decimal(0.05),
-            TariffSpecies.RAW_MATERIALS: Decimal(0.10),
-            TariffSpecies.INTERMEDIATE_DIVERSE_GOODS: Decimal(0.20),
-            TariffSpecies.CONSUMPTION_GOODS: Decimal(0.30),
-        }
-        dd_rate = dd_rate_map.get(self.product.tariff_species,  Decimal(0))
+        dd_rate = rates.dd_rates.get(self.product.tariff_species, Decimal(0))
         self.customs_duty_dd = self.customs_value_vd * dd_rate
 
         # Droit d'Accise (DA)
         self.excise_duty_da = 0
         base_for_da = self.customs_value_vd + self.customs_duty_dd
         if self.product.is_luxury:
-            self.excise_duty_da = base_for_da * Decimal(0.25)
+            self.excise_duty_da = base_for_da * rates.excise_luxury_rate
         elif self.product.is_alcohol_tobacco:
-            self.excise_duty_da = base_for_da * Decimal(0.25)
+            self.excise_duty_da = base_for_da * rates.excise_alcohol_tobacco_rate
         elif self.product.is_vehicle:
-            self.excise_duty_da = base_for_da * Decimal(0.125)
+            self.excise_duty_da = base_for_da * rates.excise_vehicle_rate
 
         # TVA (17,5%)
         base_for_tva = self.customs_value_vd + self.customs_duty_dd + self.excise_duty_da
-        self.vat_tva = base_for_tva *Decimal( 0.175)
+        self.vat_tva = base_for_tva * rates.vat_rate
 
         # Centimes Additionnels Communaux (CAC) 10% de la TVA
-        self.communal_additional_cac = self.vat_tva * Decimal(0.10)
+        self.communal_additional_cac = self.vat_tva * rates.cac_rate
 
         # Redevance Informatique (RI) 0,45% de VD
-        self.it_royalty_ri = self.customs_value_vd * Decimal(0.0045)
+        self.it_royalty_ri = self.customs_value_vd * rates.ri_rate
 
         # Taxe Communautaire d'Intégration (TCI) 0,6% de VD
-        self.community_integration_tci = self.customs_value_vd * Decimal(0.006)
+        self.community_integration_tci = self.customs_value_vd * rates.tci_rate
 
         # Contribution pour l'Intégration (CIA) 0,4% de VD
-        self.integration_contribution_cia = self.customs_value_vd * Decimal(0.004)
+        self.integration_contribution_cia = self.customs_value_vd * rates.cia_rate
 
         # Prélèvement OHADA (PRO) 0,05% VD
-        self.ohada_levy_pro = self.customs_value_vd * Decimal(0.0005)
+        self.ohada_levy_pro = self.customs_value_vd * rates.pro_rate
 
         # Précompte sur Achat (PRD)
-        self.purchase_prepayment_prd = self.customs_value_vd * (Decimal(0.01) if self.has_niu else Decimal(0.05))
+        self.purchase_prepayment_prd = self.customs_value_vd * (rates.prd_rate_with_niu if self.has_niu else rates.prd_rate_without_niu)
 
-        # Frais de facilitation GUCE
-        # Initialisé à 12500 par défaut dans le modèle, pas de calcul ici
+        # Frais de facilitation GUCE (forfait du barème, 12500 par défaut)
+        self.guce_facilitation_fee = rates.guce_facilitation_fee
 
         # Taxe phytosanitaire
         self.phytosanitary_tax =  Decimal(0)
         if self.product.is_phytosanitary:
-            self.phytosanitary_tax = self.weight_in_tons * 50
+            self.phytosanitary_tax = self.weight_in_tons * rates.phytosanitary_rate_per_ton
 
-        # TEL (Taxe d'Enlèvement Local)
-        # Initialisé à 10000 par défaut dans le modèle, pas de calcul ici
+        # TEL (Taxe d'Enlèvement Local) (forfait du barème, 10000 par défaut)
+        self.tel_fee = rates.tel_fee
 
         # Coût de douane import total
         self.total_customs_cost = sum([
@@ -204,11 +382,219 @@ class Simulation(models.Model):
         ])
         return self.total_customs_cost
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_inputs = instance._input_values()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        current_inputs = self._input_values()
+        if fields is None or getattr(self, '_loaded_inputs', None) is None:
+            self._loaded_inputs = current_inputs
+            return
+        # Chargement d'un champ différé : seules les entrées relues sont mises à jour,
+        # une entrée modifiée entre-temps reste un changement
+        refreshed = {self._meta.get_field(name).attname for name in fields}
+        self._loaded_inputs.update(
+            {attname: value for attname, value in current_inputs.items() if attname in refreshed}
+        )
+
+    def _input_values(self):
+        """
+        Valeurs actuelles des entrées du calcul, normalisées par leur champ.
+        Les champs différés (only/defer) sont ignorés pour ne pas déclencher de requête.
+        """
+        values = {}
+        for field_name in self.INPUT_FIELDS:
+            field = self._meta.get_field(field_name)
+            if field.attname in self.__dict__:
+                values[field.attname] = field.to_python(self.__dict__[field.attname])
+        return values
+
+    def has_changed_inputs(self):
+        """
+        Indique si une entrée du calcul a changé depuis le chargement depuis la base.
+        Une entrée différée au chargement (only/defer) puis affectée compte comme un
+        changement : sa valeur en base n'est pas connue.
+        """
+        loaded_inputs = getattr(self, '_loaded_inputs', None)
+        if loaded_inputs is None:
+            return True
+        return any(
+            attname not in loaded_inputs or loaded_inputs[attname] != value
+            for attname, value in self._input_values().items()
+        )
+
     def save(self, *args, **kwargs):
         """
         Surcharge de la méthode save pour s'assurer que les coûts sont calculés
         avant la sauvegarde.
+        Le calcul (et la lecture du produit qu'il implique) n'a lieu que pour une
+        nouvelle simulation ou si une entrée du calcul a changé. Avec update_fields,
+        les colonnes de résultat ne sont écrites que si une entrée y figure.
+        Un changement de barème n'est pas répercuté ici : voir recompute_simulations.
         """
-        self.calculate_customs_cost()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if update_fields & set(self.INPUT_FIELDS):
+                self.calculate_customs_cost()
+                kwargs['update_fields'] = update_fields | set(RESULT_FIELDS) | {'tariff_schedule'}
+        elif self._state.adding or self.has_changed_inputs():
+            self.calculate_customs_cost()
         super().save(*args, **kwargs)
+        self._loaded_inputs = self._input_values()
+
+
+class RequestProfile(models.Model):
+    """
+    Profil d'une requête demandé par un membre du staff avec l'en-tête X-Profile
+    (voir api/profiling.py) : statistiques cProfile et requêtes SQL exécutées.
+    L'identifiant est renvoyé dans l'en-tête X-Profile-Id de la réponse.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Date")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Utilisateur")
+    method = models.CharField(max_length=10, verbose_name="Méthode")
+    path = models.CharField(max_length=2000, verbose_name="Chemin")
+    view_name = models.CharField(max_length=200, blank=True, verbose_name="Vue")
+    status_code = models.PositiveSmallIntegerField(verbose_name="Statut")
+    duration_ms = models.FloatField(db_index=True, verbose_name="Durée (ms)")
+    sql_count = models.PositiveIntegerField(verbose_name="Requêtes SQL")
+    sql_time_ms = models.FloatField(verbose_name="Durée SQL (ms)")
+    sql_queries = models.JSONField(default=list, verbose_name="Requêtes SQL exécutées", help_text="[{sql, duration_ms}, ...] dans l'ordre d'exécution.")
+    stats = models.TextField(verbose_name="Fonctions les plus coûteuses", help_text="Sortie pstats, triée par temps cumulé.")
+    profile_data = models.BinaryField(verbose_name="Profil cProfile", help_text="Format pstats (fichier .prof).")
+
+    class Meta:
+        verbose_name = "Profil de requête"
+        verbose_name_plural = "Profils de requêtes"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+
+class Receipt(models.Model):
+    """
+    Reçu PDF d'une simulation payée, stocké sous MEDIA_ROOT/receipts/<sha256>.pdf
+    (voir api/receipts.py).
+    """
+    simulation = models.OneToOneField(Simulation, on_delete=models.CASCADE, related_name='receipt', verbose_name="Simulation")
+    source_hash = models.CharField(max_length=64, verbose_name="Empreinte des données", help_text="Le PDF est regénéré si les données imprimées changent.")
+    sha256 = models.CharField(max_length=64, db_index=True, verbose_name="Empreinte SHA-256 du PDF")
+    size = models.PositiveIntegerField(verbose_name="Taille (octets)")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Généré le")
+
+    class Meta:
+        verbose_name = "Reçu PDF"
+        verbose_name_plural = "Reçus PDF"
+
+    def __str__(self):
+        return f"Reçu de la simulation #{self.simulation_id}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Email en attente d'envoi (outbox transactionnelle). Écrit dans la même
+    transaction que la confirmation du paiement, il est envoyé ensuite par la
+    commande send_outbox_emails (voir api/outbox.py), hors de la requête HTTP.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'pending', "En attente"
+        SENT = 'sent', "Envoyé"
+        FAILED = 'failed', "Échec définitif"
+
+    simulation = models.ForeignKey(Simulation, on_delete=models.CASCADE, related_name='outbox_emails', verbose_name="Simulation")
+    recipient = models.EmailField(verbose_name="Destinataire")
+    subject = models.CharField(max_length=255, verbose_name="Objet")
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Statut")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Prochaine tentative")
+    last_error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    sent_at = models.DateTimeField(blank=True, null=True, verbose_name="Date d'envoi")
+
+    class Meta:
+        verbose_name = "Email en attente"
+        verbose_name_plural = "Emails en attente (outbox)"
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            # Emails à envoyer, par ordre d'échéance (voir api/outbox.py)
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.get_status_display()})"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Première réponse d'une requête POST portant l'en-tête Idempotency-Key, rejouée
+    pour les nouvelles tentatives du même utilisateur avec la même clé (voir
+    api/idempotency.py). status_code vide : requête encore en cours.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', verbose_name="Utilisateur")
+    key = models.CharField(max_length=255, verbose_name="Clé d'idempotence")
+    request_hash = models.CharField(max_length=64, verbose_name="Empreinte de la requête", help_text="Méthode, chemin et corps : une clé réutilisée pour une autre requête est refusée.")
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Statut de la réponse")
+    response_body = models.JSONField(blank=True, null=True, verbose_name="Corps de la réponse")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Expire le")
+
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_unique'),
+        ]
 
+    def __str__(self):
+        return f"{self.key} ({self.user_id})"
+
+
+class PaymentEvent(models.Model):
+    """
+    Notification de paiement reçue d'un opérateur de mobile money par le webhook,
+    en attente de rapprochement avec une simulation (voir api/payments.py).
+    """
+    class Provider(models.TextChoices):
+        ORANGE_MONEY = 'orange_money', "Orange Money"
+        MTN_MOMO = 'mtn_momo', "MTN Mobile Money"
+        SANDBOX = 'sandbox', "Simulateur local"
+
+    class State(models.TextChoices):
+        PENDING = 'pending', "À rapprocher"
+        CONFIRMED = 'confirmed', "Paiement confirmé"
+        ALREADY_PAID = 'already_paid', "Simulation déjà payée"
+        AMOUNT_MISMATCH = 'amount_mismatch', "Montant incorrect"
+        UNMATCHED = 'unmatched', "Référence inconnue"
+        REJECTED = 'rejected', "Paiement échoué"
+
+    provider = models.CharField(max_length=20, choices=Provider.choices, verbose_name="Opérateur")
+    event_id = models.CharField(max_length=100, verbose_name="Identifiant de l'événement", help_text="Identifiant de la transaction chez l'opérateur : un renvoi de la même notification est ignoré.")
+    reference = models.CharField(max_length=50, verbose_name="Référence", help_text="Code de paiement de la simulation (payment_confirmation_code).")
+    successful = models.BooleanField(verbose_name="Paiement réussi")
+    amount = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True, verbose_name="Montant")
+    payload = models.JSONField(verbose_name="Notification reçue")
+    state = models.CharField(max_length=15, choices=State.choices, default=State.PENDING, verbose_name="État")
+    simulation = models.ForeignKey(Simulation, on_delete=models.SET_NULL, blank=True, null=True, related_name='payment_events', verbose_name="Simulation")
+    received_at = models.DateTimeField(auto_now_add=True, verbose_name="Reçu le")
+    processed_at = models.DateTimeField(blank=True, null=True, verbose_name="Traité le")
+
+    class Meta:
+        verbose_name = "Notification de paiement"
+        verbose_name_plural = "Notifications de paiement"
+        ordering = ['-received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['provider', 'event_id'], name='payment_event_unique'),
+        ]
+        indexes = [
+            # File des notifications à rapprocher, dans l'ordre d'arrivée (voir api/payments.py)
+            models.Index(fields=['state', 'id'], name='payment_event_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_provider_display()} {self.event_id} ({self.get_state_display()})"
@@ -0,0 +1,200 @@
+# api/outbox.py
+
+"""
+Envoi différé des emails (outbox transactionnelle).
+
+confirm_payment n'envoie plus l'email dans sa transaction : il y écrit une
+ligne EmailOutbox, validée ou annulée avec le paiement. La commande
+send_outbox_emails envoie ensuite les emails dus par lots : les messages du lot
+sont rendus (gabarits HTML et texte compilés une fois par processus), puis
+remis un par un sur une seule connexion SMTP, et les simulations sont marquées
+(response_email_sent). Un échec est retenté avec un délai croissant
+(RETRY_BASE_DELAY, doublé à chaque tentative, plafonné à RETRY_MAX_DELAY),
+jusqu'à max_attempts tentatives.
+
+Chaque message est remis séparément : si le serveur refuse un message ou coupe
+la connexion en cours de lot, seuls les messages non remis sont retentés, et
+non ceux déjà partis. Un email peut encore être renvoyé si le worker s'arrête
+entre la remise et l'enregistrement du lot (livraison « au moins une fois »).
+
+Les lignes d'un lot sont réservées (LEASE) avant l'envoi : un worker arrêté en
+cours de lot ne bloque pas ses emails plus longtemps que la réservation.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from functools import cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import F
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import EmailOutbox, Simulation
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=1)
+LEASE = timedelta(minutes=5)
+MAX_ATTEMPTS = 5
+
+
+def _result_email(simulation):
+    return EmailOutbox(
+        simulation=simulation,
+        recipient=simulation.user.email,
+        subject=f"Votre simulation de coûts douaniers SIMU #{simulation.id}",
+    )
+
+
+def enqueue_simulation_result(simulation):
+    """
+    Ajoute l'email de résultat de `simulation` à l'outbox, dans la transaction courante.
+    """
+    email = _result_email(simulation)
+    email.save()
+    return email
+
+
+def enqueue_simulation_results(simulations):
+    """
+    Ajoute les emails de résultat de plusieurs simulations en un seul INSERT
+    (rapprochement des paiements par lots, voir api/payments.py).
+    """
+    return EmailOutbox.objects.bulk_create([_result_email(simulation) for simulation in simulations])
+
+
+def retry_delay(attempts):
+    """
+    Délai avant la tentative suivante, après `attempts` échecs.
+    """
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+@cache
+def _templates():
+    """
+    Gabarits HTML et texte de l'email de résultat, compilés au premier envoi.
+    """
+    return get_template('emails/simulation_result.html'), get_template('emails/simulation_result.txt')
+
+
+def build_message(email, connection):
+    """
+    Construit le message (texte brut et alternative HTML) de l'email de résultat.
+    """
+    html_template, text_template = _templates()
+    simulation = email.simulation
+    context = {'simulation': simulation, 'user': simulation.user, 'product': simulation.product}
+    message = EmailMultiAlternatives(
+        email.subject, text_template.render(context), settings.DEFAULT_FROM_EMAIL, [email.recipient],
+        connection=connection
+    )
+    message.attach_alternative(html_template.render(context), 'text/html')
+    return message
+
+
+def _claim(batch_size, now):
+    """
+    Réserve au plus `batch_size` emails dus et les retourne avec leur simulation.
+    """
+    with transaction.atomic():
+        due = EmailOutbox.objects.filter(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now)
+        if db_connection.features.has_select_for_update_skip_locked:
+            # Plusieurs workers (PostgreSQL) : chacun ignore les lignes réservées par un autre
+            due = due.select_for_update(skip_locked=True, of=('self',))
+        emails = list(
+            due.select_related('simulation__user', 'simulation__product', 'simulation__tariff_schedule')
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if emails:
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(next_attempt_at=now + LEASE)
+    return emails
+
+
+def _close(connection):
+    """
+    Ferme la connexion ; une erreur à la fermeture ne doit pas faire perdre le bilan du lot.
+    """
+    try:
+        connection.close()
+    except Exception as error:
+        logger.warning("Erreur à la fermeture de la connexion SMTP : %s", error)
+
+
+def deliver_pending(batch_size=100, max_attempts=MAX_ATTEMPTS):
+    """
+    Envoie un lot d'emails dus sur une seule connexion, un message à la fois.
+    Retourne le bilan du lot : {'sent', 'retried', 'failed', 'render_s', 'send_s'}.
+    """
+    now = timezone.now()
+    emails = _claim(batch_size, now)
+    counts = {'sent': 0, 'retried': 0, 'failed': 0, 'render_s': 0.0, 'send_s': 0.0}
+    if not emails:
+        return counts
+
+    connection = get_connection(fail_silently=False)
+    failures, messages, ready = [], [], []
+    start = time.perf_counter()
+    for email in emails:
+        try:
+            messages.append(build_message(email, connection))
+        except Exception as error:
+            # Un gabarit en erreur n'empêche pas l'envoi du reste du lot
+            logger.exception("Erreur lors du rendu de l'email pour la simulation %s", email.simulation_id)
+            failures.append((email, error))
+        else:
+            ready.append(email)
+    counts['render_s'] = time.perf_counter() - start
+
+    sent = []
+    if messages:
+        start = time.perf_counter()
+        try:
+            connection.open()
+        except Exception as error:
+            logger.warning("Échec de la connexion pour un lot de %s email(s) : %s", len(messages), error)
+            failures += [(email, error) for email in ready]
+        else:
+            try:
+                for email, message in zip(ready, messages):
+                    # send_messages réutilise la connexion ouverte ; un appel par message
+                    # pour savoir lesquels sont partis si le serveur échoue en cours de lot
+                    try:
+                        connection.send_messages([message])
+                    except Exception as error:
+                        logger.warning("Échec de la remise de l'email pour la simulation %s : %s", email.simulation_id, error)
+                        failures.append((email, error))
+                        # Connexion peut-être perdue : les messages suivants en rouvrent une
+                        _close(connection)
+                    else:
+                        sent.append(email)
+            finally:
+                _close(connection)
+        counts['send_s'] = time.perf_counter() - start
+
+    if sent:
+        EmailOutbox.objects.filter(pk__in=[email.pk for email in sent]).update(
+            status=EmailOutbox.Status.SENT, sent_at=timezone.now(), attempts=F('attempts') + 1, last_error=''
+        )
+        Simulation.objects.filter(pk__in=[email.simulation_id for email in sent]).update(response_email_sent=True)
+        counts['sent'] = len(sent)
+
+    for email, error in failures:
+        email.attempts += 1
+        email.last_error = f"{type(error).__name__}: {error}"[:2000]
+        if email.attempts >= max_attempts:
+            email.status = EmailOutbox.Status.FAILED
+            counts['failed'] += 1
+        else:
+            email.next_attempt_at = now + retry_delay(email.attempts)
+            counts['retried'] += 1
+    if failures:
+        EmailOutbox.objects.bulk_update(
+            [email for email, _ in failures], ['attempts', 'last_error', 'status', 'next_attempt_at']
+        )
+    return counts
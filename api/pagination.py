@@ -0,0 +1,18 @@
+# api/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class SimulationCursorPagination(CursorPagination):
+    """
+    Pagination par curseur (keyset) des simulations, des plus récentes aux plus anciennes.
+    Chaque page est lue par une requête "WHERE simulated_at < curseur ... LIMIT n"
+    servie par les index de Simulation : la page N coûte autant que la première,
+    et aucune requête COUNT(*) n'est faite sur la table.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    # L'id départage les simulations de même date ; même sens de tri que
+    # simulated_at pour que l'index puisse servir tout le ORDER BY.
+    ordering = ('-simulated_at', '-id')
@@ -0,0 +1,170 @@
+# api/payments.py
+
+"""
+Notifications de paiement des opérateurs de mobile money et leur rapprochement.
+
+L'opérateur (Orange Money, MTN MoMo, ou le simulateur local « sandbox », voir
+la commande simulate_payment_provider) appelle POST /api/payments/webhook/<opérateur>/
+pour chaque paiement. La requête est signée avec le secret de l'opérateur
+(PAYMENT_WEBHOOK_SECRETS) :
+
+    X-Webhook-Timestamp: <secondes Unix>
+    X-Webhook-Signature: sha256=<HMAC-SHA256(secret, "<timestamp>." + corps)>
+
+Une signature invalide, ou datée de plus de SIGNATURE_TOLERANCE secondes, est
+refusée. Le webhook ne fait qu'enregistrer la notification dans PaymentEvent
+(un seul INSERT ; un renvoi du même event_id est ignoré) et répond 202 : une
+rafale de notifications n'occupe pas les workers HTTP.
+
+La commande reconcile_payments traite ensuite la file par lots : les références
+sont rapprochées de Simulation.payment_confirmation_code (code attribué à la
+création de la simulation), les simulations payées sont marquées en un seul
+UPDATE ... WHERE is_paid = false et leurs emails de résultat ajoutés à l'outbox,
+dans la transaction du lot. Une simulation payée entre-temps par confirm_payment
+(select_for_update est sans effet sous SQLite) n'est pas modifiée par l'UPDATE :
+sa notification est classée « déjà payée », sans second email. Un paiement dont
+le montant est absent ou différent du coût total de la simulation
+(total_customs_cost) ne la marque pas payée : la notification est classée
+« montant incorrect », à vérifier avec l'opérateur.
+
+Corps attendu, format commun à tous les opérateurs (la conversion depuis le
+format propre à chaque opérateur se fera à leur intégration) :
+
+    {"event_id": "...", "reference": "<code de paiement>", "status": "SUCCESSFUL" | "FAILED", "amount": "1500.00"}
+"""
+
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import PaymentEvent, Simulation
+from .outbox import enqueue_simulation_results
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+TIMESTAMP_HEADER = 'X-Webhook-Timestamp'
+SIGNATURE_TOLERANCE = 300
+
+
+def webhook_secret(provider):
+    """
+    Secret partagé avec `provider`, ou None si l'opérateur n'est pas configuré.
+    """
+    return settings.PAYMENT_WEBHOOK_SECRETS.get(provider) or None
+
+
+def sign(secret, timestamp, body):
+    """
+    Valeur de l'en-tête X-Webhook-Signature pour un corps (octets) et un horodatage.
+    """
+    message = str(timestamp).encode('ascii') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, timestamp, signature, body):
+    """
+    Vérifie la signature et la fraîcheur d'une notification (contre le rejeu d'une ancienne requête).
+    """
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > SIGNATURE_TOLERANCE:
+        return False
+    return hmac.compare_digest(sign(secret, timestamp, body), signature or '')
+
+
+def record_event(provider, data, payload):
+    """
+    Enregistre une notification validée, en une requête ; un renvoi du même
+    event_id par l'opérateur est ignoré sans erreur.
+    """
+    event = PaymentEvent(
+        provider=provider,
+        event_id=data['event_id'],
+        reference=data['reference'],
+        successful=data['status'] == 'SUCCESSFUL',
+        amount=data.get('amount'),
+        payload=payload,
+    )
+    PaymentEvent.objects.bulk_create([event], ignore_conflicts=True)
+
+
+def _mark_paid(simulations):
+    """
+    Marque les simulations payées par compare-and-swap (is_paid = false) et
+    retourne celles que ce lot a effectivement fait passer à payées.
+    """
+    pks = [simulation.pk for simulation in simulations]
+    with transaction.atomic():
+        if Simulation.objects.filter(pk__in=pks, is_paid=False).update(is_paid=True) == len(pks):
+            return simulations
+        # Certaines ont été payées depuis leur lecture : l'UPDATE groupé est annulé
+        # et chaque simulation est marquée séparément pour savoir lesquelles
+        transaction.set_rollback(True)
+    return [
+        simulation for simulation in simulations
+        if Simulation.objects.filter(pk=simulation.pk, is_paid=False).update(is_paid=True)
+    ]
+
+
+def reconcile_pending(batch_size=500):
+    """
+    Rapproche un lot de notifications en attente, dans une seule transaction.
+    Retourne le bilan du lot : {'confirmed', 'already_paid', 'amount_mismatch', 'unmatched', 'rejected'}.
+    """
+    counts = {state: 0 for state in ('confirmed', 'already_paid', 'amount_mismatch', 'unmatched', 'rejected')}
+    now = timezone.now()
+    with transaction.atomic():
+        pending = PaymentEvent.objects.filter(state=PaymentEvent.State.PENDING)
+        if connection.features.has_select_for_update_skip_locked:
+            # Plusieurs workers (PostgreSQL) : chacun prend des notifications différentes
+            pending = pending.select_for_update(skip_locked=True)
+        events = list(pending.order_by('id')[:batch_size])
+        if not events:
+            return counts
+
+        # Simulations verrouillées jusqu'à la fin du lot : un confirm_payment
+        # concurrent attend puis échoue sur son compare-and-swap (409)
+        references = {event.reference for event in events if event.successful}
+        simulations = {
+            simulation.payment_confirmation_code: simulation
+            for simulation in Simulation.objects.select_for_update(of=('self',)).select_related('user')
+            .filter(payment_confirmation_code__in=references)
+        }
+
+        paid = []
+        for event in events:
+            simulation = simulations.get(event.reference) if event.successful else None
+            if not event.successful:
+                event.state = PaymentEvent.State.REJECTED
+            elif simulation is None:
+                event.state = PaymentEvent.State.UNMATCHED
+            elif event.amount != simulation.total_customs_cost:
+                # Montant absent ou différent du coût total : paiement partiel, erroné ou falsifié
+                event.state = PaymentEvent.State.AMOUNT_MISMATCH
+            elif simulation.is_paid:
+                # Déjà payée avant ce lot, ou par une notification précédente du lot
+                event.state = PaymentEvent.State.ALREADY_PAID
+            else:
+                event.state = PaymentEvent.State.CONFIRMED
+                simulation.is_paid = True
+                paid.append(simulation)
+            event.simulation = simulation
+            event.processed_at = now
+
+        if paid:
+            paid = _mark_paid(paid)
+            won = {simulation.pk for simulation in paid}
+            for event in events:
+                if event.state == PaymentEvent.State.CONFIRMED and event.simulation.pk not in won:
+                    event.state = PaymentEvent.State.ALREADY_PAID
+            if paid:
+                enqueue_simulation_results(paid)
+        for event in events:
+            counts[event.state] += 1
+        PaymentEvent.objects.bulk_update(events, ['state', 'simulation', 'processed_at'])
+    return counts
@@ -0,0 +1,141 @@
+# api/profiling.py
+
+"""
+Profilage à la demande d'une requête, utilisable en production.
+
+Un membre du staff ajoute l'en-tête `X-Profile: 1` à sa requête (session admin
+ou token JWT) : la vue est alors exécutée sous cProfile et les requêtes SQL sont
+enregistrées avec leur durée. Le tout est stocké dans un RequestProfile dont
+l'identifiant est renvoyé dans l'en-tête `X-Profile-Id` ; les profils se
+consultent dans l'administration (triés par durée) et le fichier .prof se
+télécharge pour snakeviz ou pstats.
+
+Sans l'en-tête, le middleware ne coûte qu'une lecture de dictionnaire.
+"""
+
+import cProfile
+import io
+import marshal
+import pstats
+import time
+
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .models import RequestProfile
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+MAX_SQL_QUERIES = 1000  # requêtes SQL conservées par profil
+TOP_FUNCTIONS = 60  # lignes de la sortie pstats
+MAX_PROFILES = 500  # profils conservés, les plus anciens sont supprimés
+
+
+class _QueryRecorder:
+    """
+    Wrapper d'exécution SQL : enregistre chaque requête et sa durée.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.seconds += duration
+            if len(self.queries) < MAX_SQL_QUERIES:
+                self.queries.append({'sql': sql, 'duration_ms': round(duration * 1000, 3)})
+
+
+def requesting_staff_user(request):
+    """
+    Retourne l'utilisateur staff à l'origine de la requête, ou None.
+    Le token JWT n'est lu que si la session ne suffit pas (appels d'API).
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, TokenError):
+        return None
+    if authenticated is None or not authenticated[0].is_staff:
+        return None
+    return authenticated[0]
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes du staff portant l'en-tête X-Profile.
+    À placer après AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if PROFILE_HEADER not in request.headers:
+            return self.get_response(request)
+        user = requesting_staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un autre profileur est actif (Python 3.12+ : un seul par processus)
+            return self.get_response(request)
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - start
+
+        profile = self._save(request, response, user, profiler, recorder, duration)
+        response[PROFILE_ID_HEADER] = str(profile.pk)
+        return response
+
+    def _save(self, request, response, user, profiler, recorder, duration):
+        stats = pstats.Stats(profiler, stream=io.StringIO())
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        match = request.resolver_match
+        profile = RequestProfile.objects.create(
+            user=user,
+            method=request.method[:10],
+            path=request.get_full_path()[:2000],
+            view_name=(match.view_name or '') if match else '',
+            status_code=response.status_code,
+            duration_ms=round(duration * 1000, 3),
+            sql_count=recorder.count,
+            sql_time_ms=round(recorder.seconds * 1000, 3),
+            sql_queries=recorder.queries,
+            stats=stats.stream.getvalue(),
+            # Même contenu que Stats.dump_stats() : lisible par pstats.Stats(fichier)
+            profile_data=marshal.dumps(stats.stats),
+        )
+        _prune()
+        return profile
+
+
+def _prune():
+    """
+    Ne conserve que les MAX_PROFILES profils les plus récents.
+    """
+    oldest_kept = list(
+        RequestProfile.objects.order_by('-created_at').values_list('created_at', flat=True)[MAX_PROFILES - 1:MAX_PROFILES]
+    )
+    if oldest_kept:
+        RequestProfile.objects.filter(created_at__lt=oldest_kept[0]).delete()
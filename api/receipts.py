@@ -0,0 +1,209 @@
+# api/receipts.py
+
+"""
+Reçu PDF d'une simulation payée.
+
+Le PDF est produit par un petit générateur en Python pur (une page, polices
+standard Helvetica et Courier, aucune dépendance) et de façon déterministe :
+les mêmes données donnent les mêmes octets. Il est rendu une seule fois puis
+stocké par adressage de contenu, sous MEDIA_ROOT/receipts/<sha256>.pdf ; le
+modèle Receipt relie la simulation à ce fichier. L'empreinte SHA-256 sert
+d'ETag fort.
+
+Receipt.source_hash est l'empreinte des données imprimées : si la simulation
+est modifiée après coup (recalcul, produit renommé), le reçu est regénéré au
+téléchargement suivant.
+"""
+
+import hashlib
+import os
+import tempfile
+import zlib
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Receipt
+
+RECEIPTS_DIR = 'receipts'
+
+# (libellé, champ) des montants imprimés, dans l'ordre du calcul
+BREAKDOWN = (
+    ("Valeur en douane (VD)", 'customs_value_vd'),
+    ("Droit de douane (DD)", 'customs_duty_dd'),
+    ("Droits d'accise (DA)", 'excise_duty_da'),
+    ("TVA", 'vat_tva'),
+    ("Centimes additionnels communaux (CAC)", 'communal_additional_cac'),
+    ("Redevance informatique (RI)", 'it_royalty_ri'),
+    ("Taxe communautaire d'intégration (TCI)", 'community_integration_tci'),
+    ("Contribution pour l'intégration (CIA)", 'integration_contribution_cia'),
+    ("Prélèvement OHADA (PRO)", 'ohada_levy_pro'),
+    ("Précompte sur achat (PRD)", 'purchase_prepayment_prd'),
+    ("Frais de facilitation GUCE", 'guce_facilitation_fee'),
+    ("Taxe phytosanitaire", 'phytosanitary_tax'),
+    ("Frais TEL", 'tel_fee'),
+)
+SHIPMENT = (
+    ("Valeur déclarée", 'declared_value'),
+    ("Coût de transport", 'transport_cost'),
+    ("Coût de manutention", 'handling_cost'),
+)
+
+
+def format_amount(value):
+    """
+    Montant au format français : 1 234 567,89 FCFA.
+    """
+    amount = f"{Decimal(value).quantize(Decimal('0.01')):,.2f}"
+    return amount.replace(',', ' ').replace('.', ',') + ' FCFA'
+
+
+def receipt_lines(simulation):
+    """
+    Contenu du reçu : liste de (style, texte de gauche, texte de droite).
+    Styles : 'title', 'heading', 'text', 'amount', 'total'.
+    """
+    product = simulation.product
+    simulated_at = timezone.localtime(simulation.simulated_at) if simulation.simulated_at else None
+    lines = [
+        ('title', f"Reçu de simulation SIMU #{simulation.pk}", ''),
+        ('text', "Date de la simulation", simulated_at.strftime('%d/%m/%Y %H:%M') if simulated_at else ''),
+        ('text', "Importateur", simulation.user.email),
+        ('text', "Code de paiement", simulation.payment_confirmation_code or ''),
+        ('text', "Barème appliqué", simulation.tariff_schedule.name if simulation.tariff_schedule_id else "Taux par défaut"),
+        ('heading', "Marchandise", ''),
+        ('text', "Produit", product.name),
+        ('text', "Code SH CEMAC", product.cemac_hs_code),
+        *(('amount', label, format_amount(getattr(simulation, field))) for label, field in SHIPMENT),
+        ('amount', "Poids", f"{simulation.weight_in_tons} t"),
+        ('text', "NIU", "Oui" if simulation.has_niu else "Non"),
+        ('heading', "Droits et taxes", ''),
+        *(('amount', label, format_amount(getattr(simulation, field))) for label, field in BREAKDOWN),
+        ('total', "Coût total à l'import", format_amount(simulation.total_customs_cost)),
+        ('text', '', ''),
+        ('text', "Montants indicatifs : ce reçu ne remplace pas la liquidation officielle des douanes.", ''),
+    ]
+    return lines
+
+
+def source_hash(lines):
+    """
+    Empreinte des données imprimées (sans rendre le PDF).
+    """
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update('\x1f'.join(line).encode('utf-8') + b'\x1e')
+    return digest.hexdigest()
+
+
+def _pdf_text(text):
+    """
+    Chaîne littérale PDF en WinAnsiEncoding (accents français).
+    """
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def render_pdf(lines):
+    """
+    Rend le reçu en un PDF A4 d'une page. Sortie déterministe (ni date de
+    création ni identifiant aléatoire) : l'adressage par contenu est stable.
+    """
+    # Courier : 600/1000 em par caractère, ce qui permet d'aligner les montants à droite
+    right_edge, size = 540, 10
+    commands = [b'BT']
+    y = 790
+    for style, left, right in lines:
+        if style == 'title':
+            y -= 10
+            commands.append(b'/F2 16 Tf 1 0 0 1 56 %d Tm %s Tj' % (y, _pdf_text(left)))
+            y -= 30
+            continue
+        if style == 'heading':
+            y -= 12
+            commands.append(b'/F2 12 Tf 1 0 0 1 56 %d Tm %s Tj' % (y, _pdf_text(left)))
+            y -= 20
+            continue
+        font = b'/F2' if style == 'total' else b'/F1'
+        if style == 'total':
+            y -= 6
+        commands.append(b'%s %d Tf 1 0 0 1 56 %d Tm %s Tj' % (font, size, y, _pdf_text(left)))
+        if right:
+            if style in ('amount', 'total'):
+                x = right_edge - len(right) * size * 0.6
+                commands.append(b'/F3 %d Tf 1 0 0 1 %.2f %d Tm %s Tj' % (size, x, y, _pdf_text(right)))
+            else:
+                commands.append(b'/F1 %d Tf 1 0 0 1 260 %d Tm %s Tj' % (size, y, _pdf_text(right)))
+        y -= 16
+    commands.append(b'ET')
+    stream = zlib.compress(b'\n'.join(commands), 9)
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 7 0 R '
+        b'/Resources << /Font << /F1 4 0 R /F2 5 0 R /F3 6 0 R >> >> >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Title %s /Producer (SIMU) >>' % _pdf_text(lines[0][1]),
+    ]
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        len(objects) + 1, len(objects), xref
+    )
+    return bytes(output)
+
+
+def receipt_path(sha256):
+    return Path(settings.MEDIA_ROOT) / RECEIPTS_DIR / f'{sha256}.pdf'
+
+
+def _store(content, sha256):
+    """
+    Écrit le PDF sous son empreinte, de façon atomique (fichier temporaire puis
+    renommage) : un téléchargement concurrent ne lit jamais un fichier partiel.
+    """
+    path = receipt_path(sha256)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(content)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+
+def get_receipt(simulation):
+    """
+    Retourne le Receipt à jour de `simulation` (payée), en rendant le PDF
+    seulement s'il n'existe pas encore ou si les données imprimées ont changé.
+    """
+    lines = receipt_lines(simulation)
+    fingerprint = source_hash(lines)
+    receipt = getattr(simulation, 'receipt', None)
+    if receipt is not None and receipt.source_hash == fingerprint and receipt_path(receipt.sha256).exists():
+        return receipt
+
+    content = render_pdf(lines)
+    sha256 = hashlib.sha256(content).hexdigest()
+    _store(content, sha256)
+    receipt, _ = Receipt.objects.update_or_create(
+        simulation=simulation, defaults={'source_hash': fingerprint, 'sha256': sha256, 'size': len(content)}
+    )
+    return receipt
@@ -0,0 +1,133 @@
+# api/search.py
+
+"""
+Recherche plein texte des produits, insensible aux accents.
+
+Sous SQLite, les noms de produit et de catégorie sont indexés dans la table
+virtuelle FTS5 `api_product_search` (migration 0006), dont le tokenizer
+unicode61 retire les diacritiques : « feves » trouve « Fèves de cacao ». Chaque
+mot saisi est cherché comme préfixe (« tole » trouve « Tôles »), ce qui couvre
+les pluriels et flexions usuels du français, et les résultats sont classés par
+bm25, un mot trouvé dans le nom comptant plus que dans la catégorie.
+
+La table est tenue à jour par les signaux de api/signals.py, dans la même
+transaction que la modification du produit. Sur les autres bases, la recherche
+retombe sur une comparaison en Python des textes sans accents.
+"""
+
+import re
+import unicodedata
+
+from django.apps import apps
+from django.db import connection
+
+SEARCH_TABLE = 'api_product_search'
+
+# Poids bm25 des colonnes (name, category_name)
+NAME_WEIGHT = 10.0
+CATEGORY_WEIGHT = 1.0
+
+_WORD = re.compile(r'\w+')
+
+
+def unaccent(text):
+    """
+    Retourne `text` en minuscules, sans diacritiques ('Tôles' -> 'toles').
+    """
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(character for character in decomposed if not unicodedata.combining(character))
+
+
+def search_terms(text):
+    """
+    Découpe la saisie en mots sans accents.
+    """
+    return _WORD.findall(unaccent(text))
+
+
+_fts_databases = set()
+
+
+def fts_available():
+    """
+    Indique si l'index FTS5 est utilisable sur la base courante.
+    Seule une réponse positive est mémorisée, par base : la table peut être créée
+    par une migration après le démarrage du processus.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    database = connection.settings_dict['NAME']
+    if database not in _fts_databases:
+        if SEARCH_TABLE not in connection.introspection.table_names():
+            return False
+        _fts_databases.add(database)
+    return True
+
+
+def index_products(products):
+    """
+    (Ré)indexe les produits donnés (instances avec leur catégorie).
+    """
+    if not fts_available():
+        return
+    rows = [(product.pk, product.name, product.category.name if product.category_id else '') for product in products]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(f'INSERT INTO {SEARCH_TABLE} (rowid, name, category_name) VALUES (%s, %s, %s)', rows)
+
+
+def unindex_product(pk):
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [pk])
+
+
+def search_products(text, limit=20):
+    """
+    Retourne au plus `limit` produits correspondant à tous les mots de `text`,
+    du plus pertinent au moins pertinent.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return []
+    if fts_available():
+        ids = _search_fts(terms, limit)
+    else:
+        ids = _search_python(terms, limit)
+
+    Product = apps.get_model('api', 'Product')
+    products = Product.objects.select_related('category').in_bulk(ids)
+    return [products[pk] for pk in ids if pk in products]
+
+
+def _search_fts(terms, limit):
+    # Chaque mot entre guillemets (pas d'opérateur FTS5 injecté), en préfixe
+    query = ' '.join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+            f'ORDER BY bm25({SEARCH_TABLE}, %s, %s) LIMIT %s',
+            [query, NAME_WEIGHT, CATEGORY_WEIGHT, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _search_python(terms, limit):
+    Product = apps.get_model('api', 'Product')
+    scored = []
+    for pk, name, category_name in Product.objects.values_list('id', 'name', 'category__name').iterator():
+        name_words = search_terms(name)
+        category_words = search_terms(category_name or '')
+        score = 0
+        for term in terms:
+            if any(word.startswith(term) for word in name_words):
+                score += NAME_WEIGHT
+            elif any(word.startswith(term) for word in category_words):
+                score += CATEGORY_WEIGHT
+            else:
+                break
+        else:
+            scored.append((-score, len(name), pk))
+    return [pk for _, _, pk in sorted(scored)[:limit]]
@@ -1,7 +1,9 @@
 # core/serializers.py
+from decimal import Decimal
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import ProductCategory, Product, Simulation,  TariffSpecies
+from .calculations import RESULT_FIELDS
 
 User = get_user_model()
 
@@ -99,7 +101,7 @@ class SimulationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Simulation
         fields = (
-            'product', 'declared_value', 'transport_cost', 'handling_cost',
+            'id', 'product', 'declared_value', 'transport_cost', 'handling_cost',
             'weight_in_tons', 'has_niu'
         )
         extra_kwargs = {
@@ -115,20 +117,36 @@ class SimulationCreateSerializer(serializers.ModelSerializer):
         """
         if data['declared_value'] < 0:
             raise serializers.ValidationError({"declared_value": "La valeur déclarée ne peut pas être négative."})
-        if data['transport_cost'] < 0:
+        if data.get('transport_cost', 0) < 0:
             raise serializers.ValidationError({"transport_cost": "Le coût de transport ne peut pas être négatif."})
-        if data['handling_cost'] < 0:
+        if data.get('handling_cost', 0) < 0:
             raise serializers.ValidationError({"handling_cost": "Le coût de manutention ne peut pas être négatif."})
-        if data['weight_in_tons'] < 0:
+        if data.get('weight_in_tons', 0) < 0:
             raise serializers.ValidationError({"weight_in_tons": "Le poids ne peut pas être négatif."})
 
-        # S'assurer que le produit existe
-        product_id = data.get('product')
-        if not product_id or not Product.objects.filter(id=product_id.id).exists():
+        # Le champ 'product' (PrimaryKeyRelatedField) a déjà chargé le produit :
+        # une clé inexistante est rejetée à ce stade, sans requête supplémentaire.
+        if not data.get('product'):
             raise serializers.ValidationError({"product": "Le produit spécifié n'existe pas."})
 
         return data
 
+class SimulationQuoteSerializer(serializers.ModelSerializer):
+    """
+    Serializer pour un devis instantané : entrées et détail du calcul d'une
+    simulation non enregistrée (pas d'id, pas d'informations de paiement).
+    """
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    product_hs_code = serializers.CharField(source='product.cemac_hs_code', read_only=True)
+
+    class Meta:
+        model = Simulation
+        fields = (
+            'product', 'product_name', 'product_hs_code', 'declared_value',
+            'transport_cost', 'handling_cost', 'weight_in_tons', 'has_niu',
+        ) + RESULT_FIELDS + ('tariff_schedule',)
+        read_only_fields = fields
+
 class SimulationDetailSerializer(serializers.ModelSerializer):
     """
     Serializer pour afficher les détails complets d'une simulation, y compris les résultats.
@@ -146,10 +164,43 @@ class SimulationDetailSerializer(serializers.ModelSerializer):
             'excise_duty_da', 'vat_tva', 'communal_additional_cac',
             'it_royalty_ri', 'community_integration_tci', 'integration_contribution_cia',
             'ohada_levy_pro', 'purchase_prepayment_prd', 'guce_facilitation_fee',
-            'phytosanitary_tax', 'tel_fee', 'total_customs_cost',
+            'phytosanitary_tax', 'tel_fee', 'total_customs_cost', 'tariff_schedule',
             'product_name', 'product_hs_code', 'user_email'
         )
 
+class SimulationBatchItemSerializer(serializers.Serializer):
+    """
+    Serializer pour un envoi d'une demande de calcul en lot.
+    Le produit est passé par son id : les produits sont chargés en une seule
+    requête par SimulationBatchSerializer.
+    """
+    product = serializers.IntegerField(min_value=1)
+    declared_value = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0)
+    transport_cost = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, default=Decimal(0))
+    handling_cost = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0, default=Decimal(0))
+    weight_in_tons = serializers.DecimalField(max_digits=10, decimal_places=3, min_value=0, default=Decimal(0))
+    has_niu = serializers.BooleanField(default=True)
+
+class SimulationBatchSerializer(serializers.Serializer):
+    """
+    Serializer pour le calcul en lot des coûts douaniers (sans enregistrement).
+    """
+    MAX_SHIPMENTS = 5000
+
+    shipments = SimulationBatchItemSerializer(many=True, allow_empty=False, max_length=MAX_SHIPMENTS)
+
+    def validate(self, data):
+        """
+        Charge tous les produits référencés en une requête et vérifie qu'ils existent.
+        """
+        product_ids = {shipment['product'] for shipment in data['shipments']}
+        products = Product.objects.in_bulk(product_ids)
+        missing = sorted(product_ids - products.keys())
+        if missing:
+            raise serializers.ValidationError({"shipments": f"Produits inexistants : {missing}"})
+        data['products'] = products
+        return data
+
 # Serializer pour la confirmation de paiement
 class PaymentConfirmationSerializer(serializers.Serializer):
     """
@@ -163,4 +214,14 @@ class PaymentConfirmationSerializer(serializers.Serializer):
         """
         if Simulation.objects.filter(payment_confirmation_code=value).exists():
             raise serializers.ValidationError("Ce code de confirmation a déjà été utilisé.")
-        return value
\ No newline at end of file
+        return value
+
+class PaymentNotificationSerializer(serializers.Serializer):
+    """
+    Corps d'une notification de paiement reçue par le webhook (voir api/payments.py).
+    Aucune requête en base : la référence est rapprochée plus tard, par lots.
+    """
+    event_id = serializers.CharField(max_length=100)
+    reference = serializers.CharField(max_length=50)
+    status = serializers.ChoiceField(choices=['SUCCESSFUL', 'FAILED'])
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=False, allow_null=True)
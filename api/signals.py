@@ -0,0 +1,71 @@
+# api/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_revision
+from .models import Product, ProductCategory, TariffSchedule
+from .search import index_products, unindex_product
+from .tariffs import invalidate_rate_table
+
+
+@receiver(post_save, sender=TariffSchedule)
+@receiver(post_delete, sender=TariffSchedule)
+def tariff_schedule_changed(sender, **kwargs):
+    """
+    Invalide la table des taux compilée lorsqu'un barème est modifié ou supprimé,
+    dans ce processus et, par la révision partagée, dans les autres workers.
+    L'invalidation est répétée après le commit, pour qu'un calcul fait entre-temps
+    ne laisse pas en cache une table lue avant la validation de la transaction.
+    """
+    invalidate_rate_table()
+    transaction.on_commit(invalidate_rate_table)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+def catalog_changed(sender, **kwargs):
+    """
+    Passe à une nouvelle révision du catalogue, avant et après le commit pour la
+    même raison que ci-dessus : un instantané construit pendant la transaction
+    serait rangé sous la révision intermédiaire.
+    """
+    bump_catalog_revision()
+    transaction.on_commit(bump_catalog_revision)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, raw=False, **kwargs):
+    """
+    Réindexe le produit pour la recherche plein texte.
+    """
+    if not raw:
+        index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    unindex_product(instance.pk)
+
+
+@receiver(post_save, sender=ProductCategory)
+def category_saved(sender, instance, raw=False, **kwargs):
+    """
+    Réindexe les produits de la catégorie, dont le nom est indexé avec eux.
+    """
+    if not raw:
+        index_products(instance.products.select_related('category'))
+
+
+@receiver(pre_delete, sender=ProductCategory)
+def category_deleting(sender, instance, **kwargs):
+    # Les produits passent sans catégorie (SET_NULL) : on les réindexe après la suppression
+    instance._product_ids = list(instance.products.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=ProductCategory)
+def category_deleted(sender, instance, **kwargs):
+    index_products(Product.objects.filter(pk__in=getattr(instance, '_product_ids', [])).select_related('category'))
@@ -0,0 +1,213 @@
+# api/tariffs.py
+
+"""
+Tables des taux en mémoire.
+
+Chaque version du barème (modèle TariffSchedule) est compilée une seule fois par
+processus en une RateTable immuable, dont les taux sont des Decimal exacts. Les
+versions sont rangées dans un TariffIndex trié par date d'effet : retrouver le
+barème applicable à une date est une recherche dichotomique, sans requête.
+
+L'index compilé est propre au processus ; il est associé à une révision des
+barèmes gardée dans le cache Django, comme la révision du catalogue (voir
+api/catalog.py). Les signaux de api/signals.py incrémentent cette révision dès
+qu'un administrateur modifie un barème : chaque processus (worker) constate le
+changement au plus REVISION_CHECK_INTERVAL secondes plus tard et recompile son
+index. Avec plusieurs workers, le cache doit être partagé (CACHE_URL).
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from datetime import date, timedelta
+from decimal import Decimal
+from types import MappingProxyType
+
+from django.apps import apps
+from django.core.cache import cache
+from django.utils import timezone
+
+
+@dataclass(frozen=True, eq=False)
+class RateTable:
+    """
+    Taux compilés d'un barème. Immuable : une modification de barème produit une
+    nouvelle table au lieu de modifier celle-ci.
+    """
+    schedule_id: int
+    dd_rates: MappingProxyType
+    excise_luxury_rate: Decimal
+    excise_alcohol_tobacco_rate: Decimal
+    excise_vehicle_rate: Decimal
+    vat_rate: Decimal
+    cac_rate: Decimal
+    ri_rate: Decimal
+    tci_rate: Decimal
+    cia_rate: Decimal
+    pro_rate: Decimal
+    prd_rate_with_niu: Decimal
+    prd_rate_without_niu: Decimal
+    phytosanitary_rate_per_ton: Decimal
+    guce_facilitation_fee: Decimal
+    tel_fee: Decimal
+
+    def __reduce__(self):
+        # MappingProxyType n'est pas sérialisable (pickle) : la table est transmise
+        # avec une copie simple de dd_rates, par exemple aux processus de calcul.
+        values = {field.name: getattr(self, field.name) for field in fields(self)}
+        values['dd_rates'] = dict(self.dd_rates)
+        return (_rebuild_rate_table, (values,))
+
+
+def _rebuild_rate_table(values):
+    return RateTable(**{**values, 'dd_rates': MappingProxyType(values['dd_rates'])})
+
+
+class TariffIndex:
+    """
+    Index d'intervalles des versions du barème, trié par date d'effet.
+
+    Une version s'applique de son effective_from jusqu'à son effective_to inclus
+    ou, à défaut, jusqu'à la veille de la version suivante. Hors de tout
+    intervalle, les taux par défaut du modèle s'appliquent.
+
+    Les périodes sont découpées à la compilation en segments disjoints. Si deux
+    versions se chevauchent malgré TariffSchedule.clean() (création hors de
+    l'administration), la plus récente s'applique sur sa période, puis la
+    version qui l'englobe reprend.
+    """
+
+    def __init__(self, schedules, default):
+        schedules = sorted(schedules, key=lambda schedule: schedule.effective_from)
+        periods = []
+        for position, schedule in enumerate(schedules):
+            end = schedule.effective_to
+            if end is None and position + 1 < len(schedules):
+                end = schedules[position + 1].effective_from - timedelta(days=1)
+            periods.append((schedule.effective_from, end, schedule.compile()))
+
+        boundaries = {start for start, _, _ in periods}
+        boundaries.update(end + timedelta(days=1) for _, end, _ in periods if end is not None and end < date.max)
+        self._starts, self._tables = [], []
+        for boundary in sorted(boundaries):
+            table = default
+            for start, end, candidate in periods:
+                # Périodes triées par début : la dernière qui couvre la date est la plus récente
+                if start <= boundary and (end is None or boundary <= end):
+                    table = candidate
+            if not self._tables or self._tables[-1] is not table:
+                self._starts.append(boundary)
+                self._tables.append(table)
+        self._count = len(periods)
+        self._default = default
+
+    def __len__(self):
+        return self._count
+
+    def resolve(self, day):
+        """
+        Retourne la RateTable applicable à la date `day`, en O(log n).
+        """
+        position = bisect_right(self._starts, day) - 1
+        return self._tables[position] if position >= 0 else self._default
+
+
+REVISION_KEY = 'tariffs:revision'
+# Délai maximal avant qu'un processus ne voie la modification d'un barème faite dans un autre
+REVISION_CHECK_INTERVAL = 1.0
+# Révision d'un index imposé par override_rate_table : jamais recompilé
+_PINNED = object()
+
+_lock = threading.Lock()
+_tariff_index = None
+_revision = None
+_checked_at = 0.0
+
+
+def get_tariff_revision():
+    """
+    Retourne la révision partagée des barèmes.
+    """
+    # Initialisée à partir de l'horloge, comme celle du catalogue
+    return cache.get_or_set(REVISION_KEY, time.time_ns, timeout=None)
+
+
+def bump_tariff_revision():
+    """
+    Passe à la révision suivante : tous les processus recompileront leur index.
+    """
+    try:
+        cache.incr(REVISION_KEY)
+    except ValueError:
+        # Clé absente (cache vidé) : la prochaine lecture la réinitialise
+        pass
+
+
+def get_tariff_index():
+    """
+    Retourne l'index des versions du barème, recompilé si la révision partagée a
+    changé. La révision n'est relue qu'une fois par REVISION_CHECK_INTERVAL : le
+    calcul en lot reste sans accès au cache.
+    """
+    global _tariff_index, _revision, _checked_at
+    tariff_index = _tariff_index
+    now = time.monotonic()
+    if tariff_index is not None and (_revision is _PINNED or now - _checked_at < REVISION_CHECK_INTERVAL):
+        return tariff_index
+
+    revision = get_tariff_revision()
+    with _lock:
+        if _revision is not _PINNED and (_tariff_index is None or _revision != revision):
+            _tariff_index = _load_tariff_index()
+            _revision = revision
+        _checked_at = now
+        return _tariff_index
+
+
+def get_rate_table(at=None):
+    """
+    Retourne la table des taux applicable à l'instant `at` (maintenant par défaut).
+    """
+    return get_tariff_index().resolve(timezone.localdate(at or timezone.now()))
+
+
+def invalidate_rate_table():
+    """
+    Oublie l'index compilé de ce processus et passe à une nouvelle révision, pour
+    que les autres processus oublient aussi le leur.
+    """
+    global _tariff_index, _revision
+    bump_tariff_revision()
+    with _lock:
+        _tariff_index = _revision = None
+
+
+@contextmanager
+def override_rate_table(rate_table):
+    """
+    Applique `rate_table` à toutes les dates le temps du bloc, sans lire la base
+    (vérifications et benchmarks sur des taux fixés). L'index précédent est
+    ensuite rétabli, sauf si un barème a été modifié entre-temps.
+    """
+    global _tariff_index, _revision
+    override = TariffIndex([], default=rate_table)
+    with _lock:
+        previous = (_tariff_index, _revision)
+        _tariff_index, _revision = override, _PINNED
+    try:
+        yield rate_table
+    finally:
+        with _lock:
+            # L'index rétabli est revalidé contre la révision partagée au prochain calcul
+            _tariff_index, _revision = previous if _tariff_index is override else (None, None)
+
+
+def _load_tariff_index():
+    """
+    Compile toutes les versions du barème en une seule requête.
+    Les taux par défaut du modèle servent hors de toute période d'effet.
+    """
+    TariffSchedule = apps.get_model('api', 'TariffSchedule')
+    return TariffIndex(TariffSchedule.objects.all(), default=TariffSchedule().compile())
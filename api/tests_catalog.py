@@ -0,0 +1,174 @@
+# api/tests_catalog.py
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .hs_codes import CategoryIndex
+from .models import ProductCategory, Product, TariffSpecies
+from .tests_queries import QueryBudgetMixin
+
+
+class CatalogSnapshotTests(QueryBudgetMixin, APITestCase):
+    """
+    Tests pour les listes du catalogue servies depuis le cache, avec ETag.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.categories = [
+            ProductCategory.objects.create(name=f'Catégorie {index}', cemac_hs_code_prefix=f'{10 + index}')
+            for index in range(3)
+        ]
+        self.create_products(5)
+
+    def create_products(self, count):
+        start = Product.objects.count()
+        for index in range(start, start + count):
+            Product.objects.create(
+                name=f'Produit {index}', category=self.categories[index % len(self.categories)],
+                tariff_species=TariffSpecies.CONSUMPTION_GOODS, cemac_hs_code=f'{10 + index % 3}01.{index:02d}.00.00'
+            )
+
+    def test_product_list_budget(self):
+        self.assertQueryBudget('product-list', grow=lambda: self.create_products(20))
+
+    def test_category_list_budget(self):
+        self.assertQueryBudget('productcategory-list')
+
+    def test_not_modified_without_queries(self):
+        """
+        S'assure qu'un If-None-Match à jour reçoit un 304 sans requête SQL.
+        """
+        url = reverse('product-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0]['category_name'], 'Catégorie 0')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_catalog_change_invalidates_snapshot(self):
+        """
+        S'assure qu'une modification de produit ou de catégorie change l'ETag et le contenu servi.
+        """
+        url = reverse('product-list')
+        etag = self.client.get(url)['ETag']
+
+        category = self.categories[0]
+        category.name = 'Catégorie renommée'
+        category.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Catégorie renommée', [item['category_name'] for item in response.data])
+
+        Product.objects.get(name='Produit 0').delete()
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 4)
+
+
+class HsCodeLookupTests(APITestCase):
+    """
+    Tests pour l'autocomplétion des produits par code SH.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = ProductCategory.objects.create(name='Chaussures', cemac_hs_code_prefix='64')
+        for name, code in [
+            ('Bottes', '6403.91.00.00'), ('Chaussures de sport', '6403.99.00.00'),
+            ('Sandales', '6402.20.00.00'), ('Cacao', '1801.00.00.00'),
+        ]:
+            Product.objects.create(name=name, category=category, cemac_hs_code=code)
+        self.url = reverse('product-lookup')
+
+    def test_prefix_lookup(self):
+        """
+        S'assure que seuls les codes du préfixe sont retournés, triés, quel que soit le format saisi.
+        """
+        response = self.client.get(self.url, {'hs': '64.03'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in response.data], ['Bottes', 'Chaussures de sport'])
+        self.assertEqual(response.data[0]['category_name'], 'Chaussures')
+
+        response = self.client.get(self.url, {'hs': '64', 'limit': 2})
+        self.assertEqual([item['cemac_hs_code'] for item in response.data], ['6402.20.00.00', '6403.91.00.00'])
+
+        self.assertEqual(self.client.get(self.url, {'hs': '9999'}).data, [])
+
+    def test_lookup_uses_index_and_follows_catalog_changes(self):
+        """
+        S'assure que l'index est servi sans requête SQL, puis reconstruit après une modification du catalogue.
+        """
+        self.client.get(self.url, {'hs': '64'})
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {'hs': '6403'})
+
+        Product.objects.get(name='Cacao').delete()
+        Product.objects.create(name='Pantoufles', cemac_hs_code='6405.90.00.00')
+        response = self.client.get(self.url, {'hs': '6405'})
+        self.assertEqual([item['name'] for item in response.data], ['Pantoufles'])
+        self.assertEqual(self.client.get(self.url, {'hs': '18'}).data, [])
+
+    def test_invalid_prefix(self):
+        self.assertEqual(self.client.get(self.url, {'hs': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CategoryRangeTests(TestCase):
+    """
+    Tests pour le classement automatique des produits d'après les plages SH des catégories.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.categories = {
+            prefix: ProductCategory.objects.create(name=name, cemac_hs_code_prefix=prefix)
+            for name, prefix in [
+                ('Alimentaire', '01-24'), ('Animaux vivants', '01'), ('Surgelés', '02-04'),
+                ('Boissons et tabacs', '22-24'), ('Biens intermédiaires', '50-84'), ('Chaussures', '64'),
+            ]
+        }
+
+    def test_most_specific_category(self):
+        index = CategoryIndex((category.pk, prefix) for prefix, category in self.categories.items())
+        for code, prefix in [
+            ('0105.11.00.00', '01'), ('0303.22.00.00', '02-04'), ('1801.00.00.00', '01-24'),
+            ('2203.00.00.00', '22-24'), ('2402.20.00.00', '22-24'), ('6403.99.00.00', '64'),
+            ('8418.21.00.00', '50-84'),
+        ]:
+            self.assertEqual(index.resolve(code), self.categories[prefix].pk, code)
+        self.assertIsNone(index.resolve('9403.10.00.00'))
+        self.assertIsNone(index.resolve('2501.00.00.00'))
+
+    def test_product_without_category_is_classified(self):
+        product = Product.objects.create(name='Bière', cemac_hs_code='2203.00.00.00')
+        self.assertEqual(product.category, self.categories['22-24'])
+
+        # Une catégorie explicite (classement fiscal) est conservée
+        product = Product.objects.create(name='Sardines', cemac_hs_code='1604.13.00.00', category=self.categories['02-04'])
+        self.assertEqual(product.category, self.categories['02-04'])
+
+        # Une nouvelle catégorie plus précise est prise en compte
+        shoes_parts = ProductCategory.objects.create(name='Parties de chaussures', cemac_hs_code_prefix='6406')
+        self.assertEqual(Product.objects.create(name='Semelles', cemac_hs_code='6406.20.00.00').category, shoes_parts)
+
+    def test_category_range_validation(self):
+        """
+        S'assure que les plages mal formées ou chevauchantes sont refusées, les plages imbriquées acceptées.
+        """
+        for prefix in ('61-62', '0402', '25, 30-31'):
+            ProductCategory(name=f'Valide {prefix}', cemac_hs_code_prefix=prefix).clean()
+        for prefix in ('abc', '24-01', '6-62', '20-30', '64'):
+            with self.assertRaises(ValidationError, msg=prefix):
+                ProductCategory(name=f'Invalide {prefix}', cemac_hs_code_prefix=prefix).clean()
+        # Une catégorie ne se chevauche pas elle-même
+        self.categories['64'].clean()
@@ -0,0 +1,271 @@
+# api/tests_commands.py
+
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import LiveServerTestCase, TestCase
+from django.utils import timezone
+
+from .calculations import RESULT_FIELDS
+from .hs_codes import get_hs_code_index
+from .management.commands.load_test import percentile, summarize
+from .models import ProductCategory, Product, Simulation, TariffSchedule, TariffSpecies
+from .search import search_products
+from .tariffs import invalidate_rate_table
+
+User = get_user_model()
+
+
+class RecomputeSimulationsTests(TestCase):
+    """
+    Tests pour la commande recompute_simulations.
+    """
+    def setUp(self):
+        invalidate_rate_table()
+        self.addCleanup(invalidate_rate_table)
+        self.user = User.objects.create_user(email='recompute@example.com', username='recompute', password='recomputepassword')
+        self.category = ProductCategory.objects.create(name='Chaussures', cemac_hs_code_prefix='64')
+        self.other_category = ProductCategory.objects.create(name='Véhicules', cemac_hs_code_prefix='87')
+        self.shoes = Product.objects.create(
+            name='Chaussures de sport', category=self.category,
+            tariff_species=TariffSpecies.CONSUMPTION_GOODS, cemac_hs_code='6403.99.00.00'
+        )
+        self.car = Product.objects.create(
+            name='Berline', category=self.other_category, tariff_species=TariffSpecies.CONSUMPTION_GOODS,
+            cemac_hs_code='8703.23.00.00', is_vehicle=True
+        )
+        self.simulations = [
+            Simulation.objects.create(user=self.user, product=product, declared_value=Decimal(value), weight_in_tons=Decimal('1.5'))
+            for product, value in [(self.shoes, '1000.00'), (self.car, '25000.00'), (self.shoes, '333.33')]
+        ]
+        # Nouvelle loi de finances : la TVA passe à 19,25% à partir d'aujourd'hui
+        self.schedule = TariffSchedule.objects.create(
+            name='Loi de finances', effective_from=timezone.localdate(), vat_rate=Decimal('0.1925')
+        )
+
+    def expected(self, simulation):
+        """
+        Montants attendus, calculés par le calcul unitaire avec le barème courant.
+        """
+        reference = Simulation.objects.get(pk=simulation.pk)
+        reference.calculate_customs_cost()
+        return {field: Decimal(getattr(reference, field)).quantize(Decimal('0.01')) for field in RESULT_FIELDS}
+
+    def stored(self, simulation):
+        simulation.refresh_from_db()
+        return {field: getattr(simulation, field) for field in RESULT_FIELDS}
+
+    def test_dry_run_reports_without_writing(self):
+        """
+        S'assure que --dry-run affiche les différences sans rien enregistrer.
+        """
+        before = [self.stored(simulation) for simulation in self.simulations]
+        out = StringIO()
+        call_command('recompute_simulations', dry_run=True, stdout=out)
+
+        self.assertEqual([self.stored(simulation) for simulation in self.simulations], before)
+        output = out.getvalue()
+        self.assertIn('3 simulation(s) parcourue(s), 3 à modifier', output)
+        self.assertIn(f"Simulation #{self.simulations[0].pk} : ", output)
+        self.assertIn('vat_tva', output)
+
+    def test_recompute_updates_results_and_schedule(self):
+        """
+        S'assure que les montants et le barème appliqué sont réécrits, en une passe.
+        """
+        out = StringIO()
+        call_command('recompute_simulations', chunk_size=2, stdout=out)
+
+        for simulation in self.simulations:
+            self.assertEqual(self.stored(simulation), self.expected(simulation))
+            self.assertEqual(simulation.tariff_schedule_id, self.schedule.id)
+        self.assertIn('3 modifiées', out.getvalue())
+
+        # Un second passage ne trouve plus rien à modifier
+        out = StringIO()
+        call_command('recompute_simulations', stdout=out)
+        self.assertIn('0 modifiées', out.getvalue())
+
+    def test_recompute_filters(self):
+        """
+        S'assure que les filtres par produit, catégorie et date limitent les simulations recalculées.
+        """
+        out = StringIO()
+        call_command('recompute_simulations', products=[self.car.id], stdout=out)
+        self.assertIn('1 simulation(s) parcourue(s)', out.getvalue())
+
+        out = StringIO()
+        call_command('recompute_simulations', categories=[self.category.id], stdout=out)
+        self.assertIn('2 simulation(s) parcourue(s)', out.getvalue())
+
+        out = StringIO()
+        call_command('recompute_simulations', date_to=date(2000, 1, 1), stdout=out)
+        self.assertIn('0 simulation(s) parcourue(s)', out.getvalue())
+
+    def test_recompute_with_process_pool(self):
+        """
+        S'assure que le calcul réparti sur plusieurs processus donne les mêmes montants.
+        """
+        call_command('recompute_simulations', workers=2, chunk_size=1, stdout=StringIO())
+        for simulation in self.simulations:
+            self.assertEqual(self.stored(simulation), self.expected(simulation))
+
+
+class ImportTariffNomenclatureTests(TestCase):
+    """
+    Tests pour la commande import_tariff_nomenclature.
+    """
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.food = ProductCategory.objects.create(name='Alimentaire', cemac_hs_code_prefix='01-24')
+        self.drinks = ProductCategory.objects.create(name='Boissons', cemac_hs_code_prefix='22-24')
+        self.luxury = ProductCategory.objects.create(name='Luxe', cemac_hs_code_prefix='98')
+        self.existing = Product.objects.create(
+            name='Bière', cemac_hs_code='2203.00.00.00', tariff_species=TariffSpecies.CONSUMPTION_GOODS,
+            is_alcohol_tobacco=True
+        )
+        self.champagne = Product.objects.create(name='Champagne', cemac_hs_code='2204.10.00.00', category=self.luxury)
+
+    def write_csv(self, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', delete=False)
+        with handle:
+            handle.write(content)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def run_import(self, content, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_tariff_nomenclature', self.write_csv(content), stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_upserts_and_reports(self):
+        """
+        S'assure que les lignes sont insérées, mises à jour ou laissées telles quelles, et comptées.
+        """
+        out, err = self.run_import(
+            "cemac_hs_code;name;tariff_species;category;is_alcohol_tobacco\n"
+            "2203.00.00.00;Bière;BCC;;oui\n"            # inchangée
+            "2204100000;Champagne brut;BCC;;1\n"         # mise à jour, catégorie manuelle conservée
+            "1801.00.00.00;Fèves de cacao;mp;;\n"        # insérée, classée par code SH
+            "0402.10.00.00;Lait en poudre;VG1;Boissons;\n"  # insérée, catégorie explicite
+            "9999.99.99.99;Inconnu;XX;;\n"               # espèce tarifaire inconnue
+            "1801.00.00.00;Doublon;MP;;\n"               # code en double
+        )
+        self.assertIn('2 insérée(s), 1 mise(s) à jour, 1 inchangée(s), 2 en erreur.', out)
+        self.assertIn('Ligne 6 :', err)
+        self.assertIn('Ligne 7 :', err)
+
+        cocoa = Product.objects.get(cemac_hs_code='1801.00.00.00')
+        self.assertEqual((cocoa.name, cocoa.tariff_species, cocoa.category), ('Fèves de cacao', 'MP', self.food))
+        self.assertEqual(Product.objects.get(name='Lait en poudre').category, self.drinks)
+        self.champagne.refresh_from_db()
+        self.assertEqual((self.champagne.name, self.champagne.category, self.champagne.is_alcohol_tobacco), ('Champagne brut', self.luxury, True))
+
+        # Les produits importés sont visibles par la recherche et l'autocomplétion
+        self.assertEqual([product.name for product in search_products('feves')], ['Fèves de cacao'])
+        self.assertEqual([entry['name'] for entry in get_hs_code_index().lookup('1801')], ['Fèves de cacao'])
+
+    def test_name_conflict_and_dry_run(self):
+        """
+        S'assure qu'un nom déjà porté par un autre code est signalé et que --dry-run n'écrit rien.
+        """
+        out, err = self.run_import(
+            "cemac_hs_code,name\n"
+            "2202.10.00.00,Bière\n"
+            "2202.90.00.00,Jus de fruits\n",
+            dry_run=True
+        )
+        self.assertIn('1 insérée(s), 0 mise(s) à jour, 0 inchangée(s), 1 en erreur.', out)
+        self.assertIn('déjà utilisé par le code 2203.00.00.00', err)
+        self.assertFalse(Product.objects.filter(name='Jus de fruits').exists())
+
+
+class GenerateLoadDataTests(TestCase):
+    """
+    Tests pour la commande generate_load_data.
+    """
+    def setUp(self):
+        invalidate_rate_table()
+        self.addCleanup(invalidate_rate_table)
+        category = ProductCategory.objects.create(name='Divers', cemac_hs_code_prefix='01-97')
+        for index, species in enumerate(TariffSpecies.values):
+            Product.objects.create(
+                name=f'Produit {species}', category=category, tariff_species=species,
+                cemac_hs_code=f'{10 + index}01.00.00.00', is_phytosanitary=index % 2 == 0, is_luxury=index == 3
+            )
+
+    def test_generates_simulations_with_results(self):
+        """
+        S'assure que les simulations générées ont des dates historiques et les mêmes
+        résultats que le calcul unitaire.
+        """
+        # Un vrai compte portant un nom d'utilisateur généré ne reçoit pas de simulations
+        real = User.objects.create_user(email='importateur@example.com', username='load_1', password='realpassword')
+        call_command('generate_load_data', users=5, simulations=120, days=30, chunk_size=50, stdout=StringIO())
+
+        generated = User.objects.filter(email__endswith='@load-data.invalid')
+        self.assertEqual(generated.count(), 4)
+        self.assertFalse(real.simulations.exists())
+        simulations = Simulation.objects.filter(user__in=generated)
+        self.assertEqual(simulations.count(), 120)
+        oldest = simulations.order_by('simulated_at').first().simulated_at
+        self.assertLess(oldest, timezone.now() - timedelta(days=1))
+        self.assertGreater(oldest, timezone.now() - timedelta(days=31))
+        self.assertTrue(all(simulation.date_created == simulation.simulated_at for simulation in simulations.all()))
+        # Les champs du modèle ne sont pas modifiés
+        self.assertTrue(Simulation._meta.get_field('simulated_at').auto_now_add)
+
+        for simulation in simulations.order_by('?')[:10]:
+            stored = {field: getattr(simulation, field) for field in RESULT_FIELDS}
+            simulation.calculate_customs_cost()
+            self.assertEqual(stored, {field: Decimal(getattr(simulation, field)).quantize(Decimal('0.01')) for field in RESULT_FIELDS})
+
+        # Même graine, mêmes utilisateurs : une seconde exécution ajoute des simulations sans doublon d'utilisateur
+        call_command('generate_load_data', users=5, simulations=10, stdout=StringIO())
+        self.assertEqual(generated.count(), 4)
+        self.assertEqual(simulations.count(), 130)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    """
+    Tests pour la commande load_test, lancée contre le serveur de test.
+    """
+    def test_percentiles(self):
+        values = [index / 1000 for index in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        self.assertEqual(summarize(values, 2, 10)['p95_ms'], 95.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_scenario_report(self):
+        """
+        S'assure que le parcours complet s'exécute sans erreur et que le rapport couvre chaque endpoint.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        # Le vidage de la base entre tests transactionnels n'émet pas de signaux :
+        # l'index des barèmes peut encore référencer des versions supprimées
+        invalidate_rate_table()
+        User.objects.create_user(email='load@example.com', username='load', password='loadpassword')
+        Product.objects.create(name='Chaussures', cemac_hs_code='6403.99.00.00')
+
+        out = StringIO()
+        call_command(
+            'load_test', base_url=f'{self.live_server_url}/api', email='load@example.com', password='loadpassword',
+            concurrency=1, iterations=3, stdout=out
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['errors'], 0, report)
+        self.assertEqual(report['endpoints']['POST /simulations/']['count'], 3)
+        self.assertEqual(report['endpoints']['POST /simulations/{id}/confirm_payment/']['count'], 3)
+        # Le catalogue est revalidé par ETag après le premier chargement
+        self.assertEqual(report['endpoints']['GET /products/']['statuses'], {'200': 1, '304': 2})
+        self.assertEqual(Simulation.objects.filter(is_paid=True).count(), 3)
@@ -0,0 +1,155 @@
+# api/tests_history.py
+
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import ProductCategory, Product, Simulation, TariffSpecies
+
+User = get_user_model()
+
+
+class HistoryDataMixin:
+    """
+    Données communes : un utilisateur avec un historique de simulations datées.
+    """
+    def create_history(self, user, count, start=None):
+        """
+        Crée `count` simulations espacées d'une minute, la première étant la plus ancienne.
+        """
+        start = start or timezone.now() - timedelta(days=1)
+        simulations = []
+        for index in range(count):
+            simulation = Simulation.objects.create(user=user, product=self.product, declared_value=Decimal(100 + index))
+            # simulated_at est en auto_now_add : on fixe la date après création
+            Simulation.objects.filter(pk=simulation.pk).update(simulated_at=start + timedelta(minutes=index))
+            simulations.append(simulation)
+        return simulations
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='history@example.com', username='history', password='historypassword')
+        category = ProductCategory.objects.create(name='Vêtements', cemac_hs_code_prefix='61-62')
+        self.product = Product.objects.create(
+            name='T-shirts en coton', category=category,
+            tariff_species=TariffSpecies.CONSUMPTION_GOODS, cemac_hs_code='6109.10.00.00'
+        )
+        self.client.force_authenticate(user=self.user)
+
+
+class SimulationCursorPaginationTests(HistoryDataMixin, APITestCase):
+    """
+    Tests pour la pagination par curseur de l'historique des simulations.
+    """
+    def collect_ids(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_pages_follow_simulated_at_descending(self):
+        """
+        S'assure que les pages parcourent tout l'historique, du plus récent au plus ancien, sans doublon.
+        """
+        simulations = self.create_history(self.user, 7)
+        ids = self.collect_ids(reverse('simulation-historique-list') + '?page_size=3')
+        self.assertEqual(ids, [simulation.pk for simulation in reversed(simulations)])
+
+    def test_new_simulations_do_not_shift_pages(self):
+        """
+        S'assure qu'une simulation créée entre deux pages ne décale pas la suite de la pagination.
+        """
+        simulations = self.create_history(self.user, 4)
+        first_page = self.client.get(reverse('simulation-list') + '?page_size=2')
+        self.create_history(self.user, 1, start=timezone.now())
+
+        second_page = self.client.get(first_page.data['next'])
+        self.assertEqual(
+            [item['id'] for item in second_page.data['results']],
+            [simulations[1].pk, simulations[0].pk]
+        )
+
+    def test_page_size_is_capped(self):
+        """
+        S'assure que la taille de page demandée est plafonnée et qu'aucun total n'est calculé.
+        """
+        self.create_history(self.user, 3)
+        response = self.client.get(reverse('simulation-list') + '?page_size=100000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class SimulationExportTests(HistoryDataMixin, APITestCase):
+    """
+    Tests pour l'export en flux de l'historique des simulations.
+    """
+    def setUp(self):
+        super().setUp()
+        self.simulations = self.create_history(self.user, 3)
+        other = User.objects.create_user(email='other_export@example.com', username='other_export', password='otherpassword')
+        self.create_history(other, 2)
+        self.url = reverse('simulation-historique-export')
+
+    def test_csv_export(self):
+        """
+        S'assure que l'export CSV est diffusé en flux et ne contient que l'historique de l'utilisateur.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual([int(row['id']) for row in rows], [simulation.pk for simulation in reversed(self.simulations)])
+        self.assertEqual(rows[0]['user_email'], self.user.email)
+        self.assertEqual(rows[0]['product_hs_code'], '6109.10.00.00')
+        self.simulations[-1].refresh_from_db()
+        self.assertEqual(Decimal(rows[0]['total_customs_cost']), self.simulations[-1].total_customs_cost)
+
+    def test_csv_export_neutralizes_formulas(self):
+        """
+        S'assure que les cellules texte interprétables comme formules sont préfixées
+        d'une apostrophe dans le CSV, et seulement dans le CSV.
+        """
+        self.product.name = '=HYPERLINK("http://example.com";"Cliquez")'
+        self.product.save()
+
+        response = self.client.get(self.url)
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0]['product_name'], '\'=HYPERLINK("http://example.com";"Cliquez")')
+        self.assertEqual(rows[0]['product_hs_code'], '6109.10.00.00')
+
+        response = self.client.get(self.url, {'output': 'ndjson'})
+        record = json.loads(b''.join(response.streaming_content).decode('utf-8').splitlines()[0])
+        self.assertEqual(record['product_name'], self.product.name)
+
+    def test_ndjson_gzip_export(self):
+        """
+        S'assure que l'export NDJSON compressé se décompresse en une ligne JSON par simulation.
+        """
+        response = self.client.get(self.url, {'output': 'ndjson', 'gzip': '1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('simulations.ndjson.gz', response['Content-Disposition'])
+
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 3)
+        self.assertEqual(records[-1]['id'], self.simulations[0].pk)
+        self.assertEqual(records[-1]['declared_value'], '100.00')
+
+    def test_unknown_format(self):
+        response = self.client.get(self.url, {'output': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,134 @@
+# api/tests_idempotency.py
+
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .idempotency import IN_PROGRESS_LEASE
+from .models import EmailOutbox, IdempotencyRecord, ProductCategory, Product, Simulation, TariffSpecies
+
+User = get_user_model()
+
+
+class IdempotencyKeyTests(APITestCase):
+    """
+    Tests de l'en-tête Idempotency-Key sur la création et le paiement des simulations.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='idem@example.com', username='idem', password='idempassword')
+        category = ProductCategory.objects.create(name='Divers')
+        self.product = Product.objects.create(
+            name='Riz', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS, cemac_hs_code='1006.30.00.00'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('simulation-list')
+        self.data = {
+            'product': self.product.id, 'declared_value': '1000.00', 'transport_cost': '50.00',
+            'handling_cost': '20.00', 'weight_in_tons': '0', 'has_niu': True,
+        }
+
+    def post(self, url, data, key):
+        return self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_create_retry_replays_first_response(self):
+        first = self.post(self.url, self.data, 'cle-1')
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', first)
+
+        # Rejeu : une seule requête (lecture de la clé), ni validation ni INSERT
+        with self.assertNumQueries(1):
+            retry = self.post(self.url, self.data, 'cle-1')
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Simulation.objects.count(), 1)
+
+    def test_without_key_each_post_creates(self):
+        self.client.post(self.url, self.data, format='json')
+        self.client.post(self.url, self.data, format='json')
+        self.assertEqual(Simulation.objects.count(), 2)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_confirm_payment_retry_replayed(self):
+        simulation = Simulation.objects.create(user=self.user, product=self.product, declared_value=1000)
+        url = reverse('simulation-confirm-payment', args=[simulation.id])
+        first = self.post(url, {'payment_confirmation_code': 'PAY-IDEM-1'}, 'paiement-1')
+        retry = self.post(url, {'payment_confirmation_code': 'PAY-IDEM-1'}, 'paiement-1')
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.status_code, status.HTTP_200_OK)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(EmailOutbox.objects.filter(simulation=simulation).count(), 1)
+
+    def test_key_reused_for_other_request(self):
+        self.post(self.url, self.data, 'cle-2')
+        response = self.post(self.url, {**self.data, 'declared_value': '2000.00'}, 'cle-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Simulation.objects.count(), 1)
+
+    def test_validation_error_not_stored(self):
+        response = self.post(self.url, {**self.data, 'product': 999999}, 'cle-3')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        # La clé est libre : la requête corrigée est exécutée
+        self.assertEqual(self.post(self.url, self.data, 'cle-3').status_code, status.HTTP_201_CREATED)
+
+    def test_request_in_progress_conflict(self):
+        simulation = Simulation.objects.create(user=self.user, product=self.product, declared_value=1000)
+        url = reverse('simulation-confirm-payment', args=[simulation.id])
+        self.post(url, {'payment_confirmation_code': 'PAY-IDEM-2'}, 'paiement-2')
+        IdempotencyRecord.objects.update(status_code=None, response_body=None)
+        response = self.post(url, {'payment_confirmation_code': 'PAY-IDEM-2'}, 'paiement-2')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_abandoned_reservation_taken_over(self):
+        self.post(self.url, self.data, 'cle-6')
+        # Réservation d'un worker arrêté avant d'avoir enregistré sa réponse
+        IdempotencyRecord.objects.update(
+            status_code=None, response_body=None, created_at=timezone.now() - IN_PROGRESS_LEASE + timedelta(seconds=5)
+        )
+        self.assertEqual(self.post(self.url, self.data, 'cle-6').status_code, status.HTTP_409_CONFLICT)
+
+        IdempotencyRecord.objects.update(created_at=timezone.now() - IN_PROGRESS_LEASE - timedelta(seconds=1))
+        response = self.post(self.url, self.data, 'cle-6')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Simulation.objects.count(), 2)
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, status.HTTP_201_CREATED)
+        # La réponse de la reprise est rejouée ensuite
+        retry = self.post(self.url, self.data, 'cle-6')
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), response.json())
+
+    def test_keys_are_per_user(self):
+        self.post(self.url, self.data, 'cle-4')
+        other = User.objects.create_user(email='other@example.com', username='other', password='otherpassword')
+        self.client.force_authenticate(user=other)
+        response = self.post(self.url, self.data, 'cle-4')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Simulation.objects.count(), 2)
+
+    def test_expired_key_executes_again_and_is_purged(self):
+        self.post(self.url, self.data, 'cle-5')
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.post(self.url, self.data, 'cle-5')
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Simulation.objects.count(), 2)
+
+        IdempotencyRecord.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('purge_idempotency_keys', stdout=out)
+        self.assertIn('1 clé(s)', out.getvalue())
+        self.assertFalse(IdempotencyRecord.objects.exists())
+
+    def test_invalid_key(self):
+        response = self.post(self.url, self.data, 'x' * 256)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Simulation.objects.count(), 0)
@@ -0,0 +1,93 @@
+# api/tests_metrics.py
+
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from core.metrics import registry
+
+from .models import ProductCategory, Product, TariffSpecies
+
+User = get_user_model()
+
+
+def metric_value(text, name, **labels):
+    """
+    Valeur d'une série du format texte Prometheus, ou None si elle est absente.
+    """
+    wanted = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}\{{{re.escape(wanted)}\}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+@override_settings(METRICS_TOKEN='secret')
+class MetricsTests(APITestCase):
+    """
+    Tests du middleware de métriques et de l'endpoint /metrics.
+    """
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(email='metrics@example.com', username='metrics', password='metricspassword')
+        category = ProductCategory.objects.create(name='Divers')
+        Product.objects.create(
+            name='Riz', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS, cemac_hs_code='1006.30.00.00'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_requests_counted_per_view_and_status(self):
+        for _ in range(3):
+            self.client.get(reverse('product-list'))
+        self.client.get(reverse('simulation-detail', args=[999]))
+        text = self.scrape()
+
+        self.assertEqual(metric_value(text, 'http_requests_total', view='product-list', method='GET', status='200'), 3)
+        self.assertEqual(metric_value(text, 'http_requests_total', view='simulation-detail', method='GET', status='404'), 1)
+        self.assertEqual(metric_value(text, 'http_request_duration_seconds_count', view='product-list'), 3)
+        self.assertEqual(metric_value(text, 'http_request_duration_seconds_bucket', view='product-list', le='+Inf'), 3)
+        self.assertGreater(metric_value(text, 'http_request_duration_seconds_sum', view='product-list'), 0)
+
+    def test_histogram_buckets_are_cumulative(self):
+        self.client.get(reverse('product-list'))
+        text = self.scrape()
+        buckets = [
+            float(value) for value in
+            re.findall(r'^http_request_duration_seconds_bucket\{view="product-list",le="[^"]+"\} (\S+)$', text, re.MULTILINE)
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+        self.assertEqual(buckets[-1], 1)
+
+    def test_sql_queries_counted(self):
+        self.client.get(reverse('productcategory-list'))
+        self.client.get(reverse('product-search'), {'q': 'riz'})
+        text = self.scrape()
+        # Liste du catalogue : une requête au plus (instantané en cache)
+        self.assertLessEqual(metric_value(text, 'db_queries_total', view='productcategory-list'), 1)
+        self.assertGreaterEqual(metric_value(text, 'db_queries_total', view='product-search'), 1)
+        self.assertIsNotNone(metric_value(text, 'db_query_duration_seconds_total', view='product-search'))
+
+    def test_unmatched_urls_grouped(self):
+        self.client.get('/api/introuvable/1/')
+        self.client.get('/api/introuvable/2/')
+        text = self.scrape()
+        self.assertEqual(metric_value(text, 'http_requests_total', view='unmatched', method='GET', status='404'), 2)
+
+    def test_token_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer autre')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_without_token_only_open_in_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_404_NOT_FOUND)
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_200_OK)
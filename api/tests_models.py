@@ -0,0 +1,113 @@
+# api/tests_models.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .models import ProductCategory, Product, Simulation, TariffSpecies
+
+User = get_user_model()
+
+
+class SimulationDirtyFieldsTests(TestCase):
+    """
+    Tests pour le recalcul conditionnel de Simulation.save().
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='dirty@example.com', username='dirty', password='dirtypassword')
+        category = ProductCategory.objects.create(name='Cosmétiques', cemac_hs_code_prefix='33')
+        self.product = Product.objects.create(
+            name='Parfum', category=category, tariff_species=TariffSpecies.CONSUMPTION_GOODS,
+            cemac_hs_code='3303.00.00.00', is_luxury=True
+        )
+        self.other_product = Product.objects.create(
+            name='Savon', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS,
+            cemac_hs_code='3401.11.00.00'
+        )
+        created = Simulation.objects.create(user=self.user, product=self.product, declared_value=Decimal('1000.00'))
+        self.simulation = Simulation.objects.get(pk=created.pk)
+
+    def test_update_fields_on_bookkeeping_field_skips_calculation(self):
+        """
+        S'assure que save(update_fields=[...]) sur un champ de suivi n'écrit que ce champ,
+        sans lire le produit ni réécrire les résultats.
+        """
+        self.simulation.response_email_sent = True
+        self.simulation.total_customs_cost = Decimal('1.00')  # ne doit pas être écrit
+        with self.assertNumQueries(1):
+            self.simulation.save(update_fields=['response_email_sent'])
+
+        stored = Simulation.objects.get(pk=self.simulation.pk)
+        self.assertTrue(stored.response_email_sent)
+        self.assertNotEqual(stored.total_customs_cost, Decimal('1.00'))
+
+    def test_save_without_input_change_skips_calculation(self):
+        """
+        S'assure qu'un save() complet sans modification des entrées ne relit pas le produit.
+        """
+        self.simulation.is_paid = True
+        with self.assertNumQueries(1):
+            self.simulation.save()
+
+    def test_equivalent_value_is_not_a_change(self):
+        """
+        S'assure qu'une valeur équivalente (chaîne, autre nombre de décimales) n'est pas un changement.
+        """
+        self.simulation.declared_value = '1000'
+        self.assertFalse(self.simulation.has_changed_inputs())
+
+    def test_input_change_triggers_calculation(self):
+        """
+        S'assure qu'une modification de la valeur déclarée ou du produit relance le calcul.
+        """
+        self.simulation.declared_value = Decimal('2000.00')
+        self.simulation.save()
+        self.simulation.refresh_from_db()
+        self.assertEqual(self.simulation.customs_value_vd, Decimal('2000.00'))
+
+        self.simulation.product = self.other_product
+        self.simulation.save()
+        self.simulation.refresh_from_db()
+        # DD = 2000 * 5% (biens de 1ère nécessité), sans accise
+        self.assertEqual(self.simulation.customs_duty_dd, Decimal('100.00'))
+        self.assertEqual(self.simulation.excise_duty_da, Decimal('0.00'))
+
+    def test_update_fields_with_input_writes_results(self):
+        """
+        S'assure que save(update_fields=[entrée]) écrit aussi les colonnes de résultat.
+        """
+        self.simulation.transport_cost = Decimal('500.00')
+        self.simulation.save(update_fields=['transport_cost'])
+        self.simulation.refresh_from_db()
+        self.assertEqual(self.simulation.customs_value_vd, Decimal('1500.00'))
+
+    def test_deferred_input_change_triggers_calculation(self):
+        """
+        S'assure qu'une entrée différée (only/defer) puis modifiée relance le calcul,
+        même si une autre entrée différée est lue entre-temps.
+        """
+        simulation = Simulation.objects.only('id', 'user', 'product').get(pk=self.simulation.pk)
+        simulation.declared_value = Decimal('5000.00')
+        self.assertTrue(simulation.has_changed_inputs())
+        simulation.save()
+        stored = Simulation.objects.get(pk=simulation.pk)
+        self.assertEqual(stored.declared_value, Decimal('5000.00'))
+        self.assertEqual(stored.customs_value_vd, Decimal('5000.00'))
+        self.assertGreater(stored.total_customs_cost, self.simulation.total_customs_cost)
+
+        simulation = Simulation.objects.defer('declared_value', 'transport_cost').get(pk=self.simulation.pk)
+        simulation.declared_value = Decimal('3000.00')
+        simulation.transport_cost  # chargement du champ différé
+        simulation.save()
+        stored.refresh_from_db()
+        self.assertEqual(stored.customs_value_vd, Decimal('3000.00'))
+
+    def test_deferred_inputs_untouched_skip_calculation(self):
+        """
+        S'assure qu'une simulation chargée avec only() et modifiée hors des entrées n'est pas recalculée.
+        """
+        simulation = Simulation.objects.only('id', 'is_paid').get(pk=self.simulation.pk)
+        simulation.is_paid = True
+        with self.assertNumQueries(1):
+            simulation.save()
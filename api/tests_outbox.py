@@ -0,0 +1,168 @@
+# api/tests_outbox.py
+
+import smtplib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import EmailOutbox, ProductCategory, Product, Simulation, TariffSpecies
+from .outbox import RETRY_BASE_DELAY, build_message, deliver_pending as deliver_batch, enqueue_simulation_result, retry_delay
+
+User = get_user_model()
+
+
+def deliver_pending(**options):
+    """
+    Bilan d'un lot, sans les durées.
+    """
+    counts = deliver_batch(**options)
+    return {key: counts[key] for key in ('sent', 'retried', 'failed')}
+
+
+class EmailOutboxTests(APITestCase):
+    """
+    Tests de l'outbox des emails de résultat (api/outbox.py).
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='outbox@example.com', username='outbox', password='outboxpassword')
+        category = ProductCategory.objects.create(name='Divers')
+        self.product = Product.objects.create(
+            name='Riz', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS, cemac_hs_code='1006.30.00.00'
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_simulation(self):
+        return Simulation.objects.create(user=self.user, product=self.product, declared_value=1000)
+
+    def test_confirm_payment_enqueues_without_sending(self):
+        simulation = self.create_simulation()
+        url = reverse('simulation-confirm-payment', args=[simulation.id])
+        response = self.client.post(url, {'payment_confirmation_code': 'PAY-OUTBOX-1'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailOutbox.objects.get(simulation=simulation)
+        self.assertEqual((email.recipient, email.status), (self.user.email, EmailOutbox.Status.PENDING))
+        simulation.refresh_from_db()
+        self.assertTrue(simulation.is_paid)
+        self.assertFalse(simulation.response_email_sent)
+
+        self.assertEqual(deliver_pending(), {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.to, [self.user.email])
+        self.assertIn(f"Votre simulation de coûts douaniers SIMU #{simulation.id}", message.subject)
+        # Texte brut rendu par son propre gabarit, HTML en alternative
+        self.assertIn('Produit : Riz', message.body)
+        self.assertNotIn('<', message.body)
+        self.assertEqual(message.alternatives[0][1], 'text/html')
+        self.assertIn('<td>Riz</td>', message.alternatives[0][0])
+        simulation.refresh_from_db()
+        self.assertTrue(simulation.response_email_sent)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.Status.SENT, 1))
+        # Un email envoyé ne l'est qu'une fois
+        self.assertEqual(deliver_pending(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+    def test_rejected_payment_enqueues_nothing(self):
+        simulation = self.create_simulation()
+        simulation.is_paid = True
+        simulation.save()
+        url = reverse('simulation-confirm-payment', args=[simulation.id])
+        response = self.client.post(url, {'payment_confirmation_code': 'PAY-OUTBOX-2'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_batch_uses_one_connection(self):
+        for _ in range(3):
+            enqueue_simulation_result(self.create_simulation())
+        backend = 'django.core.mail.backends.locmem.EmailBackend'
+        send_messages = mock.patch(f'{backend}.send_messages', autospec=True, side_effect=lambda backend, messages: len(messages))
+        with mock.patch('api.outbox.get_connection', side_effect=get_connection) as connections, \
+                mock.patch(f'{backend}.open', autospec=True) as opens, send_messages as sends:
+            self.assertEqual(deliver_pending(batch_size=10)['sent'], 3)
+        self.assertEqual((connections.call_count, opens.call_count), (1, 1))
+        # Un appel par message : on sait lesquels sont partis si le serveur échoue en cours de lot
+        self.assertEqual([len(call.args[1]) for call in sends.call_args_list], [1, 1, 1])
+
+    def test_failure_mid_batch_retries_only_undelivered(self):
+        emails = [enqueue_simulation_result(self.create_simulation()) for _ in range(3)]
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            if messages[0].subject == emails[1].subject:
+                raise smtplib.SMTPRecipientsRefused({emails[1].recipient: (550, b'refuse')})
+            return original(backend, messages)
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', autospec=True, side_effect=send_messages), \
+                self.assertLogs('api.outbox', 'WARNING'):
+            self.assertEqual(deliver_pending(), {'sent': 2, 'retried': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 2)
+        statuses = dict(EmailOutbox.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[email.pk] for email in emails],
+            [EmailOutbox.Status.SENT, EmailOutbox.Status.PENDING, EmailOutbox.Status.SENT]
+        )
+        # Les emails partis ne sont pas renvoyés à la tentative suivante
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending(), {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_render_error_isolated(self):
+        broken = enqueue_simulation_result(self.create_simulation())
+        enqueue_simulation_result(self.create_simulation())
+        original = build_message
+
+        def build(email, connection):
+            if email.pk == broken.pk:
+                raise ValueError('gabarit invalide')
+            return original(email, connection)
+
+        with mock.patch('api.outbox.build_message', side_effect=build), self.assertLogs('api.outbox', 'ERROR'):
+            self.assertEqual(deliver_pending(), {'sent': 1, 'retried': 1, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failures_retried_with_backoff(self):
+        email = enqueue_simulation_result(self.create_simulation())
+        failing = mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=smtplib.SMTPServerDisconnected('connexion perdue')
+        )
+        with failing, self.assertLogs('api.outbox', 'WARNING'):
+            self.assertEqual(deliver_pending(max_attempts=2), {'sent': 0, 'retried': 1, 'failed': 0})
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (EmailOutbox.Status.PENDING, 1))
+        self.assertIn('connexion perdue', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + RETRY_BASE_DELAY - timedelta(seconds=5))
+        # Pas encore dû
+        self.assertEqual(deliver_pending(max_attempts=2)['retried'], 0)
+
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        with failing, self.assertLogs('api.outbox', 'WARNING'):
+            self.assertEqual(deliver_pending(max_attempts=2), {'sent': 0, 'retried': 0, 'failed': 1})
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailOutbox.Status.FAILED)
+
+    def test_retry_delay_doubles_and_is_capped(self):
+        self.assertEqual(retry_delay(1), RETRY_BASE_DELAY)
+        self.assertEqual(retry_delay(3), RETRY_BASE_DELAY * 4)
+        self.assertEqual(retry_delay(20), timedelta(hours=1))
+
+    def test_command_drains_outbox_in_batches(self):
+        for _ in range(5):
+            enqueue_simulation_result(self.create_simulation())
+        out = StringIO()
+        call_command('send_outbox_emails', batch_size=2, stdout=out)
+        self.assertIn('5 envoyé(s)', out.getvalue())
+        self.assertEqual(out.getvalue().count('Lot de '), 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(Simulation.objects.filter(response_email_sent=True).count(), 5)
@@ -0,0 +1,329 @@
+# api/tests_payments.py
+
+import json
+import threading
+import time
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import LiveServerTestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from .models import EmailOutbox, PaymentEvent, ProductCategory, Product, Simulation, TariffSpecies
+from .payments import SIGNATURE_HEADER, SIGNATURE_TOLERANCE, TIMESTAMP_HEADER, reconcile_pending, sign
+from .tariffs import invalidate_rate_table
+from .views import SimulationViewSet
+
+User = get_user_model()
+
+
+def create_fixtures():
+    user = User.objects.create_user(email='payeur@example.com', username='payeur', password='payeurpassword')
+    category = ProductCategory.objects.create(name='Divers')
+    product = Product.objects.create(
+        name='Riz', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS, cemac_hs_code='1006.30.00.00'
+    )
+    return user, Simulation.objects.create(user=user, product=product, declared_value=1000)
+
+
+class ConfirmPaymentTests(APITestCase):
+    """
+    Tests de la confirmation de paiement par compare-and-swap.
+    """
+    def setUp(self):
+        self.user, self.simulation = create_fixtures()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('simulation-confirm-payment', args=[self.simulation.id])
+
+    def test_confirmation_is_a_single_update(self):
+        response = self.client.post(self.url, {'payment_confirmation_code': 'PAY-CAS-1'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['simulation']['is_paid'])
+        self.simulation.refresh_from_db()
+        self.assertEqual((self.simulation.is_paid, self.simulation.payment_confirmation_code), (True, 'PAY-CAS-1'))
+        self.assertEqual(EmailOutbox.objects.filter(simulation=self.simulation).count(), 1)
+
+    def test_lost_race_returns_conflict(self):
+        # La requête a lu la simulation non payée, une autre l'a payée entre-temps
+        stale = Simulation.objects.get(pk=self.simulation.pk)
+        Simulation.objects.filter(pk=self.simulation.pk).update(is_paid=True, payment_confirmation_code='PAY-CAS-GAGNANT')
+        with mock.patch.object(SimulationViewSet, 'get_object', return_value=stale):
+            response = self.client.post(self.url, {'payment_confirmation_code': 'PAY-CAS-2'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.simulation.refresh_from_db()
+        self.assertEqual(self.simulation.payment_confirmation_code, 'PAY-CAS-GAGNANT')
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_code_taken_concurrently_returns_bad_request(self):
+        other = Simulation.objects.create(user=self.user, product=self.simulation.product, declared_value=500)
+        with mock.patch('api.serializers.PaymentConfirmationSerializer.validate_payment_confirmation_code', side_effect=lambda value: value):
+            Simulation.objects.filter(pk=other.pk).update(payment_confirmation_code='PAY-CAS-3')
+            response = self.client.post(self.url, {'payment_confirmation_code': 'PAY-CAS-3'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.simulation.refresh_from_db()
+        self.assertFalse(self.simulation.is_paid)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+
+class ConcurrentConfirmPaymentTests(TransactionTestCase):
+    """
+    Confirmations simultanées d'une même simulation depuis plusieurs threads :
+    un seul paiement est enregistré, les autres sont refusés.
+    """
+    THREADS = 16
+
+    def test_only_one_confirmation_wins(self):
+        user, simulation = create_fixtures()
+        url = reverse('simulation-confirm-payment', args=[simulation.id])
+        barrier = threading.Barrier(self.THREADS)
+        statuses, errors = [], []
+
+        def confirm(index):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                barrier.wait()
+                response = client.post(url, {'payment_confirmation_code': f'PAY-THREAD-{index}'}, format='json')
+                statuses.append(response.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=confirm, args=(index,)) for index in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(statuses.count(status.HTTP_200_OK), 1)
+        # Perdants : 409 s'ils ont lu la simulation avant le paiement, 400 s'ils l'ont lue après
+        self.assertEqual(
+            statuses.count(status.HTTP_409_CONFLICT) + statuses.count(status.HTTP_400_BAD_REQUEST), self.THREADS - 1
+        )
+        simulation.refresh_from_db()
+        self.assertTrue(simulation.is_paid)
+        self.assertTrue(simulation.payment_confirmation_code.startswith('PAY-THREAD-'))
+        self.assertEqual(EmailOutbox.objects.filter(simulation=simulation).count(), 1)
+
+
+WEBHOOK_SECRETS = {'orange_money': 'secret-orange', 'mtn_momo': '', 'sandbox': 'secret-sandbox'}
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRETS=WEBHOOK_SECRETS)
+class PaymentWebhookTests(APITestCase):
+    """
+    Tests du webhook des opérateurs de paiement (signature, enregistrement, acquittement).
+    """
+    def setUp(self):
+        self.url = reverse('payment-webhook', args=['orange_money'])
+        self.notification = {'event_id': 'OM-1', 'reference': 'ABC123', 'status': 'SUCCESSFUL', 'amount': '1000.00'}
+
+    def post(self, notification, url=None, secret='secret-orange', timestamp=None):
+        body = json.dumps(notification).encode('utf-8')
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        return self.client.generic(
+            'POST', url or self.url, body, content_type='application/json',
+            headers={TIMESTAMP_HEADER: str(timestamp), SIGNATURE_HEADER: sign(secret, timestamp, body)}
+        )
+
+    def test_signed_notification_accepted_and_queued(self):
+        # Acquittement sans rapprochement : un seul INSERT
+        with self.assertNumQueries(1):
+            response = self.post(self.notification)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        event = PaymentEvent.objects.get()
+        self.assertEqual((event.provider, event.event_id, event.reference), ('orange_money', 'OM-1', 'ABC123'))
+        self.assertTrue(event.successful)
+        self.assertEqual(event.state, PaymentEvent.State.PENDING)
+        self.assertEqual(event.payload, self.notification)
+
+    def test_resent_notification_recorded_once(self):
+        self.assertEqual(self.post(self.notification).status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(self.post(self.notification).status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+    def test_bad_signature_rejected(self):
+        response = self.post(self.notification, secret='autre-secret')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # Signature d'un autre opérateur
+        response = self.post(self.notification, url=reverse('payment-webhook', args=['sandbox']))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_stale_timestamp_rejected(self):
+        response = self.post(self.notification, timestamp=int(time.time()) - SIGNATURE_TOLERANCE - 10)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unconfigured_provider_not_found(self):
+        for provider in ('mtn_momo', 'inconnu'):
+            response = self.post(self.notification, url=reverse('payment-webhook', args=[provider]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_notification(self):
+        response = self.post({**self.notification, 'status': 'PEUT-ETRE'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('status', response.json())
+        self.assertFalse(PaymentEvent.objects.exists())
+
+
+class ReconcilePaymentsTests(APITestCase):
+    """
+    Tests du rapprochement par lots des notifications de paiement.
+    """
+    def setUp(self):
+        self.user, self.simulation = create_fixtures()
+        self.simulation.payment_confirmation_code = 'REF-1'
+        self.simulation.save(update_fields=['payment_confirmation_code'])
+
+    def event(self, event_id, reference, successful=True, **fields):
+        # Montant payé : par défaut, le coût total de la simulation référencée
+        fields.setdefault('amount', Simulation.objects.filter(payment_confirmation_code=reference).values_list('total_customs_cost', flat=True).first())
+        return PaymentEvent.objects.create(
+            provider=PaymentEvent.Provider.SANDBOX, event_id=event_id, reference=reference, successful=successful, payload={}, **fields
+        )
+
+    def test_batch_outcomes(self):
+        paid = Simulation.objects.create(
+            user=self.user, product=self.simulation.product, declared_value=500, is_paid=True, payment_confirmation_code='REF-2'
+        )
+        confirmed = self.event('E1', 'REF-1')
+        again = self.event('E2', 'REF-1')
+        already = self.event('E3', 'REF-2')
+        unknown = self.event('E4', 'REF-INCONNUE')
+        failed = self.event('E5', 'REF-1', successful=False)
+
+        counts = reconcile_pending()
+        self.assertEqual(counts, {'confirmed': 1, 'already_paid': 2, 'amount_mismatch': 0, 'unmatched': 1, 'rejected': 1})
+        self.simulation.refresh_from_db()
+        self.assertTrue(self.simulation.is_paid)
+        self.assertEqual(EmailOutbox.objects.filter(simulation=self.simulation).count(), 1)
+        self.assertFalse(EmailOutbox.objects.filter(simulation=paid).exists())
+
+        states = dict(PaymentEvent.objects.values_list('event_id', 'state'))
+        self.assertEqual(states, {
+            'E1': 'confirmed', 'E2': 'already_paid', 'E3': 'already_paid', 'E4': 'unmatched', 'E5': 'rejected',
+        })
+        confirmed.refresh_from_db()
+        self.assertEqual(confirmed.simulation, self.simulation)
+        self.assertIsNotNone(confirmed.processed_at)
+        # Plus rien à traiter
+        self.assertEqual(sum(reconcile_pending().values()), 0)
+
+    def test_amount_must_match_total(self):
+        """
+        S'assure qu'un paiement d'un montant absent ou différent du coût total ne marque
+        pas la simulation payée, et que le bon montant la confirme ensuite.
+        """
+        self.simulation.refresh_from_db()
+        total = self.simulation.total_customs_cost
+        self.event('E1', 'REF-1', amount=total - Decimal('0.01'))
+        self.event('E2', 'REF-1', amount=None)
+        counts = reconcile_pending()
+        self.assertEqual(counts, {'confirmed': 0, 'already_paid': 0, 'amount_mismatch': 2, 'unmatched': 0, 'rejected': 0})
+        self.simulation.refresh_from_db()
+        self.assertFalse(self.simulation.is_paid)
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertEqual(PaymentEvent.objects.get(event_id='E1').simulation, self.simulation)
+
+        self.event('E3', 'REF-1', amount=total)
+        self.assertEqual(reconcile_pending()['confirmed'], 1)
+        self.simulation.refresh_from_db()
+        self.assertTrue(self.simulation.is_paid)
+
+    def test_query_count_independent_of_batch_size(self):
+        product = self.simulation.product
+        for index in range(20):
+            Simulation.objects.create(
+                user=self.user, product=product, declared_value=100, payment_confirmation_code=f'LOT-{index}'
+            )
+            self.event(f'L{index}', f'LOT-{index}')
+        # Lecture de la file, des simulations, UPDATE (dans un savepoint), INSERT outbox,
+        # mise à jour des notifications (+ savepoint)
+        with self.assertNumQueries(9):
+            self.assertEqual(reconcile_pending()['confirmed'], 20)
+        self.assertEqual(Simulation.objects.filter(is_paid=True).count(), 20)
+
+    def test_simulation_paid_concurrently_not_confirmed_twice(self):
+        """
+        S'assure qu'une simulation payée par confirm_payment entre la lecture du lot et
+        son UPDATE (sans verrou sous SQLite) est classée déjà payée, sans second email.
+        """
+        other = Simulation.objects.create(
+            user=self.user, product=self.simulation.product, declared_value=500, payment_confirmation_code='REF-3'
+        )
+        self.event('E1', 'REF-1')
+        self.event('E2', 'REF-3')
+        concurrent = []
+
+        def pay_concurrently(execute, sql, params, many, context):
+            result = execute(sql, params, many, context)
+            if sql.startswith('SELECT') and 'FROM "api_simulation"' in sql and not concurrent:
+                # Paiement validé par une autre connexion juste après la lecture des simulations
+                concurrent.append(sql)
+                Simulation.objects.filter(pk=other.pk).update(is_paid=True)
+            return result
+
+        with connection.execute_wrapper(pay_concurrently):
+            counts = reconcile_pending()
+        self.assertEqual(counts, {'confirmed': 1, 'already_paid': 1, 'amount_mismatch': 0, 'unmatched': 0, 'rejected': 0})
+        self.assertEqual(dict(PaymentEvent.objects.values_list('event_id', 'state')), {'E1': 'confirmed', 'E2': 'already_paid'})
+        self.assertEqual(list(EmailOutbox.objects.values_list('simulation', flat=True)), [self.simulation.pk])
+        self.assertEqual(Simulation.objects.filter(is_paid=True).count(), 2)
+
+    def test_command_drains_queue_in_batches(self):
+        for index in range(5):
+            self.event(f'C{index}', 'REF-1' if index == 0 else f'REF-X{index}')
+        out = StringIO()
+        call_command('reconcile_payments', batch_size=2, stdout=out)
+        self.assertEqual(out.getvalue().count('Lot de '), 3)
+        self.assertIn('1 paiement(s) confirmé(s)', out.getvalue())
+        self.assertIn('0 montant(s) incorrect(s), 4 référence(s) inconnue(s)', out.getvalue())
+        self.assertFalse(PaymentEvent.objects.filter(state=PaymentEvent.State.PENDING).exists())
+
+
+@override_settings(PAYMENT_WEBHOOK_SECRETS=WEBHOOK_SECRETS)
+class PaymentProviderSimulatorTests(LiveServerTestCase):
+    """
+    Tests de l'opérateur simulé (simulate_payment_provider), lancé contre le serveur de test.
+    """
+    def test_simulated_payments_reconciled(self):
+        invalidate_rate_table()
+        # La simulation des fixtures n'a pas de code de paiement : elle n'est pas payée
+        user, simulation = create_fixtures()
+        for index in range(10):
+            Simulation.objects.create(
+                user=user, product=simulation.product, declared_value=100, payment_confirmation_code=f'SIM-{index}'
+            )
+
+        out = StringIO()
+        call_command(
+            'simulate_payment_provider', base_url=f'{self.live_server_url}/api', count=10, concurrency=3,
+            failure_rate=0.2, mismatch_rate=0.2, duplicate_rate=0.5, unknown_rate=0.2, seed=7, stdout=out
+        )
+        report = json.loads(out.getvalue())
+        expected = report['notifications']
+        self.assertEqual(report['webhook']['errors'], 0, report)
+        self.assertEqual(report['webhook']['count'], 10 + expected['unknown'] + expected['resent'])
+        self.assertEqual(expected['successful'] + expected['failed'] + expected['mismatched'], 10)
+        # Les renvois ne créent pas de doublon
+        self.assertEqual(PaymentEvent.objects.count(), 10 + expected['unknown'])
+
+        call_command('reconcile_payments', stdout=StringIO())
+        self.assertEqual(Simulation.objects.filter(is_paid=True).count(), expected['successful'])
+        self.assertEqual(EmailOutbox.objects.count(), expected['successful'])
+        self.assertEqual(PaymentEvent.objects.filter(state=PaymentEvent.State.UNMATCHED).count(), expected['unknown'])
+        self.assertEqual(PaymentEvent.objects.filter(state=PaymentEvent.State.AMOUNT_MISMATCH).count(), expected['mismatched'])
+
+    def test_requires_secret(self):
+        with self.assertRaisesMessage(Exception, 'Aucun secret'):
+            call_command('simulate_payment_provider', provider='mtn_momo', stdout=StringIO())
@@ -0,0 +1,80 @@
+# api/tests_profiling.py
+
+import marshal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import ProductCategory, Product, RequestProfile, Simulation, TariffSpecies
+
+User = get_user_model()
+
+
+class RequestProfilingTests(APITestCase):
+    """
+    Tests du profilage à la demande (en-tête X-Profile).
+    """
+    def setUp(self):
+        self.staff = User.objects.create_user(email='staff@example.com', username='staff', password='staffpassword', is_staff=True)
+        self.user = User.objects.create_user(email='user@example.com', username='user', password='userpassword')
+        category = ProductCategory.objects.create(name='Divers')
+        product = Product.objects.create(
+            name='Riz', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS, cemac_hs_code='1006.30.00.00'
+        )
+        Simulation.objects.create(user=self.user, product=product, declared_value=1000)
+        self.url = reverse('simulation-list')
+
+    def bearer(self, user):
+        return f'Bearer {RefreshToken.for_user(user).access_token}'
+
+    def test_staff_request_profiled_with_jwt(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=self.bearer(self.staff))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual((profile.method, profile.path, profile.view_name, profile.status_code), ('GET', self.url, 'simulation-list', 200))
+        self.assertGreater(profile.duration_ms, 0)
+        self.assertEqual(profile.sql_count, len(profile.sql_queries))
+        self.assertTrue(any('api_simulation' in query['sql'] for query in profile.sql_queries))
+        self.assertIn('cumulative', profile.stats)
+        # Fichier .prof au format pstats
+        self.assertIsInstance(marshal.loads(bytes(profile.profile_data)), dict)
+
+    def test_non_staff_and_anonymous_not_profiled(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=self.bearer(self.user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        response = self.client.get(self.url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION='Bearer invalide')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_without_header_not_profiled(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=self.bearer(self.staff))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_old_profiles_pruned(self):
+        with mock.patch('api.profiling.MAX_PROFILES', 2):
+            for _ in range(4):
+                self.client.get(self.url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=self.bearer(self.staff))
+        self.assertEqual(RequestProfile.objects.count(), 2)
+
+    def test_admin_pages(self):
+        response = self.client.get(self.url, HTTP_X_PROFILE='1', HTTP_AUTHORIZATION=self.bearer(self.staff))
+        profile_id = response['X-Profile-Id']
+        admin = User.objects.create_superuser(email='admin@example.com', username='admin', password='adminpassword')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('admin:api_requestprofile_changelist'))
+        self.assertContains(response, self.url)
+        response = self.client.get(reverse('admin:api_requestprofile_change', args=[profile_id]))
+        self.assertContains(response, 'api_simulation')
+        response = self.client.get(reverse('admin:api_requestprofile_download', args=[profile_id]))
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{profile_id}.prof"')
+        self.assertIsInstance(marshal.loads(response.content), dict)
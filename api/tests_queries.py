@@ -0,0 +1,96 @@
+# api/tests_queries.py
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import ProductCategory, Product, Simulation, TariffSpecies
+
+User = get_user_model()
+
+# Budget de requêtes SQL par endpoint (authentification forcée, donc sans requête
+# pour l'utilisateur). Le budget ne doit pas dépendre du nombre de lignes.
+QUERY_BUDGETS = {
+    'product-list': 1,
+    'productcategory-list': 1,
+    'simulation-list': 1,
+    'simulation-detail': 1,
+    'simulation-historique-list': 1,
+    'simulation-historique-detail': 1,
+}
+
+
+class QueryBudgetMixin:
+    """
+    Vérifie qu'un endpoint respecte son budget de requêtes, quel que soit le volume de données.
+    """
+    def assertQueryBudget(self, url_name, *args, grow=None):
+        """
+        Appelle l'endpoint, ajoute des données avec `grow()`, puis le rappelle :
+        les deux appels doivent rester dans le budget de QUERY_BUDGETS[url_name].
+        """
+        url = reverse(url_name, args=args)
+        budget = QUERY_BUDGETS[url_name]
+        for step in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(
+                len(queries), budget,
+                f"{url_name} : {len(queries)} requêtes pour un budget de {budget}\n"
+                + "\n".join(query['sql'] for query in queries.captured_queries)
+            )
+            if grow and step == 0:
+                grow()
+
+
+class SimulationQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    """
+    Tests de non-régression N+1 pour les endpoints de simulations.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='budget@example.com', username='budget', password='budgetpassword')
+        self.admin = User.objects.create_superuser(email='budget_admin@example.com', username='budget_admin', password='adminpassword')
+        category = ProductCategory.objects.create(name='Meubles', cemac_hs_code_prefix='94')
+        self.products = [
+            Product.objects.create(
+                name=f'Meuble {index}', category=category,
+                tariff_species=TariffSpecies.CONSUMPTION_GOODS, cemac_hs_code=f'9403.{index:02d}.00.00'
+            )
+            for index in range(5)
+        ]
+        self.simulation = self.create_simulations(self.user, 3)[0]
+
+    def create_simulations(self, user, count):
+        return [
+            Simulation.objects.create(
+                user=user, product=self.products[index % len(self.products)], declared_value=Decimal(1000 + index)
+            )
+            for index in range(count)
+        ]
+
+    def test_simulation_list_budget(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertQueryBudget('simulation-list', grow=lambda: self.create_simulations(self.user, 20))
+
+    def test_simulation_list_budget_as_admin(self):
+        other = User.objects.create_user(email='other_budget@example.com', username='other_budget', password='otherpassword')
+        self.client.force_authenticate(user=self.admin)
+        self.assertQueryBudget('simulation-list', grow=lambda: self.create_simulations(other, 20))
+
+    def test_simulation_detail_budget(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertQueryBudget('simulation-detail', self.simulation.pk)
+
+    def test_history_list_budget(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertQueryBudget('simulation-historique-list', grow=lambda: self.create_simulations(self.user, 20))
+
+    def test_history_detail_budget(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertQueryBudget('simulation-historique-detail', self.simulation.pk)
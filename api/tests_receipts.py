@@ -0,0 +1,100 @@
+# api/tests_receipts.py
+
+import shutil
+import tempfile
+import zlib
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import ProductCategory, Product, Receipt, Simulation, TariffSpecies
+from .receipts import format_amount, receipt_path, render_pdf
+
+User = get_user_model()
+
+
+class SimulationReceiptTests(APITestCase):
+    """
+    Tests pour l'endpoint /api/simulations/{id}/receipt/.
+    """
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='receipt@example.com', username='receipt', password='receiptpassword')
+        category = ProductCategory.objects.create(name='Divers')
+        self.product = Product.objects.create(
+            name='Fèves de cacao', category=category, tariff_species=TariffSpecies.NECESSITY_GOODS,
+            cemac_hs_code='1801.00.00.00'
+        )
+        self.simulation = Simulation.objects.create(
+            user=self.user, product=self.product, declared_value=Decimal('1234567.89'),
+            is_paid=True, payment_confirmation_code='PAY-RECEIPT-1'
+        )
+        self.url = reverse('simulation-receipt', args=[self.simulation.id])
+        self.client.force_authenticate(user=self.user)
+
+    def download(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def test_receipt_rendered_once_and_stored_by_content(self):
+        with mock.patch('api.receipts.render_pdf', wraps=render_pdf) as render:
+            first = self.download()
+            second = self.download()
+        self.assertEqual(render.call_count, 1)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertEqual(first['Content-Disposition'], f'attachment; filename="recu-simu-{self.simulation.id}.pdf"')
+        content = b''.join(first.streaming_content)
+        self.assertTrue(content.startswith(b'%PDF-1.4'))
+        self.assertTrue(content.rstrip().endswith(b'%%EOF'))
+
+        receipt = Receipt.objects.get(simulation=self.simulation)
+        self.assertEqual(first['ETag'], f'"{receipt.sha256}"')
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(receipt_path(receipt.sha256).read_bytes(), content)
+        self.assertEqual(receipt.size, len(content))
+
+        # Texte du reçu (flux décompressé) : accents en WinAnsi, montants au format français
+        stream = zlib.decompress(content.split(b'stream\n', 1)[1].rsplit(b'\nendstream', 1)[0])
+        self.assertIn('Fèves de cacao'.encode('cp1252'), stream)
+        self.assertIn(format_amount(self.simulation.total_customs_cost).encode('cp1252'), stream)
+
+    def test_if_none_match_returns_304(self):
+        etag = self.download()['ETag']
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_accept_pdf(self):
+        response = self.download(HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_receipt_regenerated_when_simulation_changes(self):
+        etag = self.download()['ETag']
+        self.simulation.declared_value = 5000
+        self.simulation.save()
+        response = self.download(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(Receipt.objects.count(), 1)
+
+    def test_unpaid_simulation_has_no_receipt(self):
+        simulation = Simulation.objects.create(user=self.user, product=self.product, declared_value=1000)
+        response = self.client.get(reverse('simulation-receipt', args=[simulation.id]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Receipt.objects.exists())
+
+    def test_other_users_receipt_not_found(self):
+        other = User.objects.create_user(email='other@example.com', username='other', password='otherpassword')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.download().status_code, status.HTTP_404_NOT_FOUND)
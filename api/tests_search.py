@@ -0,0 +1,77 @@
+# api/tests_search.py
+
+from unittest import mock
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import ProductCategory, Product
+from .search import fts_available
+
+
+class ProductSearchTests(APITestCase):
+    """
+    Tests pour la recherche plein texte des produits, insensible aux accents.
+    """
+    def setUp(self):
+        self.food = ProductCategory.objects.create(name='Produits agricoles', cemac_hs_code_prefix='18')
+        self.metal = ProductCategory.objects.create(name='Métaux', cemac_hs_code_prefix='72')
+        self.health = ProductCategory.objects.create(name='Pharmacie', cemac_hs_code_prefix='30')
+        for name, category, code in [
+            ('Fèves de cacao', self.food, '1801.00.00.00'),
+            ('Pâte de cacao', self.food, '1803.10.00.00'),
+            ('Tôles en acier', self.metal, '7208.51.00.00'),
+            ('Sérums antivenimeux', self.health, '3002.12.00.00'),
+        ]:
+            Product.objects.create(name=name, category=category, cemac_hs_code=code)
+        self.url = reverse('product-search')
+
+    def names(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data]
+
+    def assert_search_results(self):
+        self.assertEqual(self.names('feves'), ['Fèves de cacao'])
+        self.assertEqual(self.names('TOLE acier'), ['Tôles en acier'])
+        self.assertEqual(self.names('serum'), ['Sérums antivenimeux'])
+        self.assertEqual(self.names('cacao feve'), ['Fèves de cacao'])
+        self.assertEqual(self.names('metaux'), ['Tôles en acier'])
+        self.assertEqual(self.names('chocolat'), [])
+        # Le nom pèse plus que la catégorie
+        Product.objects.create(name='Pharmacie portable', cemac_hs_code='3006.50.00.00')
+        self.assertEqual(self.names('pharmacie')[0], 'Pharmacie portable')
+
+    def test_fts_search(self):
+        self.assertTrue(fts_available())
+        self.assert_search_results()
+
+    def test_fallback_search(self):
+        """
+        S'assure que la recherche donne les mêmes résultats sans l'index FTS5.
+        """
+        with mock.patch('api.search.fts_available', return_value=False):
+            self.assert_search_results()
+
+    def test_index_follows_changes(self):
+        """
+        S'assure que l'index suit les modifications des produits et des noms de catégorie.
+        """
+        product = Product.objects.get(name='Pâte de cacao')
+        product.name = 'Beurre de cacao'
+        product.save()
+        self.assertEqual(self.names('pate'), [])
+        self.assertEqual(self.names('beurre'), ['Beurre de cacao'])
+
+        self.metal.name = 'Sidérurgie'
+        self.metal.save()
+        self.assertEqual(self.names('siderurgie'), ['Tôles en acier'])
+
+        self.metal.delete()
+        self.assertEqual(self.names('siderurgie'), [])
+        product.delete()
+        self.assertEqual(self.names('beurre'), [])
+
+    def test_empty_query(self):
+        self.assertEqual(self.client.get(self.url, {'q': ' - '}).status_code, status.HTTP_400_BAD_REQUEST)
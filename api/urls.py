@@ -14,7 +14,8 @@ from rest_framework_simplejwt.views import (
 
 from .views import (
      UserRegistrationView, UserProfileView,
-    ProductCategoryViewSet, ProductViewSet, SimulationViewSet,SimulationViewSetHistorique
+    ProductCategoryViewSet, ProductViewSet, SimulationViewSet,SimulationViewSetHistorique,
+    PaymentWebhookView
 )
 
 router = DefaultRouter()
@@ -40,6 +41,9 @@ urlpatterns = [
     # path('simulations/historique/', SimulationViewSetHistorique, name='simulation-historique'),
       path('profile/', UserProfileView.as_view(), name='user-profile'),
 
+    # Notifications des opérateurs de paiement (signées, voir api/payments.py)
+    path('payments/webhook/<str:provider>/', PaymentWebhookView.as_view(), name='payment-webhook'),
+
     # API resources avec ViewSets et Routers
     path('', include(router.urls)),
     
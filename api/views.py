@@ -3,22 +3,35 @@
 from rest_framework import generics, viewsets, status, mixins
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.db import transaction
-from django.core.mail import send_mail
-from django.conf import settings # Assure-toi que EMAIL_BACKEND est configuré dans settings.py
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+import json
 import uuid # Pour générer des codes de confirmation uniques
 
 from .models import User, ProductCategory, Product, Simulation
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, ProductCategorySerializer,
     ProductSerializer, SimulationCreateSerializer, SimulationDetailSerializer,
-    PaymentConfirmationSerializer
+    PaymentConfirmationSerializer, PaymentNotificationSerializer, SimulationBatchSerializer, SimulationQuoteSerializer
 )
+from .catalog import catalog_etag, get_catalog_revision, get_catalog_snapshot
+from .calculations import compute_batch, rows_from_columns
+from .exports import EXPORT_FORMATS, stream_export
+from .hs_codes import get_hs_code_index, normalize_hs_code
+from .idempotency import idempotent
+from .outbox import enqueue_simulation_result
+from .pagination import SimulationCursorPagination
+from .payments import SIGNATURE_HEADER, TIMESTAMP_HEADER, record_event, verify_signature, webhook_secret
+from .receipts import get_receipt, receipt_path
+from .search import search_products, search_terms
+from .tariffs import get_rate_table
 # from .permissions import IsOwnerOrAdmin # Nous allons créer ce fichier plus tard
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -63,7 +76,30 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
-class ProductCategoryViewSet(viewsets.ModelViewSet):
+class CatalogSnapshotMixin:
+    """
+    Sert la liste depuis l'instantané du catalogue en cache, avec un ETag égal à la
+    révision du catalogue. Un If-None-Match à jour reçoit un 304 sans requête SQL.
+    """
+    catalog_kind = None
+
+    def list(self, request, *args, **kwargs):
+        revision = get_catalog_revision()
+        etag = catalog_etag(self.catalog_kind, revision)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = get_catalog_snapshot(
+            self.catalog_kind,
+            lambda: list(self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data),
+            revision
+        )
+        return Response(data, headers=headers)
+
+class ProductCategoryViewSet(CatalogSnapshotMixin, viewsets.ModelViewSet):
     """
     API endpoint qui permet aux catégories de produits d'être vues ou éditées.
     - Seuls les administrateurs peuvent créer, mettre à jour ou supprimer des catégories.
@@ -71,6 +107,7 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
     """
     queryset = ProductCategory.objects.all()
     serializer_class = ProductCategorySerializer
+    catalog_kind = 'categories'
     # permission_classes = (IsAuthenticated,) # Par défaut, authentifié requis
 
     # def get_permissions(self):
@@ -83,14 +120,59 @@ class ProductCategoryViewSet(viewsets.ModelViewSet):
         #     self.permission_classes = [IsAuthenticated] # Lecture pour tous les authentifiés
         # return [permission() for permission in self.permission_classes]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogSnapshotMixin, viewsets.ModelViewSet):
     """
     API endpoint qui permet aux produits d'être vus ou éditées.
     - Seuls les administrateurs peuvent créer, mettre à jour ou supprimer des produits.
     - Tous les utilisateurs authentifiés peuvent lister et récupérer des produits.
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related('category')
     serializer_class = ProductSerializer
+    catalog_kind = 'products'
+
+    # Nombre de résultats des recherches (lookup, search) : ?limit=, 20 par défaut
+    MAX_SEARCH_RESULTS = 100
+
+    def get_search_limit(self):
+        try:
+            limit = int(self.request.query_params.get('limit', 20))
+        except ValueError:
+            raise ValidationError({"limit": "Ce paramètre doit être un entier."})
+        return max(1, min(limit, self.MAX_SEARCH_RESULTS))
+
+    # Autocomplétion par code SH
+    # Route: /api/products/lookup/?hs=6403&limit=20
+
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        Retourne les produits dont le code SH commence par `hs` (points et espaces ignorés),
+        depuis l'index en mémoire, sans requête SQL tant que le catalogue n'a pas changé.
+        """
+        prefix = normalize_hs_code(request.query_params.get('hs', ''))
+        if not prefix:
+            return Response(
+                {"detail": "Le paramètre 'hs' doit contenir au moins un chiffre du code SH."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(get_hs_code_index().lookup(prefix, limit=self.get_search_limit()))
+
+    # Recherche plein texte, insensible aux accents
+    # Route: /api/products/search/?q=feves+cacao&limit=20
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Retourne les produits dont le nom ou la catégorie contient tous les mots de `q`
+        (accents ignorés, mots cherchés comme préfixes), du plus pertinent au moins pertinent.
+        """
+        query = request.query_params.get('q', '')
+        if not search_terms(query):
+            return Response({"detail": "Le paramètre 'q' doit contenir au moins un mot."}, status=status.HTTP_400_BAD_REQUEST)
+
+        products = search_products(query, limit=self.get_search_limit())
+        return Response(self.get_serializer(products, many=True).data)
+
     # permission_classes = (IsAuthenticated,)
 
     # def get_permissions(self):
@@ -112,13 +194,56 @@ class SimulationViewSetHistorique(viewsets.ReadOnlyModelViewSet):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = SimulationDetailSerializer
+    pagination_class = SimulationCursorPagination
 
     def get_queryset(self):
         if self.request.user.is_staff or self.request.user.is_superuser:
-            return Simulation.objects.all()
-        return Simulation.objects.filter(user=self.request.user)
+            queryset = Simulation.objects.all()
+        else:
+            queryset = Simulation.objects.filter(user=self.request.user)
+        return queryset.with_detail_relations()
+
+    # Export en flux de l'historique
+    # Route: /api/historique_simulations/export/?output=csv|ndjson&gzip=1
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporte tout l'historique visible par l'utilisateur, en CSV (défaut) ou NDJSON,
+        compressé en gzip si `gzip=1`. La réponse est produite en flux, sans pagination.
+        """
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Format d'export inconnu. Formats disponibles : {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        filename = f"simulations.{extension}"
+        if compress:
+            content_type, filename = 'application/gzip', f"{filename}.gz"
+
+        response = StreamingHttpResponse(
+            stream_export(self.get_queryset(), export_format, compress=compress),
+            content_type=content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
     
     
+class PDFRenderer(BaseRenderer):
+    """
+    Permet la négociation de contenu `Accept: application/pdf` ; les erreurs restent en JSON.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
 class SimulationViewSet(viewsets.ModelViewSet):
     """
     API endpoint qui permet aux simulations d'être créées, vues, éditées ou supprimées.
@@ -126,6 +251,7 @@ class SimulationViewSet(viewsets.ModelViewSet):
     - Les administrateurs peuvent gérer toutes les simulations.
     """
     queryset = Simulation.objects.all()
+    pagination_class = SimulationCursorPagination
     # permission_classes = (IsAuthenticated, IsOwnerOrAdmin) # Sera affiné par get_queryset et permissions
 
     def get_serializer_class(self):
@@ -142,8 +268,25 @@ class SimulationViewSet(viewsets.ModelViewSet):
         sauf si l'utilisateur est un administrateur.
         """
         if self.request.user.is_staff or self.request.user.is_superuser:
-            return Simulation.objects.all()
-        return Simulation.objects.filter(user=self.request.user)
+            queryset = Simulation.objects.all()
+        else:
+            queryset = Simulation.objects.filter(user=self.request.user)
+
+        # Lecture seule : projection limitée aux colonnes affichées.
+        # Les autres actions relisent le produit complet (recalcul, email).
+        if self.action in ('list', 'retrieve'):
+            return queryset.with_detail_relations()
+        if self.action == 'receipt':
+            return queryset.select_related('product', 'user', 'tariff_schedule', 'receipt')
+        return queryset.select_related('product', 'user')
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        """
+        Crée une simulation. Avec l'en-tête Idempotency-Key, une nouvelle tentative
+        rejoue la première réponse au lieu de créer un doublon (voir api/idempotency.py).
+        """
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
@@ -168,13 +311,93 @@ class SimulationViewSet(viewsets.ModelViewSet):
                 del request.data[field]
         return super().partial_update(request, *args, **kwargs)
 
+    # Endpoint pour un devis instantané (sans enregistrement)
+    # Route: /api/simulations/quote/
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def quote(self, request):
+        """
+        Calcule les coûts douaniers d'un envoi sans créer de simulation.
+        Le calcul est fait sur une instance non enregistrée : pas d'INSERT, pas de
+        code de paiement, seule la lecture du produit touche la base.
+        """
+        serializer = SimulationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        simulation = Simulation(**serializer.validated_data)
+        simulation.calculate_customs_cost()
+
+        return Response(SimulationQuoteSerializer(simulation).data, status=status.HTTP_200_OK)
+
+    # Endpoint pour le calcul en lot (sans enregistrement)
+    # Route: /api/simulations/batch/
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def batch(self, request):
+        """
+        Calcule les coûts douaniers de plusieurs envois en une seule requête.
+        Aucune simulation n'est enregistrée : les résultats sont retournés dans
+        l'ordre des envois soumis.
+        """
+        serializer = SimulationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        shipments = serializer.validated_data['shipments']
+
+        rates = get_rate_table()
+        columns = compute_batch(shipments, serializer.validated_data['products'], rates)
+        # Montants au format des DecimalField DRF (chaînes à 2 décimales)
+        results = [
+            {'index': index, 'product': shipment['product'], **{field: str(value) for field, value in row.items()}}
+            for index, (shipment, row) in enumerate(zip(shipments, rows_from_columns(columns)))
+        ]
+
+        return Response(
+            {"count": len(results), "tariff_schedule": rates.schedule_id, "results": results},
+            status=status.HTTP_200_OK
+        )
+
+    # Reçu PDF d'une simulation payée
+    # Route: /api/simulations/{id}/receipt/
+
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, PDFRenderer])
+    def receipt(self, request, pk=None):
+        """
+        Télécharge le reçu PDF d'une simulation payée. Le PDF est rendu une fois,
+        stocké sous son empreinte et servi tel quel ensuite (voir api/receipts.py),
+        avec un ETag fort : un If-None-Match à jour reçoit un 304.
+        """
+        simulation = self.get_object()
+        if not simulation.is_paid:
+            return Response(
+                {"detail": "Le reçu n'est disponible qu'après confirmation du paiement."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        receipt = get_receipt(simulation)
+        etag = f'"{receipt.sha256}"'
+        # Le reçu peut changer si la simulation est modifiée : revalidation systématique
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        # FileResponse passe le fichier au serveur (wsgi.file_wrapper, sendfile si disponible)
+        response = FileResponse(
+            open(receipt_path(receipt.sha256), 'rb'), content_type='application/pdf',
+            as_attachment=True, filename=f'recu-simu-{simulation.pk}.pdf'
+        )
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
     # Endpoint pour confirmer le paiement
     # Route: /api/simulations/{id}/confirm_payment/
     
     @action(detail=True, methods=['post'])
+    @idempotent
     def confirm_payment(self, request, pk=None):
         """
-        Confirme le paiement d'une simulation et envoie le résultat par email.
+        Confirme le paiement d'une simulation et programme l'envoi du résultat par email.
+        Avec l'en-tête Idempotency-Key, une nouvelle tentative rejoue la première réponse.
         """
         simulation = self.get_object()
         serializer = PaymentConfirmationSerializer(data=request.data)
@@ -202,51 +425,62 @@ class SimulationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        with transaction.atomic():
-            simulation.is_paid = True
-            simulation.payment_confirmation_code = payment_code_input # Stocke le code fourni par l'utilisateur
-            simulation.save() # Le save recalcule les coûts si des champs ont été modifiés
-
-            # Envoyer l'email de confirmation avec les résultats
-            try:
-                self._send_simulation_result_email(simulation)
-                simulation.response_email_sent = True
-                simulation.save(update_fields=['response_email_sent'])
-            except Exception as e:
-                # Log l'erreur d_email si le mail échoue, mais ne bloque pas la réponse
-                print(f"Erreur lors de l'envoi de l'email pour la simulation {simulation.id}: {e}")
-                # Peut-être ajouter un champ 'email_sent_error' au modèle Simulation
+        try:
+            with transaction.atomic():
+                # Compare-and-swap : une seule instruction UPDATE ... WHERE is_paid = false.
+                # Deux confirmations concurrentes ont pu passer le test ci-dessus ; une seule
+                # modifie la ligne, l'autre reçoit un 409 sans attendre ni rien écrire.
+                # Seuls is_paid et le code changent : les montants n'ont pas à être recalculés.
+                confirmed = Simulation.objects.filter(pk=simulation.pk, is_paid=False).update(
+                    is_paid=True, payment_confirmation_code=payment_code_input
+                )
+                if not confirmed:
+                    return Response(
+                        {"detail": "Cette simulation vient d'être payée par une autre requête."},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                simulation.is_paid = True
+                simulation.payment_confirmation_code = payment_code_input # Stocke le code fourni par l'utilisateur
+
+                # L'email est écrit dans l'outbox, dans la même transaction que le paiement,
+                # puis envoyé par la commande send_outbox_emails (voir api/outbox.py)
+                enqueue_simulation_result(simulation)
+        except IntegrityError:
+            # Code utilisé entre-temps pour une autre simulation (contrainte unique)
+            return Response(
+                {"payment_confirmation_code": ["Ce code de confirmation a déjà été utilisé."]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
         return Response(
-            {"detail": "Paiement confirmé et résultats envoyés par email.", "simulation": SimulationDetailSerializer(simulation).data},
+            {"detail": "Paiement confirmé. Les résultats vous seront envoyés par email.", "simulation": SimulationDetailSerializer(simulation).data},
             status=status.HTTP_200_OK
         )
 
-    def _send_simulation_result_email(self, simulation):
-        """
-        Fonction utilitaire pour envoyer l'email de résultat de simulation.
-        """
-        subject = f"Votre simulation de coûts douaniers SIMU #{simulation.id}"
-        recipient_email = simulation.user.email
 
-        # Préparer le contexte pour le template d'email
-        context = {
-            'simulation': simulation,
-            'user': simulation.user,
-            'product': simulation.product,
-            # Vous pouvez ajouter d'autres données nécessaires au template ici
-        }
+class PaymentWebhookView(APIView):
+    """
+    Reçoit les notifications de paiement signées d'un opérateur de mobile money
+    (voir api/payments.py). La notification est vérifiée, enregistrée puis
+    acquittée (202) sans attendre : le rapprochement avec les simulations est
+    fait par lots par la commande reconcile_payments.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
 
-        # Charger le template HTML
-        html_message = render_to_string('emails/simulation_result.html', context)
-        plain_message = strip_tags(html_message) # Version texte brut pour les clients email sans HTML
+    def post(self, request, provider):
+        secret = webhook_secret(provider)
+        if secret is None:
+            return Response({"detail": "Opérateur inconnu."}, status=status.HTTP_404_NOT_FOUND)
+        if not verify_signature(secret, request.headers.get(TIMESTAMP_HEADER), request.headers.get(SIGNATURE_HEADER), request.body):
+            return Response({"detail": "Signature invalide ou expirée."}, status=status.HTTP_403_FORBIDDEN)
 
-        send_mail(
-            subject,
-            plain_message,
-            settings.DEFAULT_FROM_EMAIL, # Doit être configuré dans settings.py
-            [recipient_email],
-            html_message=html_message,
-            fail_silently=False,
-        )
-        print(f"Email envoyé à {recipient_email} pour la simulation #{simulation.id}")
+        # Corps lu tel quel : la signature porte sur ces octets
+        try:
+            payload = json.loads(request.body)
+        except ValueError:
+            return Response({"detail": "Corps JSON invalide."}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = PaymentNotificationSerializer(data=payload)
+        serializer.is_valid(raise_exception=True)
+        record_event(provider, serializer.validated_data, payload)
+        return Response({"detail": "Notification reçue."}, status=status.HTTP_202_ACCEPTED)
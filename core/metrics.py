@@ -0,0 +1,134 @@
+# core/metrics.py
+
+"""
+Métriques des requêtes HTTP, au format texte de Prometheus.
+
+MetricsMiddleware (core/middleware.py) enregistre pour chaque vue : le nombre
+de requêtes par méthode et statut, un histogramme des latences, le nombre de
+requêtes SQL et leur durée cumulée. Les compteurs vivent en mémoire du
+processus : avec plusieurs workers (gunicorn), chaque worker expose les siens
+et Prometheus doit les interroger séparément, ou les agréger via le label
+`instance` de la cible.
+
+Les vues sont identifiées par le nom de route Django (simulation-list,
+product-search, ...), jamais par l'URL brute, pour borner le nombre de séries.
+"""
+
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Bornes supérieures (secondes) de l'histogramme des latences
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _ViewMetrics:
+    __slots__ = ('requests', 'buckets', 'latency_sum', 'latency_count', 'sql_queries', 'sql_seconds')
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (méthode, statut) -> nombre
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # dernier : au-delà de la plus grande borne
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+
+class MetricsRegistry:
+    """
+    Compteurs par vue, protégés par un verrou (serveurs multi-threads).
+    L'enregistrement ne fait que quelques additions sous le verrou ; le rendu
+    texte, plus coûteux, n'a lieu qu'à la lecture de /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(_ViewMetrics)
+
+    def observe(self, view, method, status, latency, sql_queries, sql_seconds):
+        position = bisect_left(LATENCY_BUCKETS, latency)
+        with self._lock:
+            metrics = self._views[view]
+            metrics.requests[method, status] += 1
+            metrics.buckets[position] += 1
+            metrics.latency_sum += latency
+            metrics.latency_count += 1
+            metrics.sql_queries += sql_queries
+            metrics.sql_seconds += sql_seconds
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        """
+        Retourne toutes les métriques au format d'exposition texte de Prometheus.
+        """
+        with self._lock:
+            views = sorted(
+                (view, dict(metrics.requests), list(metrics.buckets), metrics.latency_sum,
+                 metrics.latency_count, metrics.sql_queries, metrics.sql_seconds)
+                for view, metrics in self._views.items()
+            )
+
+        lines = [
+            '# HELP http_requests_total Requêtes HTTP traitées, par vue, méthode et statut.',
+            '# TYPE http_requests_total counter',
+        ]
+        for view, requests, *_ in views:
+            for (method, status), count in sorted(requests.items()):
+                lines.append(f'http_requests_total{{view="{_escape(view)}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP http_request_duration_seconds Durée de traitement des requêtes HTTP, par vue.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for view, _, buckets, latency_sum, latency_count, _, _ in views:
+            label = f'view="{_escape(view)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{label},le="+Inf"}} {latency_count}')
+            lines.append(f'http_request_duration_seconds_sum{{{label}}} {latency_sum:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{label}}} {latency_count}')
+
+        lines += [
+            '# HELP db_queries_total Requêtes SQL exécutées pendant les requêtes HTTP, par vue.',
+            '# TYPE db_queries_total counter',
+        ]
+        lines += [f'db_queries_total{{view="{_escape(view)}"}} {queries}' for view, *_, queries, _ in views]
+        lines += [
+            '# HELP db_query_duration_seconds_total Durée cumulée des requêtes SQL, par vue.',
+            '# TYPE db_query_duration_seconds_total counter',
+        ]
+        lines += [f'db_query_duration_seconds_total{{view="{_escape(view)}"}} {seconds:.6f}' for view, *_, seconds in views]
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """
+    Expose les métriques du processus. La requête doit porter l'en-tête
+    `Authorization: Bearer <METRICS_TOKEN>` ; sans METRICS_TOKEN, l'endpoint
+    n'est ouvert qu'en DEBUG et répond 404 sinon.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
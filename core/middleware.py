@@ -0,0 +1,55 @@
+# core/middleware.py
+
+import time
+
+from django.db import connection
+
+from .metrics import registry
+
+# Méthodes enregistrées telles quelles ; les autres sont regroupées (séries bornées)
+KNOWN_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'})
+
+
+class _QueryTimer:
+    """
+    Wrapper d'exécution SQL (connection.execute_wrapper) : compte les requêtes
+    et cumule leur durée.
+    """
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """
+    Mesure chaque requête (latence, nombre et durée des requêtes SQL) et
+    l'enregistre dans core.metrics.registry sous le nom de sa vue.
+    À placer en tête de MIDDLEWARE pour inclure le coût des autres middlewares.
+    Pour une réponse en flux (export), la génération du corps n'est pas comptée.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = (match.view_name or match.route or 'unnamed') if match else 'unmatched'
+        method = request.method if request.method in KNOWN_METHODS else 'OTHER'
+        registry.observe(view, method, response.status_code, latency, timer.count, timer.seconds)
+        return response
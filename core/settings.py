@@ -112,8 +112,15 @@ CORS_ALLOWED_ORIGINS = [
 # ✅ Nécessaire pour les cookies
 CORS_ALLOW_CREDENTIALS = True
 
+# En-têtes propres à l'API : Idempotency-Key (api/idempotency.py), X-Profile (api/profiling.py)
+from corsheaders.defaults import default_headers
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key', 'x-profile')
+CORS_EXPOSE_HEADERS = ('ETag', 'Idempotent-Replayed', 'X-Profile-Id')
+
 # SITE_ID = 1
 MIDDLEWARE = [
+    # En premier : la latence mesurée inclut les autres middlewares (voir core/metrics.py)
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
       'whitenoise.middleware.WhiteNoiseMiddleware',
      
@@ -123,6 +130,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Profilage à la demande (en-tête X-Profile, staff uniquement), voir api/profiling.py
+    'api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -156,6 +165,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Base de test sur fichier : la base mémoire partagée de SQLite verrouille par table
+        # sans attente, ce qui fait échouer les tests concurrents (tests_payments)
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
     }
 # else:
@@ -174,6 +186,59 @@ import os
 #     )
 # }
 
+# Cache (instantanés du catalogue et sa révision, voir api/catalog.py ; révision
+# des barèmes, voir api/tariffs.py).
+# CACHE_URL (redis://hôte:port/0) : cache Redis partagé par tous les workers, exigé
+# dès qu'il y a plus d'un processus. Sans CACHE_URL, chaque processus garde ses
+# propres révisions en mémoire : une modification du catalogue n'est vue que par
+# le worker qui l'a faite (les autres servent l'ancien catalogue et d'autres ETag)
+# et un changement de barème n'atteint pas les autres workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL'),
+    } if os.getenv('CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Emails : envoyés hors requête par la commande send_outbox_emails (voir api/outbox.py)
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 30
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'SIMU <no-reply@simu.local>')
+
+# Jeton exigé par /metrics (en-tête Authorization: Bearer <jeton>) ; si vide, l'endpoint
+# n'est ouvert qu'en DEBUG et répond 404 sinon
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# Secrets de signature des webhooks de paiement, par opérateur (voir api/payments.py).
+# Un opérateur sans secret n'est pas accepté ; « sandbox » est le simulateur local
+# (commande simulate_payment_provider), à ne configurer qu'en test de charge.
+PAYMENT_WEBHOOK_SECRETS = {
+    'orange_money': os.getenv('ORANGE_MONEY_WEBHOOK_SECRET'),
+    'mtn_momo': os.getenv('MTN_MOMO_WEBHOOK_SECRET'),
+    'sandbox': os.getenv('SANDBOX_WEBHOOK_SECRET'),
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '{asctime} {levelname} {name} {message}', 'style': '{'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'api': {'handlers': ['console'], 'level': os.getenv('API_LOG_LEVEL', 'INFO')},
+    },
+}
+
 SWAGGER_SETTINGS = {
     # ...
     'VALIDATOR_URL': 'http://localhost:8189',
@@ -228,6 +293,10 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Fichiers générés par l'application (reçus PDF, voir api/receipts.py).
+# Non servis directement : les reçus passent par l'API, qui vérifie les droits.
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
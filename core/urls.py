@@ -22,6 +22,8 @@ from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
 
+from .metrics import metrics_view
+
 schema_view = get_schema_view(
    openapi.Info(
       title="Snippets API",
@@ -46,6 +48,8 @@ urlpatterns = [
         path('', lambda request: redirect('schema-swagger-ui', permanent=False)),
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')) ,
+    # Métriques Prometheus (voir core/metrics.py)
+    path('metrics', metrics_view, name='metrics'),
       # Documentation Swagger
      path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),